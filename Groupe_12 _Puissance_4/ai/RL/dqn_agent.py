@@ -6,9 +6,13 @@ from tensorflow.keras.layers import Input, Dense, Flatten, Conv2D, BatchNormaliz
 from tensorflow.keras.optimizers import Adam
 import numpy as np
 import random
-from collections import deque
 import os
 
+try:
+    from ai.RL.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+except ImportError:  # Run from the ai/RL directory (train_dqn_selfplay.py)
+    from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+
 
 class DQNAgent:
 
@@ -24,12 +28,20 @@ class DQNAgent:
                  batch_size=128,
                  target_update_freq=1000,
                  use_double_dqn=True,
-                 use_dueling_dqn=False
+                 use_dueling_dqn=False,
+                 prioritized_replay=False,
+                 priority_alpha=0.6,
+                 priority_beta=0.4
                  ):
 
         self.state_shape = state_shape
         self.action_size = action_size
-        self.memory = deque(maxlen=memory_size)
+        # Preallocated ring buffer (optionally prioritized)
+        if prioritized_replay:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_shape,
+                                                  alpha=priority_alpha, beta=priority_beta)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_shape)
         self.gamma = gamma
         self.epsilon = epsilon
         # Store initial epsilon for potential resets/scheduling
@@ -113,10 +125,16 @@ class DQNAgent:
     # Store experience in replay memory
 
     def remember(self, state, action, reward, next_state, done):
-        # Ensure states are numpy arrays before adding
-        state = np.asarray(state, dtype=np.float32)
-        next_state = np.asarray(next_state, dtype=np.float32)
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
+
+    def q_values(self, states):
+        """ Q-values of a batch of states in a single forward pass. """
+        states = np.asarray(states, dtype=np.float32)
+        # Calling the model directly avoids the per-call overhead of predict()
+        return self.model(states, training=False).numpy()
 
     # Select an action based on the current state and valid actions
 
@@ -125,45 +143,42 @@ class DQNAgent:
             print("Error: Agent received no valid actions.")
             return None  # Or raise error
 
-        current_epsilon = 0.0 if force_exploit else self.epsilon
-
-        if np.random.rand() <= current_epsilon:
-            # Exploration: Choose a random valid action
-            return random.choice(valid_actions)
-        else:
-            # Exploitation: Choose the best valid action according to the main model
-            if state.ndim == 2:  # If state is (6, 7)
-                state_reshaped = np.expand_dims(
-                    np.expand_dims(state, axis=0), axis=-1)
-            elif state.ndim == 3:  # If state is (6, 7, 1)
-                state_reshaped = np.expand_dims(state, axis=0)
-            else:  # Should already be (1, 6, 7, 1) potentially
-                state_reshaped = state
-
-            if state_reshaped.shape != (1,) + self.state_shape:
-                print(f"Error: State shape mismatch in act. Expected {
-                      (1,) + self.state_shape}, got {state_reshaped.shape}")
-                return random.choice(valid_actions)  # Fallback
-
-            act_values = self.model.predict(state_reshaped, verbose=0)[0]
-
+        state = np.asarray(state, dtype=np.float32).reshape(self.state_shape)
+        valid_mask = np.zeros((1, self.action_size), dtype=bool)
+        valid_mask[0, valid_actions] = True
+        epsilon = 0.0 if force_exploit else self.epsilon
+        return int(self.act_batch(state[np.newaxis], valid_mask, epsilon)[0])
+
+    def act_batch(self, states, valid_masks, epsilons):
+        """
+        Epsilon-greedy actions for a batch of states with one forward pass.
+
+        Parameters:
+        - states: (N,) + state_shape array
+        - valid_masks: (N, action_size) boolean array of the valid actions
+          (every row must have at least one)
+        - epsilons: exploration rate, a scalar or one per state
+
+        Returns:
+        - (N,) array of actions
+        """
+        valid_masks = np.asarray(valid_masks, dtype=bool)
+        count = len(valid_masks)
+        epsilons = np.broadcast_to(np.asarray(epsilons, dtype=np.float32), (count,))
+        explore = np.random.rand(count) < epsilons
+
+        actions = np.empty(count, dtype=np.int64)
+        if explore.any():
+            # Random valid action: argmax of random scores over the valid actions
+            scores = np.where(valid_masks[explore], np.random.rand(explore.sum(), self.action_size), -1.0)
+            actions[explore] = np.argmax(scores, axis=1)
+        exploit = ~explore
+        if exploit.any():
+            q = self.q_values(np.asarray(states)[exploit])
             # Mask invalid actions by setting their Q-values low
-            masked_act_values = np.full(self.action_size, -np.inf)
-            masked_act_values[valid_actions] = act_values[valid_actions]
-
-            best_action = np.argmax(masked_act_values)
-
-            # Sanity check
-            if best_action not in valid_actions:
-                print(f"CRITICAL Error: Agent chose invalid action {
-                      best_action} despite masking.")
-                print(f"Original Q-values: {act_values}")
-                print(f"Valid actions: {valid_actions}")
-                print(f"Masked Q-values: {masked_act_values}")
-                # Fallback to a random valid action if error occurs
-                return random.choice(valid_actions)
-
-            return best_action
+            q = np.where(valid_masks[exploit], q, -np.inf)
+            actions[exploit] = np.argmax(q, axis=1)
+        return actions
 
     # Train the model using a batch of experiences from replay memory
 
@@ -171,28 +186,21 @@ class DQNAgent:
         if len(self.memory) < self.batch_size:
             return 0.0  # Not enough samples yet
 
-        minibatch = random.sample(self.memory, self.batch_size)
-
-        states = np.array([experience[0] for experience in minibatch])
-        actions = np.array([experience[1] for experience in minibatch])
-        rewards = np.array([experience[2] for experience in minibatch])
-        next_states = np.array([experience[3] for experience in minibatch])
-        dones = np.array([experience[4] for experience in minibatch])
-
-        if states.ndim == 3:  # Shape (batch, rows, cols)
-            states = np.expand_dims(states, axis=-1)
-            next_states = np.expand_dims(next_states, axis=-1)
+        states, actions, rewards, next_states, dones, indices, weights = \
+            self.memory.sample(self.batch_size)
 
+        # Current and next states go through the main model in one pass
+        q_main = self.q_values(np.concatenate([states, next_states]))
+        q_current_main = q_main[:self.batch_size]
+        q_next_main = q_main[self.batch_size:]
         # Predict Q-values for next states using the *target* model for stability
-        q_next_target = self.target_model.predict(next_states, verbose=0)
+        q_next_target = self.target_model(next_states, training=False).numpy()
 
+        batch_indices = np.arange(self.batch_size)
         if self.use_double_dqn:
             # Double DQN, select best action using the main model
-            q_next_main = self.model.predict(next_states, verbose=0)
+            # and evaluate it using the target model
             best_actions_next = np.argmax(q_next_main, axis=1)
-            # Evaluate the selected action using the targe* model
-            # Gather the Q-values from target_model corresponding to the best actions chosen by main_model
-            batch_indices = np.arange(self.batch_size)
             q_next_target_selected = q_next_target[batch_indices,
                                                    best_actions_next]
             target_q_values = rewards + \
@@ -202,19 +210,18 @@ class DQNAgent:
             max_q_next = np.max(q_next_target, axis=1)
             target_q_values = rewards + (self.gamma * max_q_next * (1 - dones))
 
-        # Predict current Q-values using the main model (to update them)
-        q_current_main = self.model.predict(states, verbose=0)
-
         # Create target vector for training: update only the Q-value for the action taken
         target_q_for_training = q_current_main.copy()
-        batch_indices = np.arange(self.batch_size)
         target_q_for_training[batch_indices, actions] = target_q_values
 
-        # Train the main model
-        history = self.model.fit(states, target_q_for_training,
-                                 batch_size=self.batch_size,
-                                 epochs=1, verbose=0)
-        loss = history.history['loss'][0]
+        # New priorities from the TD errors (no-op for uniform replay)
+        self.memory.update_priorities(
+            indices, target_q_values - q_current_main[batch_indices, actions])
+
+        # Train the main model (importance-sampling weights for prioritized replay)
+        loss = self.model.train_on_batch(states, target_q_for_training,
+                                         sample_weight=weights)
+        loss = float(np.mean(loss))
 
         # Epsilon Decay
         if self.epsilon > self.epsilon_min:
@@ -0,0 +1,152 @@
+# replay_buffer.py
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Experience replay memory stored in preallocated NumPy ring buffers
+    (states, actions, rewards, next states, done flags).
+
+    Adding a transition writes one slot and sampling draws indices directly,
+    so both are O(1) per transition whatever the capacity. Agent-view states
+    only hold -1, 0 and 1, so they are stored as int8 and converted to
+    float32 when sampled.
+    """
+
+    def __init__(self, capacity, state_shape, state_dtype=np.int8, seed=None):
+        self.capacity = capacity
+        self.states = np.zeros((capacity,) + tuple(state_shape), dtype=state_dtype)
+        self.next_states = np.zeros_like(self.states)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.position = 0  # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def _slots(self, count):
+        """Indices of the next count slots (wrapping around), and advance."""
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        return slots
+
+    def add(self, state, action, reward, next_state, done):
+        slot = self.position
+        self.states[slot] = state
+        self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.next_states[slot] = next_state
+        self.dones[slot] = done
+        self.position = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return slot
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Add several transitions at once (arrays with the same first dimension)."""
+        count = len(actions)
+        if count > self.capacity:  # Only the last transitions would be kept
+            states, actions, rewards, next_states, dones = (
+                array[-self.capacity:] for array in (states, actions, rewards, next_states, dones))
+            count = self.capacity
+        slots = self._slots(count)
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        return slots
+
+    def gather(self, indices):
+        """Transitions at the given indices, with float32 states."""
+        return (self.states[indices].astype(np.float32),
+                self.actions[indices],
+                self.rewards[indices],
+                self.next_states[indices].astype(np.float32),
+                self.dones[indices])
+
+    def sample(self, batch_size):
+        """
+        Uniformly sampled transitions (with replacement).
+
+        Returns:
+        - (states, actions, rewards, next_states, dones, indices, weights);
+          weights are all 1 (see PrioritizedReplayBuffer)
+        """
+        indices = self.rng.integers(0, self.size, batch_size)
+        weights = np.ones(batch_size, dtype=np.float32)
+        return self.gather(indices) + (indices, weights)
+
+    def update_priorities(self, indices, errors):
+        """No-op: uniform sampling does not use priorities."""
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized replay: a transition is sampled with probability
+    proportional to priority^alpha, where its priority is its last TD error.
+    New transitions get the highest priority seen so far.
+
+    Priorities are kept in a sum tree stored as a flat array (leaves at
+    [leaf_count, 2 * leaf_count)); a whole batch descends the tree together,
+    one vectorized step per level. Importance-sampling weights correct the
+    bias, with beta annealed towards 1 over beta_steps samples.
+    """
+
+    def __init__(self, capacity, state_shape, alpha=0.6, beta=0.4, beta_steps=100000,
+                 epsilon=1e-6, state_dtype=np.int8, seed=None):
+        super().__init__(capacity, state_shape, state_dtype, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = (1.0 - beta) / beta_steps if beta_steps else 0.0
+        self.epsilon = epsilon
+        self.leaf_count = 1 << max(0, (capacity - 1).bit_length())
+        self.depth = self.leaf_count.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_count, dtype=np.float64)
+        self.max_priority = 1.0
+
+    def _set_priorities(self, slots, priorities):
+        nodes = np.asarray(slots) + self.leaf_count
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes >> 1)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def add(self, state, action, reward, next_state, done):
+        slot = super().add(state, action, reward, next_state, done)
+        self._set_priorities([slot], self.max_priority)
+        return slot
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        slots = super().add_batch(states, actions, rewards, next_states, dones)
+        self._set_priorities(slots, self.max_priority)
+        return slots
+
+    def sample(self, batch_size):
+        total = self.tree[1]
+        # One stratified target per batch element, all descending the tree together
+        targets = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        nodes = np.ones(batch_size, dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = targets >= left_sums
+            targets = np.where(go_right, targets - left_sums, targets)
+            nodes = np.where(go_right, left + 1, left)
+        indices = np.minimum(nodes - self.leaf_count, self.size - 1)
+
+        probabilities = self.tree[indices + self.leaf_count] / total
+        weights = (self.size * np.maximum(probabilities, 1e-12)) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return self.gather(indices) + (indices, weights)
+
+    def update_priorities(self, indices, errors):
+        priorities = (np.abs(errors) + self.epsilon) ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        # Keep the last priority of duplicated indices
+        indices, last = np.unique(np.asarray(indices)[::-1], return_index=True)
+        self._set_priorities(indices, priorities[::-1][last])
@@ -35,6 +35,7 @@ WEIGHTS_FILE_PATTERN = "connect4-dqn-selfplay-ep{}.weights.h5"
 LATEST_WEIGHTS_FILE = "connect4-dqn-selfplay-latest.weights.h5"
 
 REPLAY_EVERY_N_AGENT_MOVES = 1
+NUM_PARALLEL_GAMES = 64     # Games played in lockstep (one batched forward pass per step)
 
 # DQN Agent Hyperparameters
 LEARNING_RATE = 0.00025
@@ -46,6 +47,7 @@ MEMORY_SIZE = 500000
 BATCH_SIZE = 1024
 TARGET_UPDATE_FREQ = 2000
 USE_DOUBLE_DQN = True
+USE_PRIORITIZED_REPLAY = False
 
 
 # Translates board from PLAYER1/PLAYER2 to AGENT_ID/OPPONENT_ID.
@@ -57,6 +59,108 @@ def translate_board_to_agent(board_state, agent_player_id):
     return np.expand_dims(agent_board, axis=-1)  # Add channel dim
 
 
+# Vectorized translate_board_to_agent for a (N, rows, cols) stack of boards.
+def translate_boards_to_agent(boards, agent_player_ids):
+    agent_ids = np.asarray(agent_player_ids).reshape(-1, 1, 1)
+    agent_boards = np.where(boards == agent_ids, AGENT_ID,
+                            np.where(boards == EMPTY, EMPTY, OPPONENT_ID))
+    return agent_boards.astype(np.float32)[..., np.newaxis]
+
+
+class LockstepSelfPlay:
+    """
+    N self-play games advanced together: at every step, the player to move
+    in each game is chosen by a single batched forward pass of the agent.
+    The learning agent (random side, epsilon-greedy) plays against the same
+    network without exploration. A finished game is restarted at once until
+    total_episodes games have been started.
+    """
+
+    def __init__(self, agent, num_games, total_episodes):
+        self.agent = agent
+        self.total_episodes = total_episodes
+        self.episodes_started = 0
+        self.envs = [ConnectFourBoard() for _ in range(min(num_games, total_episodes))]
+        self.agent_ids = np.zeros(len(self.envs), dtype=np.int64)
+        self.current_players = np.zeros(len(self.envs), dtype=np.int64)
+        self.episode_memory = [[] for _ in self.envs]
+        self.episode_reward = np.zeros(len(self.envs))
+        self.episode_steps = np.zeros(len(self.envs), dtype=np.int64)
+        self.episode_start = np.zeros(len(self.envs))
+        self.active = np.zeros(len(self.envs), dtype=bool)
+        for i in range(len(self.envs)):
+            self._start(i)
+
+    def _start(self, i):
+        if self.episodes_started >= self.total_episodes:
+            self.active[i] = False
+            return
+        self.episodes_started += 1
+        self.envs[i].reset()
+        self.agent_ids[i] = random.choice([PLAYER1, PLAYER2])
+        self.current_players[i] = PLAYER1
+        self.episode_memory[i] = []
+        self.episode_reward[i] = 0.0
+        self.episode_steps[i] = 0
+        self.episode_start[i] = time.time()
+        self.active[i] = True
+
+    def _finish(self, i, final_reward):
+        # The learning agent's last transition gets the final reward and becomes terminal
+        memory = self.episode_memory[i]
+        if memory:
+            s, a, r, ns, d = memory[-1]
+            memory[-1] = (s, a, final_reward, ns, True)
+        self.episode_reward[i] += final_reward
+
+    def step(self):
+        """
+        Play one move in every active game.
+
+        Returns:
+        - (number of learning agent moves, list of (reward, steps, duration)
+          of the games that finished)
+        """
+        games = np.flatnonzero(self.active)
+        boards = np.stack([self.envs[i].board for i in games])
+        players = self.current_players[games]
+        learning = players == self.agent_ids[games]
+        states = translate_boards_to_agent(boards, players)
+        valid_masks = boards[:, 0, :] == EMPTY  # Top row free
+        epsilons = np.where(learning, self.agent.epsilon, 0.0)
+        actions = self.agent.act_batch(states, valid_masks, epsilons)
+
+        for i, action in zip(games, actions):
+            self.envs[i].drop_piece(int(action), int(self.current_players[i]))
+        next_states = translate_boards_to_agent(
+            np.stack([self.envs[i].board for i in games]), self.agent_ids[games])
+
+        finished = []
+        for k, i in enumerate(games):
+            env = self.envs[i]
+            self.episode_steps[i] += 1
+            if learning[k]:
+                reward = 1.0 if env.game_over and env.winner == self.agent_ids[i] else 0.0
+                self.episode_reward[i] += reward
+                self.episode_memory[i].append(
+                    (states[k], actions[k], reward, next_states[k], env.game_over))
+            elif env.game_over:
+                # Opponent won (the learning agent lost) or drew
+                self._finish(i, -1.0 if env.winner is not None else 0.0)
+
+            if env.game_over or self.episode_steps[i] >= MAX_STEPS_PER_EPISODE:
+                memory = self.episode_memory[i]
+                if memory:
+                    self.agent.remember_batch(*(np.array(column) for column in zip(*memory)))
+                finished.append((self.episode_reward[i], int(self.episode_steps[i]),
+                                 time.time() - self.episode_start[i]))
+                self._start(i)
+            else:
+                self.current_players[i] = PLAYER2 if self.current_players[i] == PLAYER1 else PLAYER1
+
+        return int(learning.sum()), finished
+
+
 def print_game_board(board_state):
     print("\n  0   1   2   3   4   5   6 ")
     print("-----------------------------")
@@ -93,8 +197,7 @@ def name():
 if __name__ == "__main__":
     print("--- Starting DQN Self-Play Training ---")
 
-    # --- Initialize Environment and Agent ---
-    env = ConnectFourBoard()
+    # --- Initialize Agent ---
     state_shape = (ConnectFourBoard.ROW_COUNT,
                    ConnectFourBoard.COLUMN_COUNT, 1)
     action_size = ConnectFourBoard.COLUMN_COUNT
@@ -109,10 +212,10 @@ if __name__ == "__main__":
                      memory_size=MEMORY_SIZE,
                      batch_size=BATCH_SIZE,
                      target_update_freq=TARGET_UPDATE_FREQ,
-                     use_double_dqn=USE_DOUBLE_DQN)
+                     use_double_dqn=USE_DOUBLE_DQN,
+                     prioritized_replay=USE_PRIORITIZED_REPLAY)
 
     # Load Previous Weights (Optional)
-    start_episode = 0
     if os.path.exists(LATEST_WEIGHTS_FILE):
         print(f"Loading weights from {LATEST_WEIGHTS_FILE}")
         if agent.load(LATEST_WEIGHTS_FILE):
@@ -122,190 +225,56 @@ if __name__ == "__main__":
     else:
         print("No previous weights found. Starting from scratch.")
 
-    total_steps = 0
-    # Track rewards of last 100 episodes for avg
+    # Track rewards of last 100 episodes and losses of the last 100 replays
     episode_rewards = deque(maxlen=100)
-    episode_losses = deque(maxlen=100)
+    replay_losses = deque(maxlen=100)
 
     # Counter for replay frequency control
     agent_moves_since_last_replay = 0
-
-    print(f"Training for {TOTAL_EPISODES} episodes...")
-
-    for e in range(start_episode, TOTAL_EPISODES):
-        episode_start_time = time.time()
-        env.reset()
-
-        player_id_agent = random.choice([PLAYER1, PLAYER2])
-        player_id_opponent = PLAYER2 if player_id_agent == PLAYER1 else PLAYER1
-
-        current_player_env = PLAYER1
-
-        current_board_state = env.get_board()
-        done = False
-        step_in_episode = 0
-        episode_reward_sum = 0  # Track the learning agent's reward sum for this episode
-        episode_loss_sum = 0
-        # How many times the learning agent moved (and potentially replayed)
-        agent_learn_move_count = 0
-
-        # Temporary storage for the learning agent's transitions this episode
-        episode_memory = []
-
-        last_agent_state = None
-        last_agent_action = None
-
-        while not done and step_in_episode < MAX_STEPS_PER_EPISODE:
-            valid_locations = env.get_valid_locations()
-            if not valid_locations:
-                done = True
-                # Ensure the last transition reflects the draw if agent made last move
-                if episode_memory:
-                    s, a, r, ns, d = episode_memory[-1]
-                    if not d:
-                        episode_memory[-1] = (s, a, 0.0, ns, True)
-                break
-
-            action = -1
-
-            # Determine whose turn it is
-            is_learning_agent_turn = (current_player_env == player_id_agent)
-
-            # Select Action
-            if is_learning_agent_turn:
-                state_agent_view = translate_board_to_agent(
-                    current_board_state, player_id_agent)
-                last_agent_state = state_agent_view
-
-                # Use exploration
-                action = agent.act(
-                    state_agent_view, valid_locations, force_exploit=False)
-                if action is None:
-                    print(
-                        f"Error: Learning Agent failed to produce action in episode {e+1}.")
-                    done = True
-                    break
-
-                last_agent_action = action
-
-            else:
-                state_opponent_view = translate_board_to_agent(
-                    current_board_state, player_id_opponent)
-
-                # NO exploration
-                action = agent.act(state_opponent_view,
-                                   valid_locations, force_exploit=True)
-                if action is None:
-                    print(
-                        f"Error: Opponent Agent failed to produce action in episode {e+1}.")
-                    done = True
-                    break
-
-            row_placed = env.drop_piece(action, current_player_env)
-            if row_placed == -1:
-                print(f"CRITICAL ERROR: Episode {
-                      e+1}, Player {current_player_env} chose invalid action {action}.")
-                done = True
-                break
-
-            next_board_state = env.get_board()
-            step_in_episode += 1
-            total_steps += 1
-
-            # Reward Calculation & Memory Management (Focus on Learning Agent)
-            game_over = env.game_over
-            winner = env.winner  # None, PLAYER1, or PLAYER2
-
-            # We only store experiences and assign rewards from the perspective of the learning agent
-            if is_learning_agent_turn:
-                reward = 0.0  # Default reward for non-terminal move
-                is_terminal_state_after_agent = False
-
-                if game_over:
-                    is_terminal_state_after_agent = True
-                    if winner == player_id_agent:
-                        reward = 1.0  # Agent won
-                        episode_reward_sum += reward
-                    elif winner is None:  # Draw
-                        reward = 0.0  # Draw reward (agent didn't lose)
-                        episode_reward_sum += reward
-
-                next_state_agent_view = translate_board_to_agent(
-                    next_board_state, player_id_agent)
-                # Store the transition for the learning agent
-                episode_memory.append((last_agent_state, last_agent_action,
-                                      reward, next_state_agent_view, is_terminal_state_after_agent))
-                agent_learn_move_count += 1
-
-                # Agent Learning Step
-                agent_moves_since_last_replay += 1
-                if agent_moves_since_last_replay >= REPLAY_EVERY_N_AGENT_MOVES:
-                    loss = agent.replay()
-                    if loss is not None:
-                        episode_loss_sum += loss
-                    agent_moves_since_last_replay = 0  # Reset counter
-
-            else:
-                if game_over:
-                    if winner == player_id_opponent:  # Learning Agent Lost
-                        # Update the last stored transition in episode_memory for the learning agent
-                        if episode_memory:
-                            s, a, r, ns, d = episode_memory.pop()
-                            episode_memory.append((s, a, -1.0, ns, True))
-                            episode_reward_sum -= 1.0  # Agent lost
-
-                    elif winner is None:
-                        if episode_memory:
-                            s, a, r, ns, d = episode_memory.pop()
-                            # Mark as done, reward remains 0.0 for draw
-                            episode_memory.append((s, a, 0.0, ns, True))
-                            episode_reward_sum += 0.0  # Agent didn't lose
-
-            current_board_state = next_board_state
-            done = game_over
-            if not done:
-                # Switch environment player
-                current_player_env = PLAYER2 if current_player_env == PLAYER1 else PLAYER1
-
-        # End of Episode
-        episode_duration = time.time() - episode_start_time
-
-        # Add this episode's transitions (from learning agent's perspective) to main replay buffer
-        for experience in episode_memory:
-            agent.remember(*experience)
-
-        # Logging
-        episode_rewards.append(episode_reward_sum)
-        avg_reward = sum(episode_rewards) / \
-            len(episode_rewards) if episode_rewards else 0.0
-        # Calculate avg loss per learning step in the episode
-        avg_loss_episode = episode_loss_sum / \
-            (agent_learn_move_count /
-             REPLAY_EVERY_N_AGENT_MOVES) if agent_learn_move_count > 0 else 0.0
-        if agent_learn_move_count > 0:
-            episode_losses.append(avg_loss_episode)
-        avg_loss_hist = sum(episode_losses) / \
-            len(episode_losses) if episode_losses else 0.0
-
-        if (e + 1) % LOG_FREQ == 0:
-            print(f"Ep {e+1}/{TOTAL_EPISODES} | Steps: {step_in_episode} | Duration: {episode_duration:.2f}s | "
-                  f"Epsilon: {agent.epsilon:.4f} | "
-                  # Removed MM Depth
-                  f"Ep Reward: {episode_reward_sum:.1f} | Avg Reward (100): {
-                avg_reward:.3f} | "
-                f"Avg Loss (100): {avg_loss_hist:.4f}")
-
-        # Saving Weights
-        if (e + 1) % SAVE_FREQ == 0:
-            save_path = WEIGHTS_FILE_PATTERN.format(e+1)
-            agent.save(save_path)
-            # Overwrite latest for easy loading
-            agent.save(LATEST_WEIGHTS_FILE)
+    episodes_done = 0
+
+    print(f"Training for {TOTAL_EPISODES} episodes, "
+          f"{NUM_PARALLEL_GAMES} games in lockstep...")
+    selfplay = LockstepSelfPlay(agent, NUM_PARALLEL_GAMES, TOTAL_EPISODES)
+
+    while episodes_done < TOTAL_EPISODES:
+        agent_moves, finished = selfplay.step()
+
+        # Agent Learning Steps
+        agent_moves_since_last_replay += agent_moves
+        while agent_moves_since_last_replay >= REPLAY_EVERY_N_AGENT_MOVES:
+            loss = agent.replay()
+            if loss is not None:
+                replay_losses.append(loss)
+            agent_moves_since_last_replay -= REPLAY_EVERY_N_AGENT_MOVES
+
+        for episode_reward_sum, step_in_episode, episode_duration in finished:
+            episodes_done += 1
+            e = episodes_done - 1
+
+            # Logging
+            episode_rewards.append(episode_reward_sum)
+            avg_reward = sum(episode_rewards) / \
+                len(episode_rewards) if episode_rewards else 0.0
+            avg_loss_hist = sum(replay_losses) / \
+                len(replay_losses) if replay_losses else 0.0
+
+            if (e + 1) % LOG_FREQ == 0:
+                print(f"Ep {e+1}/{TOTAL_EPISODES} | Steps: {step_in_episode} | Duration: {episode_duration:.2f}s | "
+                      f"Epsilon: {agent.epsilon:.4f} | "
+                      f"Ep Reward: {episode_reward_sum:.1f} | Avg Reward (100): {avg_reward:.3f} | "
+                      f"Avg Loss (100): {avg_loss_hist:.4f}")
+
+            # Saving Weights
+            if (e + 1) % SAVE_FREQ == 0:
+                save_path = WEIGHTS_FILE_PATTERN.format(e+1)
+                agent.save(save_path)
+                # Overwrite latest for easy loading
+                agent.save(LATEST_WEIGHTS_FILE)
 
     # End of Training
     print("\n--- Self-Play Training Finished ---")
     final_save_path = WEIGHTS_FILE_PATTERN.format(TOTAL_EPISODES)
     agent.save(final_save_path)
     agent.save(LATEST_WEIGHTS_FILE)
-    print(f"Final model weights saved to {
-          final_save_path} and {LATEST_WEIGHTS_FILE}")
+    print(f"Final model weights saved to {final_save_path} and {LATEST_WEIGHTS_FILE}")
@@ -0,0 +1,185 @@
+"""
+Window-based board evaluation shared by the Minimax, Negamax and Genetic AIs.
+
+A board is scored by looking at its 69 windows of 4 aligned cells
+(horizontal, vertical and both diagonals) plus the pieces in the center
+column. Each window is summarized by a single code, own + 5 * opp, where own
+and opp are the number of pieces of each player in it; a table indexed by
+this code gives the score of the window.
+
+Two modes are provided:
+- score_boards: scores one board or a whole batch of boards with NumPy,
+- IncrementalEvaluator: keeps the window codes of a position and updates only
+  the windows containing the last played (or undone) cell, for tree searches.
+"""
+import numpy as np
+
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+WINDOW_LENGTH = 4
+CENTER_COLUMN = COLUMN_COUNT // 2
+
+# Cell codes: a window code is the sum of the codes of its cells
+OWN_CODE = 1
+OPP_CODE = 5
+CODE_COUNT = 5 * OPP_CODE
+
+
+def _window_cells():
+    """Flat cell indices (row * 7 + col) of the 4 cells of every window."""
+    windows = []
+    # Horizontal
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT - WINDOW_LENGTH + 1):
+            windows.append([r * COLUMN_COUNT + c + i for i in range(WINDOW_LENGTH)])
+    # Vertical
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT - WINDOW_LENGTH + 1):
+            windows.append([(r + i) * COLUMN_COUNT + c for i in range(WINDOW_LENGTH)])
+    # Positive diagonal
+    for r in range(ROW_COUNT - WINDOW_LENGTH + 1):
+        for c in range(COLUMN_COUNT - WINDOW_LENGTH + 1):
+            windows.append([(r + i) * COLUMN_COUNT + c + i for i in range(WINDOW_LENGTH)])
+    # Negative diagonal
+    for r in range(WINDOW_LENGTH - 1, ROW_COUNT):
+        for c in range(COLUMN_COUNT - WINDOW_LENGTH + 1):
+            windows.append([(r - i) * COLUMN_COUNT + c + i for i in range(WINDOW_LENGTH)])
+    return windows
+
+
+# (69, 4) table of window cell indices
+WINDOW_INDICES = np.array(_window_cells(), dtype=np.intp)
+WINDOW_COUNT = len(WINDOW_INDICES)
+
+# Windows containing each cell
+CELL_WINDOWS = tuple(
+    tuple(int(w) for w in np.flatnonzero((WINDOW_INDICES == cell).any(axis=1)))
+    for cell in range(ROW_COUNT * COLUMN_COUNT)
+)
+
+# Code of a window seen from the other player (own and opp swapped)
+SWAPPED_CODE = np.array([(code // OPP_CODE) + OPP_CODE * (code % OPP_CODE)
+                         for code in range(CODE_COUNT)], dtype=np.intp)
+
+
+def window_scores(own4, own3, own2, opp3, opp2=0, opp4=0):
+    """
+    Build the table of window scores indexed by window code (own + 5 * opp).
+
+    Parameters:
+    - own4, own3, own2: score of a window with 4, 3 or 2 own pieces and the
+      rest empty
+    - opp3, opp2, opp4: same for the opponent's pieces
+
+    Returns:
+    - numpy array of 25 scores (0 for mixed windows)
+    """
+    table = [0] * CODE_COUNT
+    table[4 * OWN_CODE] = own4
+    table[3 * OWN_CODE] = own3
+    table[2 * OWN_CODE] = own2
+    table[4 * OPP_CODE] = opp4
+    table[3 * OPP_CODE] = opp3
+    table[2 * OPP_CODE] = opp2
+    return np.array(table)
+
+
+# Heuristic of the Minimax and Negamax AIs
+DEFAULT_WINDOW_SCORES = window_scores(own4=100, own3=5, own2=2, opp3=-4)
+DEFAULT_CENTER_WEIGHT = 3
+
+
+def window_codes(boards, piece):
+    """
+    Window codes of one board (6, 7) or a batch of boards (n, 6, 7) from the
+    point of view of piece. Returns an array of shape (69,) or (n, 69).
+    """
+    boards = np.asarray(boards)
+    flat = boards.reshape(boards.shape[:-2] + (ROW_COUNT * COLUMN_COUNT,))
+    cells = (flat == piece) * OWN_CODE + (flat == 3 - piece) * OPP_CODE
+    return cells[..., WINDOW_INDICES].sum(axis=-1)
+
+
+def score_boards(boards, piece, table=DEFAULT_WINDOW_SCORES, center_weight=DEFAULT_CENTER_WEIGHT):
+    """
+    Score one board (6, 7) or a batch of boards (n, 6, 7) for piece.
+
+    Parameters:
+    - boards: board array(s), row 0 at the top
+    - piece: the piece (1 or 2) the score is computed for
+    - table: window scores by window code (see window_scores)
+    - center_weight: score of each own piece in the center column
+
+    Returns:
+    - a scalar for one board, an array of n scores for a batch
+    """
+    boards = np.asarray(boards)
+    scores = table[window_codes(boards, piece)].sum(axis=-1)
+    scores = scores + center_weight * np.count_nonzero(boards[..., CENTER_COLUMN] == piece, axis=-1)
+    return scores
+
+
+def score_position(board_state, piece):
+    """Score a board for piece with the Minimax/Negamax heuristic."""
+    return score_boards(board_state, piece).item()
+
+
+class IncrementalEvaluator:
+    """
+    Evaluation of a position that is updated move by move.
+
+    The window codes (from the point of view of piece 1) and the score of the
+    position for both pieces are kept up to date: playing or undoing a piece
+    only updates the windows containing its cell (at most 16).
+
+    Usage:
+        evaluator.reset(board_state)
+        evaluator.play(row, col, piece)
+        evaluator.score(piece)
+        evaluator.undo(row, col, piece)
+    """
+
+    def __init__(self, table=DEFAULT_WINDOW_SCORES, center_weight=DEFAULT_CENTER_WEIGHT):
+        table = np.asarray(table)
+        if not np.all(np.isfinite(table)):
+            raise ValueError("Incremental evaluation needs finite window scores")
+        # Window scores indexed by the code from piece 1's point of view, for each piece
+        self.tables = (None, table.tolist(), table[SWAPPED_CODE].tolist())
+        self.center_weight = center_weight
+        self.codes = [0] * WINDOW_COUNT
+        self.totals = [0, 0, 0]
+
+    def reset(self, board_state):
+        """Compute the window codes and scores of a board from scratch."""
+        self.codes = window_codes(board_state, 1).tolist()
+        self.totals = [0] + [
+            sum(self.tables[piece][code] for code in self.codes)
+            + self.center_weight * int(np.count_nonzero(np.asarray(board_state)[:, CENTER_COLUMN] == piece))
+            for piece in (1, 2)
+        ]
+
+    def play(self, row, col, piece):
+        """Update the evaluation after piece was dropped at (row, col)."""
+        self._update(row, col, piece, OWN_CODE if piece == 1 else OPP_CODE)
+
+    def undo(self, row, col, piece):
+        """Update the evaluation after the piece at (row, col) was removed."""
+        self._update(row, col, piece, -OWN_CODE if piece == 1 else -OPP_CODE)
+
+    def _update(self, row, col, piece, delta):
+        codes = self.codes
+        _, table1, table2 = self.tables
+        total1, total2 = self.totals[1], self.totals[2]
+        for w in CELL_WINDOWS[row * COLUMN_COUNT + col]:
+            old = codes[w]
+            new = old + delta
+            codes[w] = new
+            total1 += table1[new] - table1[old]
+            total2 += table2[new] - table2[old]
+        self.totals[1], self.totals[2] = total1, total2
+        if col == CENTER_COLUMN:
+            self.totals[piece] += self.center_weight if delta > 0 else -self.center_weight
+
+    def score(self, piece):
+        """Score of the current position for piece."""
+        return self.totals[piece]
@@ -1,5 +1,6 @@
 import numpy as np
 from board import ConnectFourBoard
+from ai import opening_book
 import random
 
 # Constants
@@ -445,8 +446,12 @@ def find_best_move(board, piece):
 
 # --- Public Interface ---
 
-def get_move(board_state, piece):
-    """Returns best move for the current board state"""
+def get_move(board_state, piece, use_book=True):
+    """Returns best move for the current board state (the opening book move if there is one)"""
+    if use_book:
+        col = opening_book.book_move(board_state, piece)
+        if col is not None:
+            return col
     board = ConnectFourBoard()
     board.board = board_state.copy()
     return find_best_move(board, piece)
@@ -1,8 +1,14 @@
-import numpy as np
+import json
+import os
 import random
+from functools import lru_cache
+
+import numpy as np
 from board import ConnectFourBoard
+from ai.evaluation import score_boards, window_scores
 
-BEST_WEIGHTS = np.array([
+# Chromosome: scores of own 3 / own 2 / opponent 3 / opponent 2 windows, center weight
+DEFAULT_WEIGHTS = np.array([
     100,     
     5,       
     -80,     
@@ -10,119 +16,82 @@ BEST_WEIGHTS = np.array([
     3       
 ])
 
+# Weights exported by train_genetic.py (used instead of the defaults when present)
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'genetic_weights.json')
+
+
+def load_weights(path=WEIGHTS_FILE):
+    """Weights from a file written by train_genetic.py, or DEFAULT_WEIGHTS if there is none."""
+    if not os.path.exists(path):
+        return DEFAULT_WEIGHTS
+    with open(path) as f:
+        return np.array(json.load(f)['weights'])
+
+
+BEST_WEIGHTS = load_weights()
+
 AI_PIECE = 2
 PLAYER_PIECE = 1
 EMPTY_SLOT = 0
 
 
-def evaluate_window(window, piece, weights):
-    """Calculates the score for a 4-slot window."""
-    score = 0
-    opponent_piece = 3 - piece # Determine opponent's piece (1 vs 2)
-
-    own_count = np.count_nonzero(window == piece)
-    opp_count = np.count_nonzero(window == opponent_piece)
-    empty_count = np.count_nonzero(window == EMPTY_SLOT)
+def window_table(weights):
+    """Window scores (see ai.evaluation.window_scores) for a chromosome of weights."""
+    return _window_table(tuple(float(w) for w in weights[:4]))
 
-    if own_count == 4:
-        return float('inf') # Immediate win
-    elif own_count == 3 and empty_count == 1:
-        score += weights[0] # Own_3_in_row
-    elif own_count == 2 and empty_count == 2:
-        score += weights[1] # Own_2_in_row
 
-    if opp_count == 4:
-        return float('-inf') # Opponent would win (should be blocked)
-    elif opp_count == 3 and empty_count == 1:
-        score += weights[2] # Opponent_3_in_row (negative weight is bad for us)
-    elif opp_count == 2 and empty_count == 2:
-        score += weights[3] # Opponent_2_in_row (negative weight is bad for us)
-
-    return score
+@lru_cache(maxsize=1024)
+def _window_table(weights):
+    return window_scores(own4=float('inf'), own3=weights[0], own2=weights[1],
+                         opp3=weights[2], opp2=weights[3], opp4=float('-inf'))
 
 def score_board_state(board_array, piece, weights):
     """
     Evaluates the entire board based on the weights (chromosome).
     Higher score is better for the specified 'piece'.
+    board_array can also be a batch of boards (n, 6, 7): an array of n scores is returned.
     """
-    score = 0
-    rows, cols = board_array.shape
-
-    # Horizontal
-    for r in range(rows):
-        for c in range(cols - 3):
-            window = board_array[r, c:c+4]
-            score += evaluate_window(window, piece, weights)
-
-    # Vertical
-    for c in range(cols):
-        for r in range(rows - 3):
-            window = board_array[r:r+4, c]
-            score += evaluate_window(window, piece, weights)
-
-    # Positive Diagonal
-    for r in range(rows - 3):
-        for c in range(cols - 3):
-            window = np.array([board_array[r+i][c+i] for i in range(4)])
-            score += evaluate_window(window, piece, weights)
-
-    # Negative Diagonal
-    for r in range(3, rows):
-        for c in range(cols - 3):
-            window = np.array([board_array[r-i][c+i] for i in range(4)])
-            score += evaluate_window(window, piece, weights)
-
-    # --- Score Center Control ---
-    center_col_index = cols // 2
-    center_column = board_array[:, center_col_index]
-    center_count = np.count_nonzero(center_column == piece)
-    score += center_count * weights[4] # Center_Control weight
-
-    return score
+    return score_boards(board_array, piece, window_table(weights), weights[4])
 
 
 def _check_immediate_win_ga(board_obj, piece):
     """Checks if a piece can win immediately."""
-    valid_locations = board_obj.get_valid_locations()
-    for col in valid_locations:
-        row = board_obj.get_next_open_row(col)
-        temp_board = ConnectFourBoard()
-        temp_board.board = board_obj.get_board()
-        temp_board.board[row][col] = piece
-        if temp_board.is_winning_move(piece):
+    for col in board_obj.get_valid_locations():
+        if board_obj.bits.is_winning_move(col, piece):
             return col
     return None
 
 def _is_move_dangerous(board_obj, col, piece):
     """Checks if making move 'col' allows opponent to win next turn."""
     opponent_piece = 3 - piece
-    # Simulate our move
-    temp_board = ConnectFourBoard()
-    temp_board.board = board_obj.get_board()
-    row = temp_board.get_next_open_row(col)
-    if row == -1: return False 
-    temp_board.drop_piece(col, piece)
-
-    # Check if game ended
-    if temp_board.game_over:
+    bits = board_obj.bits
+    if not bits.can_play(col): return False
+    # Simulate our move on the bitboard
+    if bits.is_winning_move(col, piece):
         return False
-
-    # Check if opponent has a winning move 
-    opponent_winning_move = _check_immediate_win_ga(temp_board, opponent_piece)
-    return opponent_winning_move is not None
+    bits.play(col, piece)
+    try:
+        # Check if game ended (full board) or if opponent has a winning move
+        return not bits.is_full() and any(
+            bits.is_winning_move(c, opponent_piece) for c in bits.valid_moves())
+    finally:
+        bits.undo(col)
 
 
-def get_move(board_state, piece):
+def get_move(board_state, piece, weights=None):
     """
     Public interface function to get the AI's move using GA-derived evaluation.
 
     Parameters:
     - board_state: numpy array - The Connect Four board state.
     - piece: int - The AI's piece (usually AI_PIECE = 2).
+    - weights: chromosome to play with (default: BEST_WEIGHTS).
 
     Returns:
     - col: int - The column where the AI wants to place its piece, or None if no move possible.
     """
+    if weights is None:
+        weights = BEST_WEIGHTS
     board_obj = ConnectFourBoard()
     board_obj.board = board_state.copy()
     valid_locations = board_obj.get_valid_locations()
@@ -147,20 +116,22 @@ def get_move(board_state, piece):
 
     scored_moves = {} # Store scores for analysis
 
+    # Moves that allow the opponent to win immediately next turn
     for col in valid_locations:
-        # Check if this move allows the opponent to win immediately next turn
         if _is_move_dangerous(board_obj, col, piece):
-             move_score = -1e9 - col 
-        else:
-            # Simulate dropping the piece
-            row = board_obj.get_next_open_row(col)
-            temp_board = board_obj.get_board() # Get a copy
-            temp_board[row][col] = piece
+            scored_moves[col] = -1e9 - col
 
-            # Evaluate the resulting board state
-            move_score = score_board_state(temp_board, piece, BEST_WEIGHTS)
+    # Evaluate the resulting board states of the other moves in one batch
+    safe_cols = [col for col in valid_locations if col not in scored_moves]
+    if safe_cols:
+        temp_boards = np.repeat(board_obj.get_board()[np.newaxis], len(safe_cols), axis=0)
+        for k, col in enumerate(safe_cols):
+            temp_boards[k, board_obj.get_next_open_row(col), col] = piece
+        scores = score_board_state(temp_boards, piece, weights)
+        scored_moves.update(zip(safe_cols, scores))
 
-        scored_moves[col] = move_score # Store score
+    for col in valid_locations:
+        move_score = scored_moves[col]
 
         # Update best move found so far
         if move_score > best_score:
@@ -1,202 +1,329 @@
-import numpy as np
-import random
+"""
+Monte Carlo Tree Search AI.
+
+The search tree is stored in flat lists indexed by node number (no node
+objects, no board copies). Each node keeps its position as two bitboards
+(the pieces of the player to move and the mask of occupied cells, in the
+BitBoard layout), so expanding a node and playing a rollout are a few integer
+operations. Rollouts use the same policy as before (win if possible, block
+an immediate threat, otherwise random) computed with bit tricks.
+
+The tree is kept between moves: the next call re-roots it on the position
+reached after the opponent's reply, so the statistics of that subtree are
+reused. get_move searches for a time budget; with several workers, each
+process searches its own tree (root parallelism) and the visit counts of the
+root moves are added up.
+"""
 import math
+import multiprocessing
+import random
 import time
-from board import ConnectFourBoard
-
-ROW_COUNT = 6
-COLUMN_COUNT = 7
-EMPTY = 0
-
-class MCTSNode:
-    """ Represents a node in the Monte Carlo Search Tree. """
-    def __init__(self, state: ConnectFourBoard, parent=None, move=None):
-        self.state = state
-        self.parent = parent
-        self.move = move # Move (column) that led to this state
-        self.children = {}
-        self.visits = 0 # N
-        self.value = 0.0 # Q: Sum of simulation results relative to the AI player
-        self.player_turn = self._get_player_turn()
-        self.untried_moves = self.state.get_valid_locations()
-        random.shuffle(self.untried_moves)
-
-    def _get_player_turn(self):
-        board = self.state.get_board()
-        p1_pieces = np.count_nonzero(board == 1)
-        p2_pieces = np.count_nonzero(board == 2)
-        return 1 if p1_pieces == p2_pieces else 2
-
-    def is_fully_expanded(self):
-        return len(self.untried_moves) == 0
-
-    def is_terminal(self):
-        return self.state.game_over # Use attribute from board.py
-
-    def select_best_child(self, exploration_weight=1.414):
-        best_score = -float('inf')
-        best_child = None
-
-        for move, child in self.children.items():
-            if child.visits == 0:
-                return child # Prioritize unvisited children
-
-            # UCB1 calculation - value Q is stored relative to the AI player
-            exploit_term = child.value / child.visits
-            log_term = math.log(self.visits) if self.visits > 0 else 0
-            explore_term = exploration_weight * math.sqrt(log_term / child.visits)
-
-            # Adjust score based on whose turn it is at the *parent* (self)
-            # If it's the AI's turn at parent, maximize Q/N + explore
-            # If it's opponent's turn at parent, they want to minimize AI's Q, so we maximize -(Q/N) + explore (from AI perspective)
-            if self.player_turn != child.player_turn: # If AI moved to child
-                 ucb_score = exploit_term + explore_term
-            else: # If Opponent moved to child
-                 ucb_score = -exploit_term + explore_term
-
-            if ucb_score > best_score:
-                best_score = ucb_score
-                best_child = child
-
-        return best_child
-
-    def expand(self):
-        if not self.untried_moves:
-             print("Warning: Expand called on fully expanded node.")
-             return self
-
-        move = self.untried_moves.pop()
-        next_state = ConnectFourBoard()
-        next_state.board = np.copy(self.state.get_board())
-        next_state.drop_piece(move, self.player_turn) # Use current node's player
-
-        child_node = MCTSNode(state=next_state, parent=self, move=move)
-        self.children[move] = child_node
-        return child_node
-
-def _mcts_select(node: MCTSNode):
-    """ Phase 1: Select node using UCB1. """
-    current_node = node
-    while not current_node.is_terminal():
-        if not current_node.is_fully_expanded():
-            return current_node
-        else:
-            current_node = current_node.select_best_child()
-            if current_node is None:
-                 print("Error: select_best_child returned None in select phase")
-                 return node # Fallback
-    return current_node
-
-def _mcts_expand(node: MCTSNode):
-     """ Phase 2: Expand selected node if not terminal. """
-     if not node.is_terminal():
-         return node.expand()
-     return node
-
-def _mcts_simulate(node: MCTSNode, ai_original_piece: int):
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import opening_book
+from board import BIT_HEIGHT, BitBoard, _alignment
+
+ROW_COUNT = BitBoard.ROW_COUNT
+COLUMN_COUNT = BitBoard.COLUMN_COUNT
+
+TIME_LIMIT = 1.0  # Seconds per move
+WORKERS = 1  # Processes searching in parallel (root parallelism)
+MAX_NODES = 1 << 19  # Tree capacity; nodes are no longer expanded when it is full
+EXPLORATION = 0.7  # UCB1 exploration constant (rewards are in [0, 1])
+
+# Bitboard masks: one column is 7 bits, the top one being an empty sentinel
+COLUMN_MASKS = [((1 << ROW_COUNT) - 1) << BitBoard.BOTTOM[col] for col in range(COLUMN_COUNT)]
+BOTTOM_MASK = sum(1 << bottom for bottom in BitBoard.BOTTOM)
+BOARD_MASK = sum(COLUMN_MASKS)
+
+# Result stored for non-terminal nodes
+NOT_TERMINAL = -1.0
+
+
+def winning_cells(position, mask):
+    """
+    Bitboard of the empty cells that would complete an alignment of 4 for the
+    given pieces (shifts: 1 = vertical, 7 = horizontal, 6 and 8 = diagonals).
     """
-    Phase 3: Simulate a playout from the given node's state using an improved policy.
-    Policy: 1. Win if possible, 2. Block opponent win if necessary, 3. Random.
+    cells = (position << 1) & (position << 2) & (position << 3)
+    for shift in (7, 6, 8):
+        pair = (position << shift) & (position << 2 * shift)
+        cells |= pair & (position << 3 * shift)
+        cells |= pair & (position >> shift)
+        pair = (position >> shift) & (position >> 2 * shift)
+        cells |= pair & (position << shift)
+        cells |= pair & (position >> 3 * shift)
+    return cells & (BOARD_MASK ^ mask)
+
+
+def _random_bit(moves, randrange=random.randrange):
+    """A random column bit among the playable cells of a non-empty moves bitboard."""
+    while True:
+        bit = moves & COLUMN_MASKS[randrange(COLUMN_COUNT)]
+        if bit:
+            return bit
+
+
+def rollout(position, mask):
     """
-    if node.is_terminal():
-        winner = node.state.winner
-    else:
-        # Simulate from a copy of the node's state
-        temp_board = ConnectFourBoard()
-        temp_board.board = np.copy(node.state.get_board())
-        current_sim_player = node.player_turn # Player whose turn it is at this node
-
-        while not temp_board.game_over:
-            valid_moves = temp_board.get_valid_locations()
-            if not valid_moves: break # Should be caught by game_over, but safety
-
-            move = -1 # Reset move choice
-            opponent_sim_player = 3 - current_sim_player
-
-            # Priority 1: Check for winning move for current_sim_player
-            for col in valid_moves:
-                row = temp_board.get_next_open_row(col)
-                if row != -1:
-                    # Temporarily place piece to check for win
-                    temp_board.board[row][col] = current_sim_player
-                    if temp_board.is_winning_move(current_sim_player):
-                        move = col
-                        temp_board.board[row][col] = EMPTY
-                        break
-                    temp_board.board[row][col] = EMPTY
-
-            # Priority 2: If no winning move, check for blocking move
-            if move == -1:
-                for col in valid_moves:
-                    row = temp_board.get_next_open_row(col)
-                    if row != -1:
-                        temp_board.board[row][col] = opponent_sim_player
-                        if temp_board.is_winning_move(opponent_sim_player):
-                            move = col # Must block this column
-                            temp_board.board[row][col] = EMPTY
-                            break
-                        temp_board.board[row][col] = EMPTY
-
-            # Priority 3: If no win or block, choose randomly
-            if move == -1:
-                move = random.choice(valid_moves)
-
-            # Perform the chosen move on the simulation board
-            temp_board.drop_piece(move, current_sim_player)
-            current_sim_player = 3 - current_sim_player
-
-        winner = temp_board.winner
-
-    # Determine result relative to the original AI player
-    if winner == ai_original_piece: return 1.0
-    elif winner == (3 - ai_original_piece): return -1.0
-    else: return 0.0
-
-def _mcts_backpropagate(node: MCTSNode, result: float):
-    """ Phase 4: Update node statistics with result relative to AI player. """
-    current_node = node
-    while current_node is not None:
-        current_node.visits += 1
-        current_node.value += result # Accumulate result relative to AI
-        current_node = current_node.parent
-
-def get_move(board, piece, iterations=2000):
-    start_time = time.time()
-
-    root_state = ConnectFourBoard()
-    root_state.board = np.copy(board)
-    if root_state.game_over: return None # Game already over
-    root_node = MCTSNode(state=root_state)
-    root_node.player_turn = piece # Ensure root knows the actual current player
-
-    valid_locations_at_root = root_state.get_valid_locations()
-    if not valid_locations_at_root: return None # No moves possible
-
-    if len(valid_locations_at_root) == 1:
-        return valid_locations_at_root[0] # Only one possible move
-
-    for i in range(iterations):
-        selected_node = _mcts_select(root_node)
-        expanded_node = _mcts_expand(selected_node)
-        simulation_result = _mcts_simulate(expanded_node, piece) # Result relative to AI (piece)
-        _mcts_backpropagate(expanded_node, simulation_result)
-
-    # Choose best move based on most visits (robust)
-    best_move = -1
-    most_visits = -1
-
-    if not root_node.children: # Should only happen if iterations=0 or root is terminal
-         return random.choice(valid_locations_at_root) if valid_locations_at_root else None
-
-    for move, child in root_node.children.items():
-        if child.visits > most_visits:
-            most_visits = child.visits
-            best_move = move
-
-    if best_move == -1: # Fallback if no children somehow
-         return random.choice(valid_locations_at_root) if valid_locations_at_root else None
-
-    return best_move
+    Play a random game from a position with the win/block/random policy.
+
+    Parameters:
+    - position: bitboard of the pieces of the player to move
+    - mask: bitboard of all pieces
+
+    Returns:
+    - 1.0 if the player to move wins, 0.0 if they lose, 0.5 for a draw
+    """
+    reward = 1.0
+    while True:
+        moves = (mask + BOTTOM_MASK) & BOARD_MASK
+        if not moves:
+            return 0.5
+        if moves & winning_cells(position, mask):
+            return reward
+        opponent = position ^ mask
+        threats = moves & winning_cells(opponent, mask)
+        bit = threats & -threats if threats else _random_bit(moves)
+        position, mask = opponent, mask | bit
+        reward = 1.0 - reward
+
+
+class MCTSEngine:
+    """
+    MCTS tree in flat lists. For node n:
+    - position[n], mask[n]: bitboards of the player to move and of all pieces
+    - parent[n], untried[n] (bitboard of the moves not expanded yet)
+    - result[n]: NOT_TERMINAL, or the reward of the player who moved into n
+      (1.0 win, 0.5 draw)
+    - visits[n], wins[n]: statistics from the point of view of the player who
+      moved into n
+    - children[n * COLUMN_COUNT + col]: child reached by playing col, or -1
+    """
+
+    def __init__(self, max_nodes=MAX_NODES, exploration=EXPLORATION):
+        self.max_nodes = max_nodes
+        self.exploration = exploration
+        self.clear()
+
+    def clear(self):
+        self.position = []
+        self.mask = []
+        self.parent = []
+        self.untried = []
+        self.result = []
+        self.visits = []
+        self.wins = []
+        self.children = []
+        self.root = -1
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _add_node(self, position, mask, parent, result):
+        node = len(self.parent)
+        self.position.append(position)
+        self.mask.append(mask)
+        self.parent.append(parent)
+        self.untried.append((mask + BOTTOM_MASK) & BOARD_MASK if result == NOT_TERMINAL else 0)
+        self.result.append(result)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        self.children.extend([-1] * COLUMN_COUNT)
+        return node
+
+    def set_root(self, position, mask):
+        """
+        Make the given position the root, reusing the matching subtree if it
+        is the current root, a child or a grandchild of it (the position after
+        our move and the opponent's reply). Otherwise the tree is restarted.
+        """
+        candidates = [self.root] if self.root >= 0 else []
+        for depth in range(3):
+            for node in candidates:
+                if self.position[node] == position and self.mask[node] == mask:
+                    self._reroot(node)
+                    return
+            candidates = [child for node in candidates
+                          for child in self.children[node * COLUMN_COUNT:(node + 1) * COLUMN_COUNT]
+                          if child >= 0]
+        self.clear()
+        self.root = self._add_node(position, mask, -1, NOT_TERMINAL)
+
+    def _reroot(self, node):
+        self.parent[node] = -1
+        self.root = node
+        # Drop the rest of the old tree once it takes more than half the capacity
+        if len(self) > self.max_nodes // 2:
+            self._compact()
+
+    def _compact(self):
+        """Copy the subtree of the root into fresh lists."""
+        position, mask, untried = self.position, self.mask, self.untried
+        result, visits, wins, children = self.result, self.visits, self.wins, self.children
+        stack = [(self.root, -1, 0)]  # (old node, new parent, column)
+        self.clear()
+        while stack:
+            node, parent, col = stack.pop()
+            new = self._add_node(position[node], mask[node], parent, result[node])
+            self.untried[new] = untried[node]
+            self.visits[new] = visits[node]
+            self.wins[new] = wins[node]
+            if parent >= 0:
+                self.children[parent * COLUMN_COUNT + col] = new
+            else:
+                self.root = new
+            base = node * COLUMN_COUNT
+            for child_col in range(COLUMN_COUNT):
+                child = children[base + child_col]
+                if child >= 0:
+                    stack.append((child, new, child_col))
+
+    def search(self, time_limit=TIME_LIMIT, iterations=None):
+        """
+        Run MCTS iterations from the root until the time budget (or the given
+        number of iterations) is used up.
+
+        Returns:
+        - dict {column: (visits, wins)} of the root moves
+        """
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        position_of, mask_of = self.position, self.mask
+        parent_of, untried_of, result_of = self.parent, self.untried, self.result
+        visits, wins, children = self.visits, self.wins, self.children
+        exploration, log, sqrt = self.exploration, math.log, math.sqrt
+        root = self.root
+        count = 0
+
+        while True:
+            if iterations is not None and count >= iterations:
+                break
+            if deadline is not None and not count & 15 and time.perf_counter() > deadline:
+                break
+            count += 1
+
+            # Selection: descend through fully expanded nodes with UCB1
+            node = root
+            while not untried_of[node] and result_of[node] == NOT_TERMINAL:
+                scale = exploration * sqrt(log(visits[node]))
+                best, best_score = -1, -1.0
+                base = node * COLUMN_COUNT
+                for child in children[base:base + COLUMN_COUNT]:
+                    if child >= 0:
+                        n = visits[child]
+                        score = wins[child] / n + scale / sqrt(n)
+                        if score > best_score:
+                            best, best_score = child, score
+                node = best
+
+            # Expansion of one random untried move
+            result = result_of[node]
+            if result == NOT_TERMINAL and len(parent_of) < self.max_nodes:
+                moves = untried_of[node]
+                bit = _random_bit(moves)
+                untried_of[node] = moves ^ bit
+                position, mask = position_of[node], mask_of[node]
+                if _alignment(position | bit):
+                    result = 1.0
+                elif mask | bit == BOARD_MASK:
+                    result = 0.5
+                # The opponent of the mover plays next
+                child = self._add_node(position ^ mask, mask | bit, node, result)
+                children[node * COLUMN_COUNT + (bit.bit_length() - 1) // BIT_HEIGHT] = child
+                node = child
+
+            # Simulation: reward for the player who moved into node
+            if result == NOT_TERMINAL:
+                reward = 1.0 - rollout(position_of[node], mask_of[node])
+            else:
+                reward = result
+
+            # Backpropagation
+            while node >= 0:
+                visits[node] += 1
+                wins[node] += reward
+                reward = 1.0 - reward
+                node = parent_of[node]
+
+        return self.root_stats()
+
+    def root_stats(self):
+        base = self.root * COLUMN_COUNT
+        return {col: (self.visits[child], self.wins[child])
+                for col, child in enumerate(self.children[base:base + COLUMN_COUNT])
+                if child >= 0}
+
+
+def position_bits(board, piece):
+    """Bitboards (pieces of the player to move, occupied cells) of a board array."""
+    bits = BitBoard.from_array(board)
+    return bits.pieces[piece], bits.mask()
+
+
+# Search tree of this process (kept between moves)
+_engine = MCTSEngine()
+_pool = None
+
+
+def _search_worker(position, mask, time_limit, iterations):
+    _engine.set_root(position, mask)
+    return _engine.search(time_limit, iterations)
+
+
+def _get_pool(workers):
+    global _pool
+    if _pool is None or _pool._max_workers != workers - 1:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool = ProcessPoolExecutor(workers - 1)
+    return _pool
+
+
+def get_move(board, piece, time_limit=TIME_LIMIT, iterations=None, workers=WORKERS, use_book=True):
+    """
+    Move with the most visits after a Monte Carlo Tree Search.
+
+    Parameters:
+    - board: (6, 7) numpy array of the current position
+    - piece: the AI's piece (1 or 2)
+    - time_limit: search time in seconds (None to stop after iterations)
+    - iterations: optional maximum number of iterations per process
+    - workers: number of processes searching in parallel; their root visit
+      counts are merged (a daemon process, like a benchmark worker, always
+      searches alone)
+    - use_book: play the opening book move when the position is in the book
+    """
+    position, mask = position_bits(board, piece)
+    moves = (mask + BOTTOM_MASK) & BOARD_MASK
+    valid_locations = [col for col in range(COLUMN_COUNT) if moves & COLUMN_MASKS[col]]
+    if not valid_locations or _alignment(position ^ mask) or _alignment(position):
+        return None  # Game already over
+    if len(valid_locations) == 1:
+        return valid_locations[0]
+    if use_book:
+        col = opening_book.book_move(board, piece)
+        if col is not None:
+            return col
+
+    if workers > 1 and multiprocessing.current_process().daemon:
+        workers = 1
+    futures = []
+    if workers > 1:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_search_worker, position, mask, time_limit, iterations)
+                   for _ in range(workers - 1)]
+
+    totals = dict.fromkeys(valid_locations, 0)
+    for stats in [_search_worker(position, mask, time_limit, iterations)] + \
+            [future.result() for future in futures]:
+        for col, (visits, _) in stats.items():
+            totals[col] += visits
+
+    best_visits = max(totals.values())
+    if best_visits == 0:
+        return random.choice(valid_locations)
+    return random.choice([col for col, visits in totals.items() if visits == best_visits])
+
 
 def name():
     """ Returns the name of this AI algorithm. """
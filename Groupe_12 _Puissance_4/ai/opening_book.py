@@ -0,0 +1,174 @@
+"""
+Opening book: best moves of the first plies, precomputed by a deep search
+(see build_opening_book.py) and shared by the AIs.
+
+Positions are identified by a canonical key that is the same for a board and
+its mirror image (columns reversed), so only one of the two is stored. The
+key of a position is position + mask + bottom row, where position is the
+bitboard of the player to move and mask the bitboard of all pieces (BitBoard
+layout); it is unique and does not depend on the piece numbers.
+
+File format (little-endian), read through numpy memory maps so that the book
+is not loaded in memory and is shared between processes:
+- header: magic b'C4OB', version, number of plies, search depth, count
+- count uint64 keys, sorted
+- count int32 scores, for the player to move (see ai.search.SearchEngine)
+- count int8 moves, in the orientation of the canonical key
+"""
+import os
+import struct
+
+import numpy as np
+
+from board import BIT_HEIGHT, BitBoard
+
+COLUMN_COUNT = BitBoard.COLUMN_COUNT
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.bin')
+MAGIC = b'C4OB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHxxI')
+
+COLUMN_BITS = (1 << BIT_HEIGHT) - 1
+BOTTOM_MASK = sum(1 << bottom for bottom in BitBoard.BOTTOM)
+
+
+def mirror(bitboard):
+    """Bitboard with its columns in reverse order."""
+    mirrored = 0
+    for col in range(COLUMN_COUNT):
+        column = (bitboard >> (col * BIT_HEIGHT)) & COLUMN_BITS
+        mirrored |= column << ((COLUMN_COUNT - 1 - col) * BIT_HEIGHT)
+    return mirrored
+
+
+def canonical_key(position, mask):
+    """
+    Canonical key of a position.
+
+    Parameters:
+    - position: bitboard of the pieces of the player to move
+    - mask: bitboard of all pieces
+
+    Returns:
+    - (key, mirrored): the smallest of the keys of the position and of its
+      mirror image, and whether it is the mirror image's
+    """
+    # Each column of the key only depends on that column, so mirroring the
+    # key gives the key of the mirrored position
+    key = position + mask + BOTTOM_MASK
+    mirrored_key = mirror(key)
+    if mirrored_key < key:
+        return mirrored_key, True
+    return key, False
+
+
+class OpeningBook:
+    """
+    Read-only opening book backed by a file (see the module docstring).
+    A missing file gives an empty book.
+    """
+
+    def __init__(self, path=BOOK_FILE):
+        self.path = path
+        self.plies = -1
+        self.depth = 0
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.scores = np.zeros(0, dtype=np.int32)
+        self.moves = np.zeros(0, dtype=np.int8)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            magic, version, self.plies, self.depth, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book (version {VERSION})")
+        if count:
+            offset = HEADER.size
+            self.keys = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(count,))
+            offset += 8 * count
+            self.scores = np.memmap(path, dtype='<i4', mode='r', offset=offset, shape=(count,))
+            offset += 4 * count
+            self.moves = np.memmap(path, dtype='i1', mode='r', offset=offset, shape=(count,))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def probe(self, position, mask):
+        """
+        Book entry of a position given as bitboards (see canonical_key).
+
+        Returns:
+        - (col, score) or None if the position is not in the book
+        """
+        key, mirrored = canonical_key(position, mask)
+        index = int(np.searchsorted(self.keys, np.uint64(key)))
+        if index == len(self.keys) or int(self.keys[index]) != key:
+            return None
+        col = int(self.moves[index])
+        if mirrored:
+            col = COLUMN_COUNT - 1 - col
+        return col, int(self.scores[index])
+
+    def lookup(self, board, piece):
+        """
+        Book entry of a board array with piece to move.
+
+        Returns:
+        - (col, score) or None if the position is not in the book
+        """
+        if np.count_nonzero(board) > self.plies:
+            return None
+        bits = BitBoard.from_array(board)
+        return self.probe(bits.pieces[piece], bits.mask())
+
+    @staticmethod
+    def write(path, entries, plies, depth):
+        """
+        Write a book file.
+
+        Parameters:
+        - entries: dict {canonical key: (col, score)}, col in the orientation of the key
+        - plies: number of plies covered by the book
+        - depth: depth of the search used to compute the entries
+        """
+        keys = np.array(sorted(entries), dtype='<u8')
+        scores = np.array([entries[key][1] for key in keys.tolist()], dtype='<i4')
+        moves = np.array([entries[key][0] for key in keys.tolist()], dtype='i1')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, plies, depth, len(keys)))
+            f.write(keys.tobytes())
+            f.write(scores.tobytes())
+            f.write(moves.tobytes())
+        os.replace(tmp_path, path)
+
+
+_book = None
+
+
+def get_book():
+    """The book of BOOK_FILE, opened on first use."""
+    global _book
+    if _book is None:
+        _book = OpeningBook()
+    return _book
+
+
+def lookup(board, piece):
+    """
+    Book entry of a position (see OpeningBook.lookup).
+
+    Parameters:
+    - board: (6, 7) numpy array of the current position
+    - piece: the piece to move (1 or 2)
+
+    Returns:
+    - (col, score) or None if the position is not in the book
+    """
+    return get_book().lookup(board, piece)
+
+
+def book_move(board, piece):
+    """Book move of a position, or None if the position is not in the book."""
+    entry = lookup(board, piece)
+    return entry[0] if entry is not None else None
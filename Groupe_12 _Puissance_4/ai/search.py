@@ -0,0 +1,311 @@
+"""
+Alpha-beta search engine shared by the Minimax and Negamax AIs.
+
+The search plays and undoes moves on a single ConnectFourBoard instead of
+copying the board for every child, and adds:
+- a Zobrist-hashed transposition table of bounded size,
+- move ordering: transposition table move, killer moves, history heuristic,
+  then center-first,
+- iterative deepening under a time budget (the best move of the last fully
+  searched depth is returned when time runs out),
+- optionally, principal variation search (used by the Negamax AI): after the
+  first move of a node, the other moves are searched with a null window and
+  only re-searched with the full window if they turn out to be better.
+
+get_move is the get_move of the AIs built on an engine (opening book, then search).
+"""
+import random
+import time
+
+import numpy as np
+
+from ai import opening_book
+from board import ConnectFourBoard
+
+ROW_COUNT = ConnectFourBoard.ROW_COUNT
+COLUMN_COUNT = ConnectFourBoard.COLUMN_COUNT
+CELL_COUNT = ROW_COUNT * COLUMN_COUNT
+
+# Columns from the center outwards
+CENTER_ORDER = sorted(range(COLUMN_COUNT), key=lambda col: abs(col - COLUMN_COUNT // 2))
+
+# Score of a win on the next move; faster wins score higher (WIN_SCORE - ply)
+WIN_SCORE = 1000000
+MAX_DEPTH = CELL_COUNT
+TIME_LIMIT = 1.0  # Seconds per move
+TT_SIZE = 1 << 18  # Transposition table entries (power of 2)
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Zobrist keys: one per (piece, cell), plus the side to move and the piece
+# the evaluation is computed for (stored scores depend on both)
+_rng = random.Random(0x4C4F5552)
+ZOBRIST = [[_rng.getrandbits(64) for _ in range(CELL_COUNT)] for _ in range(3)]
+ZOBRIST_TURN = _rng.getrandbits(64)
+ZOBRIST_ROOT = [0, _rng.getrandbits(64), _rng.getrandbits(64)]
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is exhausted."""
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results, indexed by the low bits of the
+    Zobrist key. Each slot holds (key, depth, flag, score, move, generation).
+
+    Replacement policy: a slot is overwritten by a search of the same position,
+    by a deeper (or equally deep) search, or when its entry comes from an
+    earlier call to SearchEngine.search.
+    """
+
+    def __init__(self, size=TT_SIZE):
+        if size & (size - 1):
+            raise ValueError("size must be a power of 2")
+        self.mask = size - 1
+        self.slots = [None] * size
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def get(self, key):
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or depth >= entry[1] or entry[5] != self.generation:
+            self.slots[index] = (key, depth, flag, score, move, self.generation)
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+
+
+class SearchEngine:
+    """
+    Negamax alpha-beta search with a transposition table, move ordering and
+    iterative deepening.
+
+    Parameters:
+    - evaluator: incremental evaluation (see ai.evaluation.IncrementalEvaluator),
+      updated on every move played and undone during the search
+    - tt_size: number of transposition table entries (power of 2)
+    - principal_variation: use principal variation search (null-window
+      searches after the first move) instead of plain alpha-beta
+
+    The transposition table and history heuristic persist between calls, so
+    positions searched for a previous move are reused.
+    """
+
+    def __init__(self, evaluator, tt_size=TT_SIZE, principal_variation=False):
+        self.evaluator = evaluator
+        self.principal_variation = principal_variation
+        self.tt = TranspositionTable(tt_size)
+        self.history = [[0] * COLUMN_COUNT for _ in range(3)]
+        self.killers = [[None, None] for _ in range(CELL_COUNT + 1)]
+        self.board = None
+        self.root_piece = None
+        self.deadline = None
+        self.nodes = 0
+        self.depth_reached = 0
+        self.root_move = None
+
+    def search(self, board_state, piece, max_depth=MAX_DEPTH, time_limit=TIME_LIMIT):
+        """
+        Find the best move for piece.
+
+        Parameters:
+        - board_state: (6, 7) numpy array (row 0 at the top)
+        - piece: the piece to play (1 or 2)
+        - max_depth: maximum search depth in plies
+        - time_limit: time budget in seconds (None for no limit); the search of
+          depth 1 always completes
+
+        Returns:
+        - (col, score): the best column (None if the board is full) and its score
+        """
+        start = time.perf_counter()
+        board = ConnectFourBoard()
+        board.board = np.copy(board_state)
+        self.board = board
+        self.evaluator.reset(board.board)
+        self.root_piece = piece
+        self.nodes = 0
+        self.depth_reached = 0
+        self.tt.new_search()
+        for row in self.history:
+            row[:] = [h // 2 for h in row]
+        for killers in self.killers:
+            killers[0] = killers[1] = None
+
+        moves = [col for col in CENTER_ORDER if board.bits.can_play(col)]
+        if not moves:
+            return None, 0
+        for col in moves:
+            if board.bits.is_winning_move(col, piece):
+                return col, WIN_SCORE
+
+        key = self.position_key(board_state, piece)
+        remaining = CELL_COUNT - board.bits.moves
+        best_col, best_score = moves[0], 0
+        for depth in range(1, min(max_depth, remaining) + 1):
+            # No deadline for depth 1, so that a move is always found
+            self.deadline = start + time_limit if time_limit is not None and depth > 1 else None
+            try:
+                score = self.negamax(key, depth, -WIN_SCORE - 1, WIN_SCORE + 1, piece, 0)
+            except SearchTimeout:
+                break
+            best_col, best_score = self.root_move, score
+            self.depth_reached = depth
+            # A forced win or loss has been found: deeper searches won't change it
+            if abs(score) >= WIN_SCORE - CELL_COUNT:
+                break
+
+        self.board = None
+        return best_col, best_score
+
+    def position_key(self, board_state, piece):
+        """Zobrist key of a position with piece to move."""
+        key = ZOBRIST_ROOT[self.root_piece]
+        if piece == 2:
+            key ^= ZOBRIST_TURN
+        for row, col in zip(*np.nonzero(board_state)):
+            key ^= ZOBRIST[int(board_state[row][col])][row * COLUMN_COUNT + col]
+        return key
+
+    def order_moves(self, moves, piece, ply, tt_move):
+        """Sort moves: transposition table move, killers, then history (center first on ties)."""
+        history = self.history[piece]
+        moves.sort(key=lambda col: history[col], reverse=True)
+        for col in reversed(self.killers[ply]):
+            if col in moves:
+                moves.remove(col)
+                moves.insert(0, col)
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
+
+    def negamax(self, key, depth, alpha, beta, piece, ply):
+        """
+        Score of the position for piece (the side to move), searched depth plies deep.
+        Moves are played and undone on self.board.
+        """
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 63 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        board = self.board
+        bits = board.bits
+        moves = [col for col in CENTER_ORDER if bits.can_play(col)]
+        if not moves:
+            return 0  # Draw
+
+        # A winning move ends the search of this node
+        for col in moves:
+            if bits.is_winning_move(col, piece):
+                return WIN_SCORE - ply
+
+        if depth == 0:
+            score = self.evaluator.score(self.root_piece)
+            return score if piece == self.root_piece else -score
+
+        # Transposition table probe (mate scores are stored relative to the node)
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.get(key)
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth and ply > 0:
+                score = entry[3]
+                if score >= WIN_SCORE - CELL_COUNT:
+                    score -= ply
+                elif score <= -WIN_SCORE + CELL_COUNT:
+                    score += ply
+                if entry[2] == EXACT:
+                    return score
+                if entry[2] == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        evaluator = self.evaluator
+        opponent = 3 - piece
+        best_score, best_col = -WIN_SCORE - 1, None
+        for index, col in enumerate(self.order_moves(moves, piece, ply, tt_move)):
+            # On timeout the board and evaluator are left as is: the next search resets them
+            row = board.drop_piece(col, piece)
+            evaluator.play(row, col, piece)
+            child_key = key ^ ZOBRIST[piece][row * COLUMN_COUNT + col] ^ ZOBRIST_TURN
+            if self.principal_variation and index > 0:
+                # Null window: only tells whether the move beats alpha
+                score = -self.negamax(child_key, depth - 1, -alpha - 1, -alpha, opponent, ply + 1)
+                if alpha < score < beta:
+                    score = -self.negamax(child_key, depth - 1, -beta, -alpha, opponent, ply + 1)
+            else:
+                score = -self.negamax(child_key, depth - 1, -beta, -alpha, opponent, ply + 1)
+            board.undo_move(col)
+            evaluator.undo(row, col, piece)
+
+            if score > best_score:
+                best_score, best_col = score, col
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        # Cutoff: remember the move for sibling nodes and later searches
+                        killers = self.killers[ply]
+                        if killers[0] != col:
+                            killers[1] = killers[0]
+                            killers[0] = col
+                        self.history[piece][col] += depth * depth
+                        break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored = best_score
+        if stored >= WIN_SCORE - CELL_COUNT:
+            stored += ply
+        elif stored <= -WIN_SCORE + CELL_COUNT:
+            stored -= ply
+        self.tt.store(key, depth, flag, stored, best_col)
+        if ply == 0:
+            self.root_move = best_col
+        return best_score
+
+
+def get_move(engine, board, piece, depth=MAX_DEPTH, time_limit=TIME_LIMIT, use_book=True):
+    """
+    Best move found by iterative deepening search with an engine.
+
+    Parameters:
+    - engine: the SearchEngine of the AI
+    - board: (6, 7) numpy array of the current position
+    - piece: the AI's piece (1 or 2)
+    - depth: maximum search depth in plies
+    - time_limit: time budget in seconds (None to always search to full depth)
+    - use_book: play the opening book move when the position is in the book
+    """
+    if use_book:
+        col = opening_book.book_move(board, piece)
+        if col is not None:
+            return col
+
+    col, _ = engine.search(board, piece, depth, time_limit)
+
+    # Fallback if the search returns None unexpectedly
+    if col is None:
+        valid_locations = [c for c in range(COLUMN_COUNT) if board[0][c] == 0]
+        return random.choice(valid_locations) if valid_locations else None
+
+    return col
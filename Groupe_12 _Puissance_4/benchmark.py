@@ -1,11 +1,17 @@
 import os
+import csv
 import importlib
+import math
+import multiprocessing
+import multiprocessing.connection
+import random
+import statistics
 import time
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from collections import defaultdict
+from collections import defaultdict, deque
 from itertools import permutations
 import sys
 import argparse
@@ -15,6 +21,10 @@ from board import ConnectFourBoard
 AI_FOLDER = "./ai"
 NUM_GAMES = 5
 TIMEOUT = 5.0
+MAX_GAMES = 100  # Adaptive mode: maximum games per unordered pair
+CONFIDENCE = 0.95
+
+CSV_FIELDS = ['game_id', 'ai1_name', 'ai2_name', 'winner', 'error_type', 'moves', 'duration']
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Connect 4 AI Benchmark')
@@ -26,6 +36,16 @@ def parse_arguments():
                         help='AI modules folder path')
     parser.add_argument('--save', action='store_true',
                         help='Save results to file')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--csv', type=str, default=None,
+                        help='CSV file where game results are written as games complete')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Play more games for pairs whose result is still uncertain')
+    parser.add_argument('--max-games', type=int, default=MAX_GAMES,
+                        help='Adaptive mode: maximum games per pair of AIs')
+    parser.add_argument('--confidence', type=float, default=CONFIDENCE,
+                        help='Adaptive mode: confidence level of the intervals')
     return parser.parse_args()
 
 def load_ais(folder_path):
@@ -55,6 +75,8 @@ def load_ais(folder_path):
                     ais.append({
                         'name': ai_name,
                         'get_move': module.get_move,
+                        'module': module_path,
+                        'folder': folder_abs,
                     })
             except Exception as e:
                 print(f"\n--- Error loading {filename}: {type(e).__name__}: {e} ---")
@@ -63,80 +85,331 @@ def load_ais(folder_path):
         print(f"Warning: No valid AI modules found in {folder_path}")
     return ais
 
-def play_game(ai1, ai2, timeout):
-    board = ConnectFourBoard()
-    ais = {1: ai1, 2: ai2}
-    player = 1
-    error_type = None
-
-    while not board.game_over:
-        current_ai = ais[player]
-        board_state = board.get_board()
-
+def _move_worker(conn, path_entry, module_paths):
+    """
+    Worker process: computes moves for the games assigned to it.
+    The AI modules are imported first, outside of any move timer (a spawned
+    worker does not inherit the parent's modules), then ('ready', None) is
+    sent. Afterwards it receives (module_path, board_state, player) and
+    answers ('ok', col) or ('error', message).
+    """
+    sys.path.insert(0, path_entry)
+    # Forked workers inherit the parent's random state: reseed them
+    random.seed()
+    np.random.seed()
+    modules = {}
+    import_errors = {}
+    for module_path in module_paths:
         try:
-            start_time = time.time()
-            col = current_ai['get_move'](board_state, player)
-            duration = time.time() - start_time
-
-            if duration > timeout:
-                board.game_over = True
-                board.winner = 3 - player
-                error_type = 'timeout'
-                break
-
-            if col is None or not board.is_valid_location(col):
-                board.game_over = True
-                board.winner = 3 - player
-                error_type = 'invalid_move'
-                break
-
-            board.drop_piece(col, player)
-            if not board.game_over:
-                player = 3 - player
-
-        except Exception:
-            board.game_over = True
-            board.winner = 3 - player
-            error_type = 'runtime_error'
-            break
-
-    final_winner = board.winner if board.winner is not None else 3  # 3 = draw
-
-    return {
-        'winner': final_winner,
-        'ai1_name': ai1['name'],
-        'ai2_name': ai2['name'],
-        'error': error_type is not None,
-        'error_type': error_type
-    }
-
-def run_benchmark(ais, games_per_pair, timeout):
+            modules[module_path] = importlib.import_module(module_path)
+        except Exception as e:
+            import_errors[module_path] = f"{type(e).__name__}: {e}"
+    conn.send(('ready', None))
+    while True:
+        request = conn.recv()
+        if request is None:
+            return
+        module_path, board_state, player = request
+        if module_path in import_errors:
+            conn.send(('error', import_errors[module_path]))
+            continue
+        try:
+            col = modules[module_path].get_move(board_state, player)
+            conn.send(('ok', col))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+class MoveWorker:
+    """
+    A worker process with its pipe; killed and restarted when a move times out.
+    ready is set once the worker has imported the AI modules.
+    """
+
+    def __init__(self, path_entry, module_paths):
+        self.path_entry = path_entry
+        self.module_paths = module_paths
+        self.start()
+
+    def start(self):
+        self.ready = False
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_move_worker,
+                                               args=(child_conn, self.path_entry, self.module_paths),
+                                               daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def restart(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.start()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+class Game:
+    """State of a game in progress: the board lives in the parent process."""
+
+    def __init__(self, game_id, ai1, ai2, worker, timeout):
+        self.game_id = game_id
+        self.ais = {1: ai1, 2: ai2}
+        self.worker = worker
+        self.timeout = timeout
+        self.board = ConnectFourBoard()
+        self.player = 1
+        self.moves = 0
+        self.error_type = None
+        self.start_time = time.perf_counter()
+        self.deadline = None
+
+    def request_move(self):
+        """
+        Ask the worker for the current player's move and start the move timer.
+        If the worker is still importing the AIs, the request is sent when its
+        ready message arrives (see run_benchmark), and there is no deadline until then.
+        """
+        if not self.worker.ready:
+            self.deadline = None
+            return
+        self.worker.conn.send((self.ais[self.player]['module'], self.board.get_board(), self.player))
+        self.deadline = time.perf_counter() + self.timeout
+
+    def forfeit(self, error_type):
+        """The current player loses the game."""
+        self.board.game_over = True
+        self.board.winner = 3 - self.player
+        self.error_type = error_type
+
+    def apply(self, reply):
+        """Play the worker's reply. Returns True when the game is over."""
+        status, col = reply
+        if status != 'ok':
+            self.forfeit('runtime_error')
+        elif col is None or not self.board.is_valid_location(col):
+            self.forfeit('invalid_move')
+        else:
+            self.board.drop_piece(col, self.player)
+            self.moves += 1
+            if not self.board.game_over:
+                self.player = 3 - self.player
+        return self.board.game_over
+
+    def result(self):
+        winner = self.board.winner if self.board.winner is not None else 3  # 3 = draw
+        return {
+            'game_id': self.game_id,
+            'winner': winner,
+            'ai1_name': self.ais[1]['name'],
+            'ai2_name': self.ais[2]['name'],
+            'error': self.error_type is not None,
+            'error_type': self.error_type,
+            'moves': self.moves,
+            'duration': time.perf_counter() - self.start_time,
+        }
+
+def pair_statistics(results, confidence=CONFIDENCE):
+    """
+    Score of each unordered pair of AIs (a, b), a < b, over all their games
+    (both colors): mean score of a (win 1, draw 0.5, loss 0), its confidence
+    interval, and the corresponding Elo difference.
+
+    The interval uses a normal approximation, with one extra draw added to
+    the games so that it doesn't collapse after a few identical results.
+    """
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    outcomes = defaultdict(list)
+    for res in results:
+        a, b = sorted((res['ai1_name'], res['ai2_name']))
+        winner_name = {1: res['ai1_name'], 2: res['ai2_name']}.get(res['winner'])
+        outcomes[(a, b)].append(0.5 if winner_name is None else float(winner_name == a))
+
+    stats = {}
+    for pair, scores in outcomes.items():
+        smoothed = scores + [0.5]
+        n = len(smoothed)
+        mean = sum(smoothed) / n
+        half_width = z * math.sqrt(statistics.pvariance(smoothed) / n)
+        low, high = max(mean - half_width, 0.0), min(mean + half_width, 1.0)
+        stats[pair] = {
+            'games': len(scores),
+            'score': sum(scores) / len(scores),
+            'low': low,
+            'high': high,
+            'elo_diff': elo_difference(sum(scores) / len(scores)),
+            'elo_low': elo_difference(low),
+            'elo_high': elo_difference(high),
+        }
+    return stats
+
+def elo_difference(score):
+    """Elo difference corresponding to an expected score, clipped to +/-800."""
+    score = min(max(score, 0.01), 0.99)
+    return 400 * math.log10(score / (1 - score))
+
+class AdaptiveScheduler:
+    """
+    Chooses the next pairing to play.
+
+    Every ordered pairing is first played min_games times. In adaptive mode,
+    more games are then scheduled, two at a time (one per color), for the
+    unordered pair whose confidence interval on the score is the widest among
+    those still containing 0.5 (the stronger AI is not known yet), until every
+    pair is decided or has played max_games games.
+    """
+
+    def __init__(self, ais, min_games, adaptive=False, max_games=MAX_GAMES, confidence=CONFIDENCE):
+        self.ais = {ai['name']: ai for ai in ais}
+        self.queue = deque((ai1, ai2) for _ in range(min_games)
+                           for ai1, ai2 in permutations(ais, 2))
+        self.adaptive = adaptive
+        self.max_games = max_games
+        self.confidence = confidence
+        self.scheduled = defaultdict(int)  # Games scheduled per unordered pair
+
+    def next_game(self, results):
+        """Next (ai1, ai2) pairing, or None if nothing needs to be played for now."""
+        if not self.queue and self.adaptive:
+            self._schedule_uncertain(results)
+        if not self.queue:
+            return None
+        ai1, ai2 = self.queue.popleft()
+        self.scheduled[tuple(sorted((ai1['name'], ai2['name'])))] += 1
+        return ai1, ai2
+
+    def _schedule_uncertain(self, results):
+        stats = pair_statistics(results, self.confidence)
+        candidates = []
+        for pair, stat in stats.items():
+            if stat['low'] < 0.5 < stat['high'] and self.scheduled[pair] < self.max_games:
+                # Pairs with games still in flight are only rescheduled once they are done
+                if self.scheduled[pair] == stat['games']:
+                    candidates.append((stat['high'] - stat['low'], pair))
+        if candidates:
+            _, (a, b) = max(candidates)
+            self.queue.extend([(self.ais[a], self.ais[b]), (self.ais[b], self.ais[a])])
+
+def open_results_csv(path):
+    """Open a CSV file where each game result is written as soon as it ends."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    file = open(path, 'w', newline='')
+    writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    return file, writer
+
+def run_benchmark(ais, games_per_pair, timeout, workers=None, csv_path=None,
+                  adaptive=False, max_games=MAX_GAMES, confidence=CONFIDENCE):
+    """
+    Play a tournament between the AIs on a pool of worker processes.
+
+    Each game in progress is assigned a worker that computes the moves of
+    both AIs, while the board stays in this process. A move that exceeds the
+    timeout is interrupted by killing the worker (the game is lost by the
+    AI that was thinking) and the worker is restarted.
+
+    Parameters:
+    - ais: AIs returned by load_ais
+    - games_per_pair: games per ordered pairing (minimum in adaptive mode)
+    - timeout: move timeout in seconds
+    - workers: number of worker processes (default: number of CPUs)
+    - csv_path: CSV file where results are streamed as games complete
+    - adaptive: schedule more games for pairs whose result is still uncertain
+    - max_games, confidence: adaptive mode limits (games per unordered pair,
+      confidence level of the intervals)
+    """
     if len(ais) < 2:
         print("Need at least two AIs.")
         return None
 
-    results = []
-    ai_names = [ai['name'] for ai in ais]
-    total_pairings = len(ai_names) * (len(ai_names) - 1)
-    total_games = total_pairings * games_per_pair
-    game_count = 0
+    workers = workers or os.cpu_count() or 1
+    scheduler = AdaptiveScheduler(ais, games_per_pair, adaptive, max_games, confidence)
+    total_games = len(scheduler.queue)
+    path_entry = os.path.dirname(os.path.abspath(ais[0]['folder']))
 
-    print(f"\nStarting benchmark: {len(ais)} AIs, {games_per_pair} games per pair ({total_games} total)")
-    print(f"Move Timeout: {timeout} seconds")
+    print(f"\nStarting benchmark: {len(ais)} AIs, {games_per_pair} games per pair ({total_games} total"
+          f"{', more where results are uncertain' if adaptive else ''})")
+    print(f"Move Timeout: {timeout} seconds, {workers} worker processes")
     print("-" * 40)
 
-    for i, j in permutations(range(len(ais)), 2):
-        ai1, ai2 = ais[i], ais[j]
-        print(f"Playing: {ai1['name']} (P1) vs {ai2['name']} (P2)...")
+    results = []
+    csv_file, csv_writer = open_results_csv(csv_path) if csv_path else (None, None)
+    module_paths = [ai['module'] for ai in ais]
+    idle = [MoveWorker(path_entry, module_paths) for _ in range(workers)]
+    active = {}  # Game by worker connection
+    game_count = 0
 
-        for _ in range(games_per_pair):
-            game_count += 1
-            print(f"  Progress: {game_count}/{total_games} games...", end="\r")
-            results.append(play_game(ai1, ai2, timeout))
-            
-        print(f"  Finished: {ai1['name']} (P1) vs {ai2['name']} (P2)     ")
+    def finish(game):
+        # The game must already be removed from active
+        idle.append(game.worker)
+        result = game.result()
+        results.append(result)
+        if csv_writer:
+            csv_writer.writerow(result)
+            csv_file.flush()
+        print(f"  Progress: {len(results)} games played, {len(active)} in progress...", end="\r")
+
+    try:
+        while True:
+            # Start new games on idle workers
+            while idle:
+                pairing = scheduler.next_game(results)
+                if pairing is None:
+                    break
+                game_count += 1
+                game = Game(game_count, *pairing, idle.pop(), timeout)
+                active[game.worker.conn] = game
+                game.request_move()
+            if not active:
+                break
 
-    print(f"\nBenchmark complete. Played {game_count} games.")
+            # Wait for a move, or for the earliest move deadline (workers
+            # still importing the AIs have no deadline)
+            deadlines = [game.deadline for game in active.values() if game.deadline is not None]
+            wait_time = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            for conn in multiprocessing.connection.wait(list(active), timeout=wait_time):
+                game = active[conn]
+                try:
+                    reply = conn.recv()
+                except EOFError:
+                    # The worker died (crash, out of memory...)
+                    del active[conn]
+                    game.worker.restart()
+                    game.forfeit('runtime_error')
+                    finish(game)
+                    continue
+                if reply[0] == 'ready':
+                    game.worker.ready = True
+                    game.request_move()
+                    continue
+                if game.apply(reply):
+                    del active[conn]
+                    finish(game)
+                else:
+                    game.request_move()
+
+            # Interrupt moves over the timeout
+            now = time.perf_counter()
+            for game in [g for g in active.values() if g.deadline is not None and g.deadline < now]:
+                if game.worker.conn.poll():
+                    continue  # The answer arrived just in time, it is handled next iteration
+                del active[game.worker.conn]
+                game.worker.restart()
+                game.forfeit('timeout')
+                finish(game)
+    finally:
+        for worker in idle + [game.worker for game in active.values()]:
+            worker.stop()
+        if csv_file:
+            csv_file.close()
+
+    print(f"\nBenchmark complete. Played {len(results)} games.")
     print("-" * 40)
     return results
 
@@ -209,6 +482,48 @@ def calculate_overall_performance(results, ai_names):
     
     return df.sort_values('Win %', ascending=False)
 
+def calculate_elo_ratings(results, ai_names, confidence=CONFIDENCE, iterations=200):
+    """
+    Elo ratings fitted on all games (Bradley-Terry model, draws counting as
+    half a win for each side), centered on 1500, with approximate confidence
+    intervals from the Fisher information of each rating.
+    """
+    index = {name: k for k, name in enumerate(ai_names)}
+    n = len(ai_names)
+    games = np.zeros((n, n))
+    wins = np.zeros((n, n))
+    for res in results:
+        a, b = index[res['ai1_name']], index[res['ai2_name']]
+        games[a, b] += 1
+        games[b, a] += 1
+        points = {1: 1.0, 2: 0.0}.get(res['winner'], 0.5)
+        wins[a, b] += points
+        wins[b, a] += 1 - points
+
+    # Minorization-maximization updates of the strengths, with one virtual
+    # draw against an average opponent so that unbeaten AIs stay finite
+    strength = np.ones(n)
+    total_wins = wins.sum(axis=1) + 0.5
+    for _ in range(iterations):
+        pair_sums = strength[:, np.newaxis] + strength[np.newaxis, :]
+        denominator = (games / pair_sums).sum(axis=1) + 1 / (strength + 1)
+        strength = total_wins / denominator
+        strength /= np.exp(np.log(strength).mean())
+
+    ratings = 400 * np.log10(strength)
+    expected = strength[:, np.newaxis] / (strength[:, np.newaxis] + strength[np.newaxis, :])
+    information = (games * expected * (1 - expected)).sum(axis=1) + 0.25
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    half_width = z * 400 / math.log(10) / np.sqrt(information)
+
+    df = pd.DataFrame({
+        'Elo': np.round(1500 + ratings),
+        'CI Low': np.round(1500 + ratings - half_width),
+        'CI High': np.round(1500 + ratings + half_width),
+        'Games': games.sum(axis=1).astype(int),
+    }, index=ai_names)
+    return df.sort_values('Elo', ascending=False)
+
 def analyze_errors(results):
     errors = defaultdict(lambda: {'timeout': 0, 'invalid_move': 0, 'runtime_error': 0, 'total': 0})
     
@@ -273,7 +588,7 @@ def plot_overall_performance(df):
     plt.tight_layout()
     return plt.gcf()
 
-def save_results(pairwise_df, overall_df, error_df=None):
+def save_results(pairwise_df, overall_df, error_df=None, elo_df=None):
     timestamp = time.strftime("%Y%m%d-%H%M%S")
     results_dir = "benchmark_results"
     os.makedirs(results_dir, exist_ok=True)
@@ -286,6 +601,11 @@ def save_results(pairwise_df, overall_df, error_df=None):
     overall_df.to_csv(overall_file)
     
     files = [pairwise_file, overall_file]
+
+    if elo_df is not None:
+        elo_file = os.path.join(results_dir, f"benchmark_elo_{timestamp}.csv")
+        elo_df.to_csv(elo_file)
+        files.append(elo_file)
     
     if error_df is not None and not error_df.empty:
         error_file = os.path.join(results_dir, f"benchmark_errors_{timestamp}.csv")
@@ -319,13 +639,19 @@ if __name__ == "__main__":
     ai_names = [ai['name'] for ai in loaded_ais]
     print(f"\nFound {len(loaded_ais)} AIs: {', '.join(ai_names)}")
 
-    results = run_benchmark(loaded_ais, args.games, args.timeout)
+    csv_path = args.csv
+    if csv_path is None and args.save:
+        csv_path = os.path.join("benchmark_results", f"benchmark_games_{time.strftime('%Y%m%d-%H%M%S')}.csv")
+
+    results = run_benchmark(loaded_ais, args.games, args.timeout, args.workers, csv_path,
+                            args.adaptive, args.max_games, args.confidence)
 
     if results:
         print("\nCalculating statistics...")
         pairwise_df = calculate_pairwise_win_rates(results, ai_names)
         overall_df = calculate_overall_performance(results, ai_names)
         error_df = analyze_errors(results)
+        elo_df = calculate_elo_ratings(results, ai_names, args.confidence)
 
         if pairwise_df is not None:
             print("\n--- Pairwise Win Rate (%) [Row AI (P1) vs Col AI (P2)] ---")
@@ -333,6 +659,9 @@ if __name__ == "__main__":
             
             print("\n--- Overall AI Performance ---")
             print(overall_df)
+
+            print(f"\n--- Elo Ratings ({args.confidence:.0%} confidence intervals) ---")
+            print(elo_df)
             
             if error_df is not None and not error_df.empty:
                 print("\n--- Error Analysis ---")
@@ -343,7 +672,7 @@ if __name__ == "__main__":
             fig2 = plot_overall_performance(overall_df)
             
             if args.save:
-                save_results(pairwise_df, overall_df, error_df)
+                save_results(pairwise_df, overall_df, error_df, elo_df)
             
             print("Plots generated (close windows to exit).")
             plt.show()
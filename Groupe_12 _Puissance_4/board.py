@@ -1,135 +1,245 @@
 import numpy as np
 
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+
+# Bitboard layout: 7 bits per column (6 rows + 1 sentinel bit)
+BIT_HEIGHT = ROW_COUNT + 1
+BOTTOM_BITS = tuple(col * BIT_HEIGHT for col in range(COLUMN_COUNT))
+TOP_BITS = tuple(col * BIT_HEIGHT + ROW_COUNT - 1 for col in range(COLUMN_COUNT))
+
+# Bit weight of each cell of the array view (row 0 is the top row)
+CELL_WEIGHTS = np.array(
+    [[1 << (col * BIT_HEIGHT + ROW_COUNT - 1 - row) for col in range(COLUMN_COUNT)]
+     for row in range(ROW_COUNT)],
+    dtype=np.int64
+)
+
+
+def _alignment(bitboard):
+    """
+    Check if a bitboard contains 4 aligned pieces.
+    Shifts: 1 = vertical, 7 = horizontal, 6 and 8 = diagonals.
+    """
+    for shift in (1, 7, 6, 8):
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+class BitBoard:
+    """
+    Compact Connect Four position: one 64-bit mask per player plus column heights.
+
+    Bit layout: each column uses 7 bits (6 rows + 1 empty sentinel bit that
+    prevents alignments from wrapping), the bit of (col, height) being
+    col * 7 + height, with height 0 at the bottom of the column.
+    Moves, undos and win checks are O(1).
+    """
+
+    __slots__ = ('pieces', 'heights', 'moves')
+
+    ROW_COUNT = ROW_COUNT
+    COLUMN_COUNT = COLUMN_COUNT
+    BOTTOM = BOTTOM_BITS
+    TOP = TOP_BITS
+    CELL_WEIGHTS = CELL_WEIGHTS
+
+    def __init__(self):
+        self.pieces = [0, 0, 0]  # Indexed by piece (1 or 2), index 0 unused
+        self.heights = list(self.BOTTOM)  # Next free bit of each column
+        self.moves = 0
+
+    def copy(self):
+        other = BitBoard.__new__(BitBoard)
+        other.pieces = self.pieces.copy()
+        other.heights = self.heights.copy()
+        other.moves = self.moves
+        return other
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Build a bitboard from a (6, 7) board array (row 0 at the top, 0 for empty cells).
+        """
+        bitboard = cls()
+        array = np.asarray(array)
+        bitboard.pieces[1] = int((cls.CELL_WEIGHTS * (array == 1)).sum())
+        bitboard.pieces[2] = int((cls.CELL_WEIGHTS * (array == 2)).sum())
+        counts = np.count_nonzero(array, axis=0)
+        bitboard.heights = [cls.BOTTOM[col] + int(counts[col]) for col in range(cls.COLUMN_COUNT)]
+        bitboard.moves = int(counts.sum())
+        return bitboard
+
+    def to_array(self, dtype=float):
+        """
+        Convert the position to a (6, 7) board array (row 0 at the top).
+        """
+        array = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT), dtype=dtype)
+        for piece in (1, 2):
+            array[(self.CELL_WEIGHTS & self.pieces[piece]) != 0] = piece
+        return array
+
+    def mask(self):
+        """Bitboard of all occupied cells."""
+        return self.pieces[1] | self.pieces[2]
+
+    def can_play(self, col):
+        return self.heights[col] <= self.TOP[col]
+
+    def next_open_row(self, col):
+        """Array row (0 = top) where a piece dropped in col would land, or -1 if full."""
+        height = self.heights[col] - self.BOTTOM[col]
+        return self.ROW_COUNT - 1 - height if height < self.ROW_COUNT else -1
+
+    def valid_moves(self):
+        return [col for col in range(self.COLUMN_COUNT) if self.heights[col] <= self.TOP[col]]
+
+    def play(self, col, piece):
+        """Drop a piece in a (non-full) column. Returns the array row of the piece."""
+        height = self.heights[col]
+        self.pieces[piece] |= 1 << height
+        self.heights[col] = height + 1
+        self.moves += 1
+        return self.ROW_COUNT - 1 - (height - self.BOTTOM[col])
+
+    def undo(self, col):
+        """Remove the top piece of a column."""
+        self.heights[col] -= 1
+        bit = 1 << self.heights[col]
+        self.pieces[1] &= ~bit
+        self.pieces[2] &= ~bit
+        self.moves -= 1
+
+    def is_win(self, piece):
+        """Check if the given piece has 4 aligned pieces."""
+        return _alignment(self.pieces[piece])
+
+    def is_winning_move(self, col, piece):
+        """Check if dropping piece in col would win, without playing it."""
+        return _alignment(self.pieces[piece] | (1 << self.heights[col]))
+
+    def is_full(self):
+        return self.moves == self.ROW_COUNT * self.COLUMN_COUNT
+
+
 class ConnectFourBoard:
     """
     A class representing the Connect Four game board and its logic.
+
+    The position is stored in a BitBoard (self.bits) for O(1) moves and win
+    checks, and mirrored in a numpy array (self.board) so AIs keep receiving
+    arrays through get_board().
     """
-    
+
     # Board dimensions
-    ROW_COUNT = 6
-    COLUMN_COUNT = 7
-    
+    ROW_COUNT = ROW_COUNT
+    COLUMN_COUNT = COLUMN_COUNT
+
     def __init__(self):
         """
         Initialize a new Connect Four board
         """
-        self.board = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT))
-        self.game_over = False
-        self.winner = None
-    
+        self.reset()
+
+    @property
+    def board(self):
+        """
+        The board as a (6, 7) numpy array (row 0 at the top).
+        Cells can be edited directly for lookahead checks with is_winning_move,
+        as long as they are restored afterwards; assign a whole new array to
+        change the position.
+        """
+        return self._board
+
+    @board.setter
+    def board(self, array):
+        self._board = array
+        self.bits = BitBoard.from_array(array)
+
     def get_board(self):
         """
         Returns a copy of the current board state
         """
-        return self.board.copy()
-    
+        return self._board.copy()
+
     def drop_piece(self, col, piece):
         """
-        Place a piece in the specified column. 
+        Place a piece in the specified column.
         Returns the row where the piece was placed, or -1 if the column is full.
-        
+
         Parameters:
         - col: int - The column to place the piece
         - piece: int - The player's piece (1 or 2)
-        
+
         Returns:
         - row: int - The row where the piece was placed, or -1 if invalid
         """
-        # Find the lowest empty row in the column
-        row = self.get_next_open_row(col)
-        
-        if row != -1:  # If column is not full
-            self.board[row][col] = piece
-            
-            # Check if this move wins the game
-            if self.is_winning_move(piece):
-                self.game_over = True
-                self.winner = piece
-                
-            # Check if board is full (tie)
-            if len(self.get_valid_locations()) == 0:
-                self.game_over = True
-                
-            return row
-        return -1
-    
+        if not self.is_valid_location(col):
+            return -1
+
+        row = self.bits.play(col, piece)
+        self._board[row][col] = piece
+
+        # Check if this move wins the game
+        if self.bits.is_win(piece):
+            self.game_over = True
+            self.winner = piece
+
+        # Check if board is full (tie)
+        if self.bits.is_full():
+            self.game_over = True
+
+        return row
+
+    def undo_move(self, col):
+        """
+        Remove the top piece of a column (the last move played in it).
+        The game is no longer over afterwards.
+        """
+        row = self.bits.next_open_row(col) + 1
+        self.bits.undo(col)
+        self._board[row][col] = 0
+        self.game_over = False
+        self.winner = None
+
     def is_valid_location(self, col):
         """
         Check if a column has an available space
         """
-        return (0 <= col < self.COLUMN_COUNT) and (self.board[0][col] == 0)
-    
+        return (0 <= col < self.COLUMN_COUNT) and self.bits.can_play(col)
+
     def get_next_open_row(self, col):
         """
         Find the lowest empty row in a given column
         """
-        for r in range(self.ROW_COUNT-1, -1, -1):
-            if self.board[r][col] == 0:
-                return r
-        return -1  # Column is full
-    
+        return self.bits.next_open_row(col)
+
     def get_valid_locations(self):
         """
         Find all valid locations to place a piece
         """
-        valid_locations = []
-        for col in range(self.COLUMN_COUNT):
-            if self.is_valid_location(col):
-                valid_locations.append(col)
-        return valid_locations
-    
+        return self.bits.valid_moves()
+
     def is_winning_move(self, piece):
         """
-        Check if the last move resulted in a win
-        """
-        # Check horizontal
-        for c in range(self.COLUMN_COUNT-3):
-            for r in range(self.ROW_COUNT):
-                if (self.board[r][c] == piece and 
-                    self.board[r][c+1] == piece and 
-                    self.board[r][c+2] == piece and 
-                    self.board[r][c+3] == piece):
-                    return True
-    
-        # Check vertical
-        for c in range(self.COLUMN_COUNT):
-            for r in range(self.ROW_COUNT-3):
-                if (self.board[r][c] == piece and 
-                    self.board[r+1][c] == piece and 
-                    self.board[r+2][c] == piece and 
-                    self.board[r+3][c] == piece):
-                    return True
-    
-        # Check positively sloped diagonals
-        for c in range(self.COLUMN_COUNT-3):
-            for r in range(self.ROW_COUNT-3):
-                if (self.board[r][c] == piece and 
-                    self.board[r+1][c+1] == piece and 
-                    self.board[r+2][c+2] == piece and 
-                    self.board[r+3][c+3] == piece):
-                    return True
-    
-        # Check negatively sloped diagonals
-        for c in range(self.COLUMN_COUNT-3):
-            for r in range(3, self.ROW_COUNT):
-                if (self.board[r][c] == piece and 
-                    self.board[r-1][c+1] == piece and 
-                    self.board[r-2][c+2] == piece and 
-                    self.board[r-3][c+3] == piece):
-                    return True
-    
-        return False
-    
+        Check if the given piece has 4 aligned pieces on the board array.
+        Reads the array (not the bitboard) so that it also sees cells edited directly.
+        """
+        return _alignment(int((CELL_WEIGHTS * (self._board == piece)).sum()))
+
     def print_board(self):
         """
         Print the board to the console (for debugging)
         """
-        print(np.flip(self.board, 0))
-    
+        print(np.flip(self._board, 0))
+
     def reset(self):
         """
         Reset the board to a new game state
         """
-        self.board = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT))
+        self._board = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT))
+        self.bits = BitBoard()
         self.game_over = False
-        self.winner = None
\ No newline at end of file
+        self.winner = None
@@ -0,0 +1,101 @@
+"""
+Build the opening book used by the AIs (ai/opening_book.py).
+
+Every position of the first plies is searched with the alpha-beta engine of
+the Minimax and Negamax AIs (ai/search.py) to a fixed depth, in parallel
+processes. Mirrored positions share one entry. The book is rewritten after
+each finished ply, so an interrupted run keeps the plies already computed.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from board import BitBoard
+from ai import opening_book
+from ai.evaluation import IncrementalEvaluator
+from ai.search import SearchEngine
+
+# Default values
+PLIES = 4  # Positions with 0 to PLIES pieces are searched
+DEPTH = 12
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Connect 4 opening book builder')
+    parser.add_argument('--plies', type=int, default=PLIES,
+                        help='Positions with up to this number of pieces are added to the book')
+    parser.add_argument('--depth', type=int, default=DEPTH,
+                        help='Search depth in plies for each position')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--output', type=str, default=opening_book.BOOK_FILE,
+                        help='Book file to write')
+    return parser.parse_args()
+
+
+def positions_by_ply(plies):
+    """
+    One representative of every position (up to mirroring) reachable in 0 to
+    plies moves without a win, ply by ply.
+
+    Returns:
+    - list (one per ply) of dicts {canonical key: (BitBoard, piece to move)}
+    """
+    levels = [{opening_book.canonical_key(0, 0)[0]: (BitBoard(), 1)}]
+    for _ in range(plies):
+        level = {}
+        for bits, piece in levels[-1].values():
+            for col in bits.valid_moves():
+                if bits.is_winning_move(col, piece):
+                    continue  # The game would be over
+                child = bits.copy()
+                child.play(col, piece)
+                key, _ = opening_book.canonical_key(child.pieces[3 - piece], child.mask())
+                level.setdefault(key, (child, 3 - piece))
+        levels.append(level)
+    return levels
+
+
+_engine = None
+
+
+def search_position(task):
+    """Best move and score of a position (run in a worker process)."""
+    global _engine
+    key, pieces, heights, piece, depth = task
+    if _engine is None:
+        _engine = SearchEngine(IncrementalEvaluator())
+    bits = BitBoard()
+    bits.pieces = list(pieces)
+    bits.heights = list(heights)
+    bits.moves = bin(pieces[1] | pieces[2]).count('1')
+    col, score = _engine.search(bits.to_array(), piece, depth, None)
+    # Store the move in the orientation of the canonical key
+    if opening_book.canonical_key(bits.pieces[piece], bits.mask())[1]:
+        col = opening_book.COLUMN_COUNT - 1 - col
+    return key, col, score
+
+
+def build(args):
+    levels = positions_by_ply(args.plies)
+    entries = {}
+    workers = args.workers or os.cpu_count()
+    print(f"{sum(len(level) for level in levels)} positions, depth {args.depth}, {workers} workers")
+    with multiprocessing.Pool(workers) as pool:
+        for ply, level in enumerate(levels):
+            start_time = time.time()
+            tasks = [(key, bits.pieces, bits.heights, piece, args.depth)
+                     for key, (bits, piece) in level.items()]
+            for key, col, score in pool.imap_unordered(search_position, tasks):
+                entries[key] = (col, score)
+            opening_book.OpeningBook.write(args.output, entries, ply, args.depth)
+            print(f"Ply {ply}: {len(level)} positions in {time.time() - start_time:.1f}s")
+    print(f"Opening book written to {args.output} ({len(entries)} positions)")
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print(" Connect-4 Opening Book Builder")
+    print("=" * 50)
+    build(parse_arguments())
@@ -0,0 +1,277 @@
+"""
+Genetic algorithm trainer for the weights of the Genetic AI (ai/genetic.py).
+
+A chromosome is the 5 weights used by ai.genetic.get_move (scores of own 3,
+own 2, opponent 3 and opponent 2 windows, center column weight). The fitness
+of a chromosome is its score (win 1, draw 0.5) in games against other members
+of the population and against existing AIs, played in a process pool. Games
+start from a few random opening moves so that deterministic players do not
+replay the same game.
+
+Each generation keeps the best chromosomes (elitism) and fills the rest by
+tournament selection, blend crossover and Gaussian mutation. The population
+is checkpointed after every generation so an interrupted run can be resumed,
+and the best weights are exported to ai/genetic_weights.json, which
+ai/genetic.py loads instead of its default weights.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+from board import ConnectFourBoard
+from ai import genetic
+
+# Default values
+POPULATION = 20
+GENERATIONS = 30
+ELITE = 2
+OPPONENTS = 4  # Population members each chromosome plays per generation
+OPENINGS = 2  # Random openings per pairing (each played with both colors)
+OPENING_PLIES = 2
+REFERENCE_AIS = ['ai.random_ai', 'ai.pattern_based']
+REFERENCE_GAMES = 4  # Games against each reference AI
+MUTATION_RATE = 0.3
+MUTATION_SCALE = 0.15
+TOURNAMENT_SIZE = 3
+CHECKPOINT = 'genetic_checkpoint.json'
+
+GENE_NAMES = ['own3', 'own2', 'opp3', 'opp2', 'center']
+# Range of each gene for random chromosomes and for the mutation scale
+GENE_LOW = np.array([0.0, 0.0, -200.0, -20.0, 0.0])
+GENE_HIGH = np.array([200.0, 20.0, 0.0, 0.0, 10.0])
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Genetic AI weight trainer')
+    parser.add_argument('--population', type=int, default=POPULATION,
+                        help='Number of chromosomes')
+    parser.add_argument('--generations', type=int, default=GENERATIONS,
+                        help='Number of generations to evaluate (in total, including resumed ones)')
+    parser.add_argument('--elite', type=int, default=ELITE,
+                        help='Best chromosomes copied unchanged to the next generation')
+    parser.add_argument('--opponents', type=int, default=OPPONENTS,
+                        help='Population members each chromosome plays per generation')
+    parser.add_argument('--openings', type=int, default=OPENINGS,
+                        help='Random openings per pairing, each played with both colors')
+    parser.add_argument('--reference-ais', nargs='*', default=REFERENCE_AIS,
+                        help='Modules of existing AIs every chromosome also plays')
+    parser.add_argument('--reference-games', type=int, default=REFERENCE_GAMES,
+                        help='Games against each reference AI')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed of the run')
+    parser.add_argument('--checkpoint', type=str, default=CHECKPOINT,
+                        help='Checkpoint file, written after every generation')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the run saved in the checkpoint file')
+    parser.add_argument('--export', type=str, default=genetic.WEIGHTS_FILE,
+                        help='File where the best weights are written')
+    return parser.parse_args()
+
+
+_reference_modules = {}
+
+
+def _player_move(player, board_state, piece):
+    """Move of a player: ('weights', list) for a chromosome, ('module', path) for an AI."""
+    kind, value = player
+    if kind == 'weights':
+        return genetic.get_move(board_state, piece, np.asarray(value))
+    if value not in _reference_modules:
+        _reference_modules[value] = importlib.import_module(value)
+    return _reference_modules[value].get_move(board_state, piece)
+
+
+def play_game(task):
+    """
+    Play one game (run in a worker process).
+
+    Parameters:
+    - task: (players, seed) where players are the players of pieces 1 and 2
+
+    Returns:
+    - the winning piece (1 or 2), or None for a draw. A player making an
+      invalid move loses.
+    """
+    players, seed = task
+    rng = np.random.default_rng(seed)
+    board = ConnectFourBoard()
+    piece = 1
+    for _ in range(OPENING_PLIES):
+        board.drop_piece(int(rng.choice(board.get_valid_locations())), piece)
+        piece = 3 - piece
+    while not board.game_over:
+        col = _player_move(players[piece - 1], board.get_board(), piece)
+        if col is None or not board.is_valid_location(col):
+            return 3 - piece
+        board.drop_piece(col, piece)
+        piece = 3 - piece
+    return board.winner
+
+
+def random_chromosome(rng):
+    return GENE_LOW + rng.random(len(GENE_NAMES)) * (GENE_HIGH - GENE_LOW)
+
+
+def initial_population(size, rng):
+    """The current weights, variations of them, and random chromosomes."""
+    population = [np.array(genetic.BEST_WEIGHTS, dtype=float)]
+    while len(population) < size:
+        if len(population) < size // 2:
+            population.append(mutate(population[0], rng, rate=1.0))
+        else:
+            population.append(random_chromosome(rng))
+    return population
+
+
+def mutate(chromosome, rng, rate=MUTATION_RATE, scale=MUTATION_SCALE):
+    """Gaussian mutation of each gene with probability rate, scaled to the gene range."""
+    genes = rng.random(len(chromosome)) < rate
+    noise = rng.normal(0.0, scale * (GENE_HIGH - GENE_LOW))
+    return chromosome + genes * noise
+
+
+def crossover(a, b, rng, alpha=0.25):
+    """Blend crossover: each gene is drawn around the segment between the parents."""
+    u = rng.uniform(-alpha, 1 + alpha, len(a))
+    return a + u * (b - a)
+
+
+def tournament(fitness, rng, size=TOURNAMENT_SIZE):
+    contestants = rng.choice(len(fitness), size=min(size, len(fitness)), replace=False)
+    return contestants[np.argmax(fitness[contestants])]
+
+
+def next_generation(population, fitness, rng, elite=ELITE):
+    order = np.argsort(-fitness)
+    children = [population[i].copy() for i in order[:elite]]
+    while len(children) < len(population):
+        a = population[tournament(fitness, rng)]
+        b = population[tournament(fitness, rng)]
+        children.append(mutate(crossover(a, b, rng), rng))
+    return children
+
+
+def schedule_games(population, rng, opponents, openings, reference_ais, reference_games):
+    """
+    Games of one generation.
+
+    Returns:
+    - list of (task, chromosome of piece 1 or None, chromosome of piece 2 or None)
+    """
+    games = []
+    size = len(population)
+    for i in range(size):
+        others = [j for j in range(size) if j != i]
+        for j in rng.choice(others, size=min(opponents, len(others)), replace=False):
+            for _ in range(openings):
+                seed = int(rng.integers(1 << 31))
+                for first, second in ((i, j), (j, i)):
+                    players = (('weights', population[first].tolist()),
+                               ('weights', population[second].tolist()))
+                    games.append(((players, seed), first, second))
+        for module in reference_ais:
+            for k in range(reference_games):
+                seed = int(rng.integers(1 << 31))
+                own = ('weights', population[i].tolist())
+                reference = ('module', module)
+                if k % 2 == 0:
+                    games.append((((own, reference), seed), i, None))
+                else:
+                    games.append((((reference, own), seed), None, i))
+    return games
+
+
+def evaluate(pool, population, games):
+    """Fitness of every chromosome: average points per game (win 1, draw 0.5)."""
+    points = np.zeros(len(population))
+    played = np.zeros(len(population))
+    winners = pool.imap(play_game, [task for task, _, _ in games], chunksize=4)
+    for (_, first, second), winner in zip(games, winners):
+        for index, piece in ((first, 1), (second, 2)):
+            if index is None:
+                continue
+            played[index] += 1
+            points[index] += 1.0 if winner == piece else 0.5 if winner is None else 0.0
+    return points / np.maximum(played, 1)
+
+
+def save_json(path, data):
+    """Write a JSON file atomically (an interrupted write keeps the previous file)."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def export_weights(path, weights, fitness, generation):
+    """Write weights in the format loaded by ai.genetic.load_weights."""
+    save_json(path, {
+        'weights': [float(w) for w in weights],
+        'genes': GENE_NAMES,
+        'fitness': float(fitness),
+        'generation': generation,
+    })
+
+
+def train(args):
+    state = None
+    if args.resume and os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            state = json.load(f)
+        print(f"Resuming from {args.checkpoint} at generation {state['generation']}")
+        seed = state['seed']
+        population = [np.array(c) for c in state['population']]
+    else:
+        seed = args.seed
+        population = initial_population(args.population, np.random.default_rng([seed]))
+        state = {'seed': seed, 'generation': 0, 'history': []}
+
+    workers = args.workers or os.cpu_count()
+    print(f"Population: {len(population)}, generations: {args.generations}, {workers} workers")
+    with multiprocessing.Pool(workers) as pool:
+        for generation in range(state['generation'], args.generations):
+            start_time = time.time()
+            # One generator per generation: a resumed run makes the same choices
+            rng = np.random.default_rng([seed, generation])
+            games = schedule_games(population, rng, args.opponents, args.openings,
+                                   args.reference_ais, args.reference_games)
+            fitness = evaluate(pool, population, games)
+
+            best = int(np.argmax(fitness))
+            best_weights = population[best]
+            state['history'].append({
+                'generation': generation,
+                'best_fitness': float(fitness[best]),
+                'mean_fitness': float(fitness.mean()),
+                'best_weights': best_weights.tolist(),
+            })
+            print(f"Generation {generation + 1}/{args.generations} | {len(games)} games | "
+                  f"{time.time() - start_time:.1f}s | best {fitness[best]:.3f} | "
+                  f"mean {fitness.mean():.3f} | weights {np.round(best_weights, 2).tolist()}")
+
+            export_weights(args.export, best_weights, fitness[best], generation)
+            population = next_generation(population, fitness, rng, args.elite)
+            state['generation'] = generation + 1
+            state['population'] = [c.tolist() for c in population]
+            save_json(args.checkpoint, state)
+
+    print(f"Best weights written to {args.export}")
+    return state
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print(" Connect-4 Genetic AI Trainer")
+    print("=" * 50)
+    args = parse_arguments()
+    if args.population < 2 or args.elite >= args.population:
+        print("The population needs at least 2 chromosomes and more than --elite.")
+        sys.exit(1)
+    train(args)
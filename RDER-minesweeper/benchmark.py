@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Benchmark sans interface des solveurs de Démineur sur des corpus de grilles.
+
+Chaque partie est jouée jusqu'au bout dans un pool de processus: le solveur
+est appelé à chaque étape, les cases sûres sont révélées et les mines
+marquées; quand il ne trouve aucune case certaine, une case est jouée au
+hasard (case de plus faible probabilité pour le solveur CSP, case inconnue
+aléatoire pour le solveur simple) et compte comme un coup deviné.
+
+Pour chaque étape sont mesurés le temps de résolution et la taille du
+problème (cases de la frontière, chiffres contraignants); les résultats sont
+agrégés par solveur et par difficulté.
+
+Les corpus sont générés à partir d'une graine (une grille par graine, donc
+reproductibles) ou chargés depuis des fichiers au format de
+generate_minesweeper.py.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from minesweeper import Minesweeper
+from csp_solver import MinesweeperCSPSolver, SimpleMinesweeperSolver
+from generate_minesweeper import load_grid_from_file
+
+# Difficultés standard: (largeur, hauteur, mines)
+DIFFICULTIES = {
+    'debutant': (9, 9, 10),
+    'intermediaire': (16, 16, 40),
+    'expert': (30, 16, 99),
+}
+
+SOLVERS = ('csp', 'simple')
+
+# Une partie est une spécification sérialisable, rejouée dans le processus de travail:
+# ('graine', difficulté, largeur, hauteur, mines, graine) ou ('fichier', difficulté, chemin)
+GameSpec = Tuple
+
+
+def generated_corpus(difficulty: str, count: int, seed: int = 0) -> List[GameSpec]:
+    """
+    Corpus de grilles générées, une graine par grille.
+
+    Args:
+        difficulty: Nom de la difficulté (voir DIFFICULTIES)
+        count: Nombre de grilles
+        seed: Graine de la première grille
+
+    Returns:
+        Liste de spécifications de parties
+    """
+    width, height, mines = DIFFICULTIES[difficulty]
+    return [('graine', difficulty, width, height, mines, seed + i) for i in range(count)]
+
+
+def file_corpus(paths: List[str], difficulty: str = 'fichier') -> List[GameSpec]:
+    """
+    Corpus de grilles chargées avec load_grid_from_file. Un dossier désigne
+    tous les fichiers .txt qu'il contient.
+
+    Args:
+        paths: Fichiers ou dossiers de grilles
+        difficulty: Étiquette des grilles dans les résultats
+
+    Returns:
+        Liste de spécifications de parties
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith('.txt')))
+        else:
+            files.append(path)
+    return [('fichier', difficulty, path) for path in files]
+
+
+def _first_click(game: Minesweeper) -> Tuple[int, int]:
+    """Case sans mine la plus proche du centre, de préférence sans mine voisine."""
+    center = (game.height // 2, game.width // 2)
+    cells = [(r, c) for r in range(game.height) for c in range(game.width)
+             if game.solution[r, c] != Minesweeper.MINE]
+    return min(cells, key=lambda cell: (game.count_adjacent_mines(*cell) > 0,
+                                        abs(cell[0] - center[0]) + abs(cell[1] - center[1])))
+
+
+def create_game(spec: GameSpec) -> Tuple[Optional[Minesweeper], int]:
+    """
+    Construit la partie d'une spécification, premier coup joué.
+
+    Returns:
+        tuple: (partie ou None si le fichier est illisible, graine des coups devinés)
+    """
+    if spec[0] == 'graine':
+        _, _, width, height, mines, seed = spec
+        random.seed(seed)
+        game = Minesweeper(width, height, mines)
+        first = (height // 2, width // 2)
+        game.initialize_mines(first_click=first)
+        game.reveal(*first)
+        return game, seed
+
+    _, _, path = spec
+    loaded = load_grid_from_file(path)
+    if loaded is None:
+        return None, 0
+    # Les grilles chargées sont rejouées dans le jeu du projet, qui prévient le solveur
+    game = Minesweeper(loaded.width, loaded.height, int(np.sum(loaded.solution == Minesweeper.MINE)))
+    game.solution = loaded.solution.copy()
+    if loaded.revealed_cells:
+        for row, col in sorted(loaded.revealed_cells):
+            game.reveal(row, col)
+    else:
+        game.reveal(*_first_click(game))
+    return game, zlib.crc32(path.encode())
+
+
+def frontier_size(game: Minesweeper) -> Tuple[int, int]:
+    """
+    Taille du problème de contraintes d'une position.
+
+    Returns:
+        tuple: (cases inconnues sans drapeau voisines d'un chiffre, chiffres
+        ayant de telles cases voisines)
+    """
+    cells = set()
+    numbers = 0
+    for row, col in game.revealed_cells:
+        unknown = [cell for cell in game.get_unknown_adjacent_cells(row, col)
+                   if game.board[cell] == Minesweeper.UNKNOWN]
+        if unknown:
+            numbers += 1
+            cells.update(unknown)
+    return len(cells), numbers
+
+
+def play_game(task: Tuple[str, GameSpec]) -> Optional[Dict]:
+    """
+    Joue une partie jusqu'au bout avec un solveur (exécuté dans un processus de travail).
+
+    Args:
+        task: (nom du solveur, spécification de la partie)
+
+    Returns:
+        Dictionnaire de résultats de la partie, avec les mesures de chaque
+        étape, ou None si la grille n'a pas pu être chargée
+    """
+    solver_name, spec = task
+    game, guess_seed = create_game(spec)
+    if game is None:
+        return None
+    rng = random.Random(guess_seed)
+    quiet = lambda message: None
+    if solver_name == 'csp':
+        solver = MinesweeperCSPSolver(game, logger=quiet)
+    else:
+        solver = SimpleMinesweeperSolver(game, logger=quiet)
+
+    step_times, step_cells, step_numbers, step_exact = [], [], [], []
+    guesses = 0
+    max_steps = 2 * game.width * game.height
+    start = time.perf_counter()
+    while not game.game_over and len(step_times) < max_steps:
+        cells, numbers = frontier_size(game)
+        step_start = time.perf_counter()
+        if solver_name == 'csp':
+            # Déductions certaines seulement: les coups devinés sont comptés à part
+            solver.solve(use_probability=False)
+        else:
+            solver.solve()
+        step_times.append(time.perf_counter() - step_start)
+        step_cells.append(cells)
+        step_numbers.append(numbers)
+        step_exact.append(solver_name == 'csp' and solver.inferred_count == 0)
+
+        if solver.update_game(auto_play=True):
+            continue
+
+        # Aucune case certaine: coup deviné
+        guesses += 1
+        unknown = [(r, c) for r in range(game.height) for c in range(game.width)
+                   if game.board[r, c] == Minesweeper.UNKNOWN]
+        if not unknown:
+            break
+        if solver_name == 'csp':
+            probabilities = solver.calculate_probabilities()
+            candidates = {cell: p for cell, p in probabilities.items() if game.board[cell] == Minesweeper.UNKNOWN}
+            cell = min(candidates, key=candidates.get) if candidates else rng.choice(unknown)
+        else:
+            cell = rng.choice(unknown)
+        game.reveal(*cell)
+
+    return {
+        'solveur': solver_name,
+        'difficulte': spec[1],
+        'grille': spec[-1],
+        'victoire': game.win,
+        'etapes': len(step_times),
+        'coups_devines': guesses,
+        'duree': time.perf_counter() - start,
+        'revelees': len(game.revealed_cells) / (game.width * game.height - game.num_mines),
+        'temps_etapes': step_times,
+        'cases_frontiere': step_cells,
+        'chiffres_frontiere': step_numbers,
+        'comptage_exact': step_exact,
+    }
+
+
+def run_benchmark(solvers: List[str], corpus: List[GameSpec], workers: Optional[int] = None) -> List[Dict]:
+    """
+    Joue toutes les parties du corpus avec chaque solveur dans un pool de processus.
+
+    Args:
+        solvers: Noms des solveurs (voir SOLVERS)
+        corpus: Spécifications des parties
+        workers: Nombre de processus (par défaut, nombre de processeurs)
+
+    Returns:
+        Liste des résultats des parties
+    """
+    tasks = [(solver, spec) for solver in solvers for spec in corpus]
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        for i, result in enumerate(executor.map(play_game, tasks, chunksize=chunksize), 1):
+            if result is not None:
+                results.append(result)
+            print(f"  Parties jouées: {i}/{len(tasks)}", end="\r", file=sys.stderr)
+    print(file=sys.stderr)
+    return results
+
+
+def summarize(results: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Agrège les résultats par solveur et par difficulté.
+
+    Returns:
+        tuple: (tableau par partie: victoires, coups devinés, étapes;
+        tableau par étape: temps de résolution et taille du problème)
+    """
+    games = pd.DataFrame([{key: value for key, value in result.items()
+                           if not isinstance(value, list)} for result in results])
+    steps = pd.DataFrame({
+        'solveur': [r['solveur'] for r in results for _ in r['temps_etapes']],
+        'difficulte': [r['difficulte'] for r in results for _ in r['temps_etapes']],
+        'temps_ms': [1000 * t for r in results for t in r['temps_etapes']],
+        'cases_frontiere': [n for r in results for n in r['cases_frontiere']],
+        'chiffres_frontiere': [n for r in results for n in r['chiffres_frontiere']],
+        'comptage_exact': [e for r in results for e in r['comptage_exact']],
+    })
+    keys = ['solveur', 'difficulte']
+
+    game_table = games.groupby(keys).agg(
+        parties=('victoire', 'size'),
+        taux_victoire=('victoire', 'mean'),
+        devines_moyen=('coups_devines', 'mean'),
+        etapes_moyen=('etapes', 'mean'),
+        revelees_moyen=('revelees', 'mean'),
+        duree_moyenne_s=('duree', 'mean'),
+    )
+    step_table = steps.groupby(keys).agg(
+        etapes=('temps_ms', 'size'),
+        moyen_ms=('temps_ms', 'mean'),
+        p50_ms=('temps_ms', 'median'),
+        p95_ms=('temps_ms', lambda t: t.quantile(0.95)),
+        p99_ms=('temps_ms', lambda t: t.quantile(0.99)),
+        max_ms=('temps_ms', 'max'),
+        frontiere_moyenne=('cases_frontiere', 'mean'),
+        frontiere_max=('cases_frontiere', 'max'),
+        chiffres_moyen=('chiffres_frontiere', 'mean'),
+        part_comptage_exact=('comptage_exact', 'mean'),
+    )
+    return game_table, step_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des solveurs de Démineur")
+    parser.add_argument("--difficulty", nargs="+", choices=list(DIFFICULTIES), default=list(DIFFICULTIES),
+                        help="Difficultés des grilles générées")
+    parser.add_argument("--games", type=int, default=100, help="Nombre de grilles par difficulté")
+    parser.add_argument("--seed", type=int, default=0, help="Graine de la première grille")
+    parser.add_argument("--grids", nargs="+", help="Fichiers ou dossiers de grilles à charger (au lieu de les générer)")
+    parser.add_argument("--solvers", nargs="+", choices=SOLVERS, default=list(SOLVERS), help="Solveurs à comparer")
+    parser.add_argument("--workers", type=int, help="Nombre de processus (défaut: nombre de processeurs)")
+    parser.add_argument("--csv", type=str, help="Fichier CSV des résultats par partie")
+    args = parser.parse_args()
+
+    if args.grids:
+        corpus = file_corpus(args.grids)
+    else:
+        corpus = [spec for difficulty in args.difficulty
+                  for spec in generated_corpus(difficulty, args.games, args.seed)]
+    if not corpus:
+        print("Aucune grille à jouer.")
+        return
+
+    print(f"Benchmark: {len(corpus)} grilles, solveurs {', '.join(args.solvers)}")
+    start = time.perf_counter()
+    results = run_benchmark(args.solvers, corpus, args.workers)
+    print(f"Terminé en {time.perf_counter() - start:.1f} secondes")
+
+    game_table, step_table = summarize(results)
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.precision', 3):
+        print("\nParties:")
+        print(game_table)
+        print("\nÉtapes de résolution:")
+        print(step_table)
+
+    if args.csv:
+        game_rows = [{key: value for key, value in result.items() if not isinstance(value, list)}
+                     for result in results]
+        pd.DataFrame(game_rows).to_csv(args.csv, index=False)
+        print(f"\nRésultats sauvegardés dans {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
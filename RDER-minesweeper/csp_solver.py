@@ -2,12 +2,20 @@ import time
 import numpy as np
 from typing import Tuple, List, Set, Dict, Optional
 from minesweeper import Minesweeper
-import constraint
-from itertools import combinations
+from frontier import FrontierState
+from inference import reduce_constraints
 
 class MinesweeperCSPSolver:
     """
-    Solveur de Démineur utilisant la programmation par contraintes avec python-constraint.
+    Solveur de Démineur utilisant la programmation par contraintes.
+
+    Les probabilités des cellules sont calculées exactement en comptant les
+    solutions de chaque composante indépendante de la frontière (voir frontier.py).
+    L'état de la frontière est persistant: il est mis à jour par les cases
+    révélées et les drapeaux signalés par la partie, et seules les composantes
+    touchées sont recomptées à l'étape suivante. Le comptage n'est atteint que
+    si l'inférence déterministe (inclusion, paires, nombre total de mines, voir
+    inference.py) ne résout aucune cellule.
     """
     
     def __init__(self, game: Minesweeper, logger=None):
@@ -22,55 +30,56 @@ class MinesweeperCSPSolver:
         self.logger = logger if logger else print
         self.width = game.width
         self.height = game.height
-        self.board = game.get_visible_board()
+        self.board = game.board
         self.num_mines = game.num_mines
-        self.unknown_cells = set()
-        self.update_unknown_cells()
+        self.state = FrontierState(game)
+        self.unknown_cells = self.state.unknown
         self.safe_cells: Set[Tuple[int, int]] = set()
         self.mine_cells: Set[Tuple[int, int]] = set()
-        self.cached_solutions = None
-        self.last_board_state = None
-        
+        self.last_version = None
+        self.inferred_count = 0
+
     def update_unknown_cells(self):
-        """Met à jour l'ensemble des cellules inconnues"""
-        self.unknown_cells.clear()
-        for row in range(self.height):
-            for col in range(self.width):
-                if self.board[row, col] == Minesweeper.UNKNOWN or self.board[row, col] == Minesweeper.FLAG:
-                    self.unknown_cells.add((row, col))
+        """Met à jour l'ensemble des cellules inconnues (non révélées, drapeaux compris)"""
+        if not self.state._in_sync():
+            self.state.rebuild()
+        self.unknown_cells = self.state.unknown
 
     def get_border_cells(self) -> Set[Tuple[int, int]]:
-        """Retourne les cellules non révélées adjacentes à des cellules révélées"""
-        border_cells = set()
-        for row in range(self.height):
-            for col in range(self.width):
-                if self.board[row, col] >= 0:  # Cellule révélée avec un nombre
-                    adjacent_cells = self.game.get_unknown_adjacent_cells(row, col)
-                    border_cells.update(adjacent_cells)
-        return border_cells
-
-    def apply_simple_rules(self) -> bool:
-        """Applique des règles simples avant d'utiliser le CSP"""
-        updated = False
-        for row in range(self.height):
-            for col in range(self.width):
-                if self.board[row, col] >= 0:  # Cellule révélée avec un nombre
-                    value = self.board[row, col]
-                    adjacent_cells = self.game.get_unknown_adjacent_cells(row, col)
-                    flagged = sum(1 for r, c in adjacent_cells if self.board[r, c] == Minesweeper.FLAG)
-                    unknown = [(r, c) for r, c in adjacent_cells if self.board[r, c] == Minesweeper.UNKNOWN]
-
-                    # Règle 1: Si le nombre = mines restantes, toutes les cellules inconnues sont des mines
-                    if value - flagged == len(unknown):
-                        self.mine_cells.update(unknown)
-                        updated = True
-
-                    # Règle 2: Si le nombre = drapeaux, toutes les autres cellules sont sûres
-                    if value == flagged and unknown:
-                        self.safe_cells.update(unknown)
-                        updated = True
+        """Retourne les cellules inconnues sans drapeau adjacentes à des cellules révélées"""
+        return set(self.state.cell_numbers)
 
-        return updated
+    def apply_inference(self) -> bool:
+        """
+        Applique l'inférence déterministe (voir inference.py) sur les chiffres
+        de la frontière avant le comptage exact: règles simples, inclusion,
+        chevauchement de paires et nombre total de mines, jusqu'à un point fixe.
+
+        Returns:
+            True si des cellules ont été résolues (nombre dans self.inferred_count)
+        """
+        self.inferred_count = 0
+        state = self.state
+        if state.violated:
+            return False
+
+        cells = list(state.cell_numbers)
+        index = {cell: i for i, cell in enumerate(cells)}
+        constraints = [(tuple(index[cell] for cell in state.numbers[number][0]), state.numbers[number][1])
+                       for number in state.active_numbers]
+        interior = state.interior_cells()
+        result = reduce_constraints(len(cells), constraints,
+                                    self.num_mines - state.flag_count, len(interior))
+        if result is None:
+            return False
+
+        assignment, interior_value = result
+        for i, value in assignment.items():
+            (self.mine_cells if value else self.safe_cells).add(cells[i])
+        if interior_value is not None:
+            (self.mine_cells if interior_value else self.safe_cells).update(interior)
+        self.inferred_count = len(self.safe_cells) + len(self.mine_cells)
+        return self.inferred_count > 0
 
     def solve(self, use_probability: bool = True) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
         """Résout le problème du Démineur"""
@@ -79,79 +88,32 @@ class MinesweeperCSPSolver:
         self.mine_cells.clear()
         
         # Mettre à jour l'état du plateau
-        self.board = self.game.get_visible_board()
+        self.board = self.game.board
         self.update_unknown_cells()
         
-        # Vérifier si l'état du plateau a changé depuis la dernière résolution
-        current_board_state = self.board.tobytes()
-        if current_board_state == self.last_board_state:
+        # Vérifier si le plateau a changé depuis la dernière résolution
+        if self.state.version == self.last_version:
             return set(), set()
-        self.last_board_state = current_board_state
+        self.last_version = self.state.version
 
-        # Appliquer d'abord les règles simples
-        if self.apply_simple_rules():
-            self.logger("✨ Solutions trouvées avec les règles simples")
+        # Appliquer d'abord l'inférence déterministe
+        if self.apply_inference():
+            self.logger(f"✨ {self.inferred_count} cellules résolues par inférence")
             return self.safe_cells, self.mine_cells
 
         # Si pas de cellules inconnues, retourner les ensembles vides
         if not self.unknown_cells:
             return self.safe_cells, self.mine_cells
 
-        # Optimisation : ne considérer que les cellules frontalières
-        border_cells = self.get_border_cells()
-        if not border_cells:
-            # Si pas de cellules frontalières, utiliser une approche probabiliste
-            if use_probability:
-                return self.solve_with_probability()
-            return set(), set()
-
-        # Créer le problème CSP
-        problem = constraint.Problem()
-        
-        # Variables: une par cellule frontalière
-        for row, col in border_cells:
-            problem.addVariable(f"cell_{row}_{col}", [0, 1])
-
-        # Contrainte: nombre total de mines restantes
-        mines_remaining = self.num_mines - len(self.game.flagged_cells)
-        if mines_remaining > 0:
-            problem.addConstraint(
-                constraint.MaxSumConstraint(mines_remaining),
-                [f"cell_{row}_{col}" for row, col in border_cells]
-            )
-
-        # Contraintes pour chaque cellule révélée
-        for row in range(self.height):
-            for col in range(self.width):
-                if self.board[row, col] >= 0:
-                    adjacent_cells = set(self.game.get_unknown_adjacent_cells(row, col)) & border_cells
-                    if adjacent_cells:
-                        value = self.board[row, col]
-                        flagged_adjacent = sum(1 for r, c in self.game.get_adjacent_cells(row, col)
-                                            if (r, c) in self.game.flagged_cells)
-                        remaining_mines = value - flagged_adjacent
-                        
-                        adjacent_vars = [f"cell_{r}_{c}" for r, c in adjacent_cells]
-                        if adjacent_vars:
-                            problem.addConstraint(
-                                constraint.ExactSumConstraint(remaining_mines),
-                                adjacent_vars
-                            )
-
-        # Obtenir les solutions
-        solutions = problem.getSolutions()
-        if not solutions:
+        # Probabilités exactes par comptage des composantes de la frontière
+        probabilities = self.compute_exact_probabilities()
+        if probabilities is None:
             self.logger("⚠️ Aucune solution trouvée avec CSP")
             return self.solve_with_probability() if use_probability else (set(), set())
 
-        # Analyser les solutions
+        # Analyser les probabilités
         mine_counts = {}
-        for cell in border_cells:
-            row, col = cell
-            var_name = f"cell_{row}_{col}"
-            count = sum(sol[var_name] for sol in solutions)
-            prob = count / len(solutions)
-            
+        for cell, prob in probabilities.items():
             if prob == 0:
                 self.safe_cells.add(cell)
             elif prob == 1:
@@ -179,9 +141,31 @@ class MinesweeperCSPSolver:
         
         return self.safe_cells, self.mine_cells
 
+    def compute_exact_probabilities(self) -> Optional[Dict[Tuple[int, int], float]]:
+        """
+        Calcule la probabilité exacte d'être une mine pour chaque cellule
+        inconnue (sans drapeau), en supposant toutes les configurations
+        compatibles équiprobables.
+
+        La frontière est découpée en composantes indépendantes comptées
+        séparément, puis combinées avec le nombre total de mines restantes
+        (voir frontier.FrontierState): aucune liste de solutions n'est construite.
+
+        Returns:
+            Dictionnaire {cellule: probabilité}, ou None si le plateau est incohérent
+        """
+        result = self.state.probabilities()
+        if result is None:
+            return None
+        border_probabilities, interior_probability = result
+        probabilities = dict(border_probabilities)
+        for cell in self.state.interior_cells():
+            probabilities[cell] = interior_probability
+        return probabilities
+
     def solve_with_probability(self) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
         """Résout en utilisant une approche probabiliste quand CSP ne trouve pas de solution"""
-        probabilities = self.calculate_probabilities()
+        probabilities = self.estimate_probabilities()
         safe_cells = set()
         mine_cells = set()
 
@@ -196,7 +180,18 @@ class MinesweeperCSPSolver:
         return safe_cells, mine_cells
 
     def calculate_probabilities(self) -> Dict[Tuple[int, int], float]:
-        """Calcule les probabilités de mines pour chaque cellule non révélée"""
+        """
+        Calcule les probabilités de mines pour chaque cellule non révélée:
+        probabilités exactes si le plateau est cohérent, estimation sinon.
+        """
+        self.update_unknown_cells()
+        probabilities = self.compute_exact_probabilities()
+        if probabilities is not None:
+            return probabilities
+        return self.estimate_probabilities()
+
+    def estimate_probabilities(self) -> Dict[Tuple[int, int], float]:
+        """Estime les probabilités de mines à partir des chiffres voisins de chaque cellule"""
         probabilities = {}
         total_unknown = len(self.unknown_cells)
         if total_unknown == 0:
@@ -293,11 +288,11 @@ class MinesweeperCSPSolver:
             self.game = game
             self.width = game.width
             self.height = game.height
-            self.board = game.get_visible_board()
-            
-            # Mettre à jour les cellules inconnues
-            self.unknown_cells = set()
-            self.update_unknown_cells()
+            self.board = game.board
+            self.num_mines = game.num_mines
+            self.state = FrontierState(game)
+            self.unknown_cells = self.state.unknown
+            self.last_version = None
         
         # Utiliser la méthode solve existante
         return self.solve()
@@ -337,14 +332,16 @@ class SimpleMinesweeperSolver:
     Cette implémentation est plus rapide mais moins puissante que l'approche CSP.
     """
     
-    def __init__(self, game: Minesweeper):
+    def __init__(self, game: Minesweeper, logger=None):
         """
         Initialise le solveur avec une instance de jeu.
         
         Args:
             game: Instance du jeu Démineur à résoudre
+            logger: Fonction de log personnalisée (par défaut, print)
         """
         self.game = game
+        self.logger = logger if logger else print
         self.width = game.width
         self.height = game.height
         self.safe_cells: Set[Tuple[int, int]] = set()
@@ -395,9 +392,9 @@ class SimpleMinesweeperSolver:
                             self.safe_cells.add((r, c))
         
         elapsed_time = time.time() - start_time
-        print(f"Résolution simple terminée en {elapsed_time:.2f} secondes.")
-        print(f"Cellules sûres trouvées: {len(self.safe_cells)}")
-        print(f"Mines identifiées: {len(self.mine_cells)}")
+        self.logger(f"Résolution simple terminée en {elapsed_time:.2f} secondes.")
+        self.logger(f"Cellules sûres trouvées: {len(self.safe_cells)}")
+        self.logger(f"Mines identifiées: {len(self.mine_cells)}")
         
         return self.safe_cells, self.mine_cells
     
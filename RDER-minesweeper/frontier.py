@@ -0,0 +1,505 @@
+"""
+Comptage exact des configurations de mines de la frontière.
+
+La frontière (cases inconnues voisines d'un chiffre révélé) est découpée en
+composantes connexes indépendantes: deux cases sont liées si elles
+apparaissent dans une même contrainte. Chaque composante est comptée
+séparément par programmation dynamique, sans énumérer ses solutions, puis les
+composantes sont combinées avec la contrainte globale sur le nombre de mines:
+les cases intérieures (inconnues hors frontière) reçoivent les mines restantes,
+ce qui pondère chaque total de mines de la frontière par un coefficient binomial.
+
+Les contraintes sont manipulées sous forme compacte: une contrainte est un
+couple (indices des variables, nombre de mines), les variables étant
+numérotées de 0 à n-1.
+
+FrontierState garde ces composantes et leurs comptes d'une étape à l'autre
+d'une partie, et ne recompte que celles touchées par les dernières cases
+révélées ou marquées.
+"""
+from math import comb, nextafter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from minesweeper import Minesweeper
+
+Constraint = Tuple[Tuple[int, ...], int]
+
+
+def split_components(num_vars: int, constraints: Sequence[Constraint]) -> List[Tuple[List[int], List[int]]]:
+    """
+    Découpe les variables en composantes connexes (union-find).
+
+    Args:
+        num_vars: Nombre de variables
+        constraints: Liste de contraintes (variables, somme)
+
+    Returns:
+        Liste de composantes (variables, indices des contraintes)
+    """
+    parent = list(range(num_vars))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for variables, _ in constraints:
+        root = find(variables[0])
+        for v in variables[1:]:
+            other = find(v)
+            if other != root:
+                parent[other] = root
+
+    groups: Dict[int, Tuple[List[int], List[int]]] = {}
+    for v in range(num_vars):
+        groups.setdefault(find(v), ([], []))[0].append(v)
+    for j, (variables, _) in enumerate(constraints):
+        groups[find(variables[0])][1].append(j)
+    return list(groups.values())
+
+
+def _order_variables(variables: List[int], constraints: Sequence[Constraint]) -> List[int]:
+    """
+    Ordonne les variables d'une composante en largeur d'abord (Cuthill-McKee),
+    en partant d'une variable de degré minimal: les contraintes restent ouvertes
+    sur peu de variables consécutives, ce qui limite le nombre d'états.
+    """
+    neighbors = {v: set() for v in variables}
+    for scope, _ in constraints:
+        for v in scope:
+            neighbors[v].update(scope)
+    for v in variables:
+        neighbors[v].discard(v)
+
+    order, seen = [], set()
+    for start in sorted(variables, key=lambda v: len(neighbors[v])):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = [start]
+        for v in queue:
+            order.append(v)
+            for w in sorted(neighbors[v] - seen, key=lambda w: len(neighbors[w])):
+                seen.add(w)
+                queue.append(w)
+    return order
+
+
+def _add_shifted(target: List[int], poly: List[int], shift: int):
+    """target += poly * x^shift (polynômes en nombre de mines, listes d'entiers)."""
+    needed = len(poly) + shift
+    if len(target) < needed:
+        target.extend([0] * (needed - len(target)))
+    for k, count in enumerate(poly):
+        if count:
+            target[k + shift] += count
+
+
+def _multiply(a: List[int], b: List[int]) -> List[int]:
+    """Produit de deux polynômes."""
+    if not a or not b:
+        return []
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                if y:
+                    result[i + j] += x * y
+    return result
+
+
+def count_component(variables: List[int], constraints: Sequence[Constraint]):
+    """
+    Compte les solutions d'une composante, par nombre de mines.
+
+    Les variables sont affectées dans l'ordre de _order_variables. L'état après
+    i affectations est le tuple des sommes partielles des contraintes ouvertes
+    (commencées mais pas terminées): toutes les affectations menant au même
+    état sont regroupées, et le nombre de solutions est propagé en avant puis
+    en arrière. Le coût dépend du nombre d'états, pas du nombre de solutions.
+
+    Args:
+        variables: Variables de la composante
+        constraints: Contraintes de la composante
+
+    Returns:
+        tuple: (total, mines) où total[k] est le nombre de solutions avec k
+        mines, et mines[v][k] le nombre de ces solutions où v est une mine.
+        total est vide si la composante n'a aucune solution.
+    """
+    order = _order_variables(variables, constraints)
+    n = len(order)
+    position = {v: i for i, v in enumerate(order)}
+    scopes = [sorted(position[v] for v in scope) for scope, _ in constraints]
+    first = [scope[0] for scope in scopes]
+    last = [scope[-1] for scope in scopes]
+
+    # Contraintes ouvertes entre les variables i-1 et i
+    open_at = [[c for c in range(len(constraints)) if first[c] < i <= last[c]] for i in range(n + 1)]
+
+    # Pour chaque variable i, comment construire le nouvel état à partir de l'ancien:
+    # (indice dans l'ancien état ou -1, contient la variable, somme visée, variables restantes)
+    steps = []
+    for i in range(n):
+        old_index = {c: k for k, c in enumerate(open_at[i])}
+        touched = set(c for c in range(len(constraints)) if i in scopes[c])
+        updates = []
+        for c in open_at[i + 1]:
+            remaining = sum(1 for p in scopes[c] if p > i)
+            updates.append((old_index.get(c, -1), c in touched, constraints[c][1], remaining))
+        closing = [(old_index.get(c, -1), constraints[c][1]) for c in touched if last[c] == i]
+        steps.append((updates, closing))
+
+    def transition(state, i, value):
+        updates, closing = steps[i]
+        for src, target in closing:
+            if (state[src] if src >= 0 else 0) + value != target:
+                return None
+        new_state = []
+        for src, touches, target, remaining in updates:
+            partial = (state[src] if src >= 0 else 0) + (value if touches else 0)
+            if partial > target or partial + remaining < target:
+                return None
+            new_state.append(partial)
+        return tuple(new_state)
+
+    # Passe avant: nombre de façons d'atteindre chaque état, par nombre de mines
+    forward = [{(): [1]}]
+    transitions = []
+    for i in range(n):
+        layer, moves = {}, []
+        for state, poly in forward[i].items():
+            for value in (0, 1):
+                new_state = transition(state, i, value)
+                if new_state is None:
+                    continue
+                _add_shifted(layer.setdefault(new_state, []), poly, value)
+                moves.append((state, value, new_state))
+        forward.append(layer)
+        transitions.append(moves)
+
+    # Passe arrière: nombre de façons de terminer depuis chaque état
+    backward = [None] * (n + 1)
+    backward[n] = {(): [1]} if () in forward[n] else {}
+    for i in range(n - 1, -1, -1):
+        layer = {}
+        for state, value, new_state in transitions[i]:
+            poly = backward[i + 1].get(new_state)
+            if poly is not None:
+                _add_shifted(layer.setdefault(state, []), poly, value)
+        backward[i] = layer
+
+    total = backward[0].get((), [])
+    mines = {}
+    for i, v in enumerate(order):
+        poly = []
+        for state, value, new_state in transitions[i]:
+            if value and new_state in backward[i + 1]:
+                _add_shifted(poly, _multiply(forward[i][state], backward[i + 1][new_state]), 1)
+        mines[v] = poly
+    return total, mines
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    """
+    Quotient de deux entiers, qui ne vaut exactement 0 ou 1 que si la case est
+    certainement sûre ou certainement une mine (pas par arrondi).
+    """
+    ratio = numerator / denominator
+    if ratio == 1.0 and numerator != denominator:
+        return nextafter(1.0, 0.0)
+    if ratio == 0.0 and numerator != 0:
+        return nextafter(0.0, 1.0)
+    return ratio
+
+
+def combine_components(counted, interior: int, mines_left: int) -> Optional[Tuple[Dict, float]]:
+    """
+    Combine des composantes comptées avec le nombre total de mines.
+
+    Args:
+        counted: Liste de (variables, total, mines) telle que renvoyée par count_component
+        interior: Nombre de cases inconnues hors frontière
+        mines_left: Nombre de mines restant à placer (frontière et intérieur)
+
+    Returns:
+        tuple: ({variable: probabilité}, probabilité d'une case intérieure),
+        ou None si aucune configuration n'est possible.
+    """
+    if any(not total for _, total, _ in counted):
+        return None
+
+    def interior_weight(k):
+        """Nombre de façons de placer les mines restantes à l'intérieur."""
+        rest = mines_left - k
+        return comb(interior, rest) if 0 <= rest <= interior else 0
+
+    # Produits des totaux des composantes: préfixes et suffixes, pour obtenir
+    # le polynôme de toutes les autres composantes sans tout recalculer
+    prefix = [[1]]
+    for _, total, _ in counted:
+        prefix.append(_multiply(prefix[-1], total))
+    suffix = [[1]]
+    for _, total, _ in reversed(counted):
+        suffix.append(_multiply(suffix[-1], total))
+    suffix.reverse()
+
+    frontier_total = prefix[-1]
+    weights = [count * interior_weight(k) for k, count in enumerate(frontier_total)]
+    norm = sum(weights)
+    if norm == 0:
+        return None
+
+    probabilities = {}
+    for c, (variables, total, mines) in enumerate(counted):
+        others = _multiply(prefix[c], suffix[c + 1])
+        # Poids de la composante quand elle contient k mines
+        component_weight = [
+            sum(count * interior_weight(k + j) for j, count in enumerate(others))
+            for k in range(len(total))
+        ]
+        for v in variables:
+            weight = sum(count * component_weight[k] for k, count in enumerate(mines[v]))
+            probabilities[v] = _ratio(weight, norm)
+
+    if interior:
+        interior_mines = sum(w * (mines_left - k) for k, w in enumerate(weights))
+        interior_probability = _ratio(interior_mines, norm * interior)
+    else:
+        interior_probability = 0.0
+    return probabilities, interior_probability
+
+
+def mine_probabilities(num_vars: int, constraints: Sequence[Constraint],
+                       interior: int, mines_left: int) -> Optional[Tuple[List[float], float]]:
+    """
+    Probabilités exactes qu'une variable de la frontière soit une mine, toutes
+    les configurations compatibles avec les contraintes et le nombre total de
+    mines étant équiprobables.
+
+    Args:
+        num_vars: Nombre de variables de la frontière
+        constraints: Contraintes (variables, somme) sur la frontière
+        interior: Nombre de cases inconnues hors frontière
+        mines_left: Nombre de mines restant à placer (frontière et intérieur)
+
+    Returns:
+        tuple: (probabilités de chaque variable, probabilité d'une case
+        intérieure), ou None si aucune configuration n'est possible.
+    """
+    counted = []
+    for variables, indices in split_components(num_vars, constraints):
+        total, mines = count_component(variables, [constraints[j] for j in indices])
+        counted.append((variables, total, mines))
+    result = combine_components(counted, interior, mines_left)
+    if result is None:
+        return None
+    probabilities, interior_probability = result
+    return [probabilities[v] for v in range(num_vars)], interior_probability
+
+
+class FrontierState:
+    """
+    État persistant de la frontière d'une partie, mis à jour à partir des
+    modifications signalées par Minesweeper (cases révélées, drapeaux).
+
+    Chaque chiffre révélé garde ses voisins inconnus (sans drapeau) et le
+    nombre de mines qu'il leur reste à placer. Une modification ne touche que
+    les chiffres voisins de la case concernée; seules les composantes contenant
+    ces cases sont reconstruites et recomptées, les comptes des autres
+    composantes restant en cache.
+
+    Si la partie est modifiée sans passer par reveal/toggle_flag (grille
+    remplacée, ensembles modifiés directement), l'état est reconstruit.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.version = 0  # Incrémenté à chaque modification
+        game.add_listener(self.on_change)
+        self.rebuild()
+
+    def rebuild(self):
+        """Reconstruit tout l'état à partir de la grille visible."""
+        game = self.game
+        self.board = game.board
+        self.revealed_count = len(game.revealed_cells)
+        self.flag_count = len(game.flagged_cells)
+        # Cases non révélées (drapeaux compris)
+        self.unknown: Set[Tuple[int, int]] = {
+            (r, c) for r in range(game.height) for c in range(game.width)
+            if (r, c) not in game.revealed_cells
+        }
+        # Chiffre -> [voisins inconnus sans drapeau, mines restantes]
+        self.numbers: Dict[Tuple[int, int], list] = {}
+        # Case inconnue -> chiffres qui la contraignent
+        self.cell_numbers: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+        # Chiffres ayant des voisins inconnus sans drapeau
+        self.active_numbers: Set[Tuple[int, int]] = set()
+        # Chiffres impossibles à satisfaire
+        self.violated: Set[Tuple[int, int]] = set()
+        # Composantes: identifiant -> [cases, chiffres, comptage ou None]
+        self.components: Dict[int, list] = {}
+        self.cell_component: Dict[Tuple[int, int], int] = {}
+        self.next_component = 0
+        self.dirty_cells: Set[Tuple[int, int]] = set()
+        self.dirty_components: Set[int] = set()
+        self.cached = None
+        for cell in game.revealed_cells:
+            self._add_number(cell)
+        self.version += 1
+
+    def _in_sync(self) -> bool:
+        game = self.game
+        return (game.board is self.board and len(game.revealed_cells) == self.revealed_count
+                and len(game.flagged_cells) == self.flag_count)
+
+    def _touch(self, cell):
+        """Marque une case inconnue dont les contraintes ont changé."""
+        self.dirty_cells.add(cell)
+        component = self.cell_component.get(cell)
+        if component is not None:
+            self.dirty_components.add(component)
+
+    def _check(self, number):
+        unknown, remaining = self.numbers[number]
+        if unknown:
+            self.active_numbers.add(number)
+        else:
+            self.active_numbers.discard(number)
+        if remaining < 0 or remaining > len(unknown):
+            self.violated.add(number)
+        else:
+            self.violated.discard(number)
+
+    def _add_number(self, cell):
+        """Ajoute la contrainte d'une case révélée."""
+        row, col = cell
+        value = self.board[row, col]
+        if value < 0:
+            return
+        unknown = set()
+        remaining = int(value)
+        for neighbor in self.game.get_adjacent_cells(row, col):
+            if neighbor in self.unknown:
+                if self.board[neighbor] == Minesweeper.FLAG:
+                    remaining -= 1
+                else:
+                    unknown.add(neighbor)
+                    self.cell_numbers.setdefault(neighbor, set()).add(cell)
+                    self._touch(neighbor)
+        self.numbers[cell] = [unknown, remaining]
+        self._check(cell)
+
+    def _detach(self, cell, flagged):
+        """Retire une case des contraintes de ses chiffres voisins (révélée ou marquée)."""
+        self._touch(cell)
+        for number in self.cell_numbers.pop(cell, ()):
+            entry = self.numbers[number]
+            entry[0].discard(cell)
+            if flagged:
+                entry[1] -= 1
+            for other in entry[0]:
+                self._touch(other)
+            self._check(number)
+
+    def on_change(self, kind, row, col):
+        """Reçoit une modification de la partie (voir Minesweeper.add_listener)."""
+        cell = (row, col)
+        self.version += 1
+        self.cached = None
+        if kind == 'reveal':
+            self.revealed_count += 1
+            self._detach(cell, flagged=False)
+            self.unknown.discard(cell)
+            self._add_number(cell)
+        elif kind == 'flag':
+            self.flag_count += 1
+            self._detach(cell, flagged=True)
+        elif kind == 'unflag':
+            self.flag_count -= 1
+            self._touch(cell)
+            for neighbor in self.game.get_adjacent_cells(row, col):
+                entry = self.numbers.get(neighbor)
+                if entry is not None:
+                    entry[0].add(cell)
+                    entry[1] += 1
+                    self.cell_numbers.setdefault(cell, set()).add(neighbor)
+                    for other in entry[0]:
+                        self._touch(other)
+                    self._check(neighbor)
+
+    def _refresh_components(self):
+        """Reconstruit les composantes touchées par les dernières modifications."""
+        seeds = set(self.dirty_cells)
+        for component in self.dirty_components:
+            cells, _, _ = self.components.pop(component)
+            seeds.update(cells)
+            for cell in cells:
+                if self.cell_component.get(cell) == component:
+                    del self.cell_component[cell]
+        self.dirty_cells.clear()
+        self.dirty_components.clear()
+
+        for seed in seeds:
+            if seed in self.cell_component or not self.cell_numbers.get(seed):
+                continue
+            # Parcours en largeur case -> chiffres -> cases
+            component = self.next_component
+            self.next_component += 1
+            cells, numbers = [seed], set()
+            self.cell_component[seed] = component
+            for cell in cells:
+                for number in self.cell_numbers[cell]:
+                    if number in numbers:
+                        continue
+                    numbers.add(number)
+                    for other in self.numbers[number][0]:
+                        old = self.cell_component.get(other)
+                        if old == component:
+                            continue
+                        if old is not None:
+                            # Fusion avec une composante existante: elle est absorbée
+                            for absorbed in self.components.pop(old)[0]:
+                                self.cell_component.pop(absorbed, None)
+                        self.cell_component[other] = component
+                        cells.append(other)
+            self.components[component] = [cells, numbers, None]
+
+    def probabilities(self) -> Optional[Tuple[Dict[Tuple[int, int], float], float]]:
+        """
+        Probabilités exactes des cases de la frontière et d'une case intérieure.
+
+        Returns:
+            tuple: ({case frontière: probabilité}, probabilité d'une case
+            intérieure), ou None si la grille est incohérente.
+        """
+        if not self._in_sync():
+            self.rebuild()
+        if self.cached is not None:
+            return self.cached
+        if self.violated:
+            return None
+        self._refresh_components()
+
+        counted = []
+        frontier_size = 0
+        for entry in self.components.values():
+            cells, numbers, count = entry
+            if count is None:
+                constraints = [(tuple(self.numbers[n][0]), self.numbers[n][1])
+                               for n in numbers if self.numbers[n][0]]
+                count = entry[2] = count_component(cells, constraints)
+            counted.append((cells, count[0], count[1]))
+            frontier_size += len(cells)
+
+        interior = len(self.unknown) - self.flag_count - frontier_size
+        mines_left = self.game.num_mines - self.flag_count
+        self.cached = combine_components(counted, interior, mines_left)
+        return self.cached
+
+    def interior_cells(self) -> List[Tuple[int, int]]:
+        """Cases inconnues sans drapeau hors de la frontière."""
+        return [cell for cell in self.unknown
+                if cell not in self.cell_numbers and self.board[cell] == Minesweeper.UNKNOWN]
@@ -0,0 +1,189 @@
+"""
+Inférence déterministe sur les contraintes de la frontière.
+
+Avant de compter les configurations de la frontière, la plupart des positions
+se résolvent par un raisonnement linéaire simple sur les chiffres:
+
+- règles triviales: une contrainte de somme 0 rend ses cases sûres, une
+  contrainte dont la somme vaut le nombre de cases les rend toutes minées;
+- inclusion: si A ⊂ B, les cases de B - A contiennent exactement
+  somme(B) - somme(A) mines;
+- paires qui se chevauchent: le nombre de mines de A ∩ B est borné par les
+  deux contraintes; quand les bornes se rejoignent, A ∩ B devient une
+  contrainte (ce qui contient la règle de différence: si
+  somme(A) - somme(B) = |A - B|, A - B est minée et B - A est sûre);
+- nombre total de mines: des contraintes disjointes imposent un minimum de
+  mines sur la frontière; s'il égale les mines restantes, toutes les autres
+  cases (intérieur compris) sont sûres, et inversement.
+
+Les règles sont appliquées jusqu'à un point fixe. Les contraintes sont
+représentées par des masques de bits (entiers) sur les indices des
+variables, ce qui rend les tests d'inclusion et d'intersection immédiats.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Constraint = Tuple[Tuple[int, ...], int]
+
+# Nombre maximal de contraintes dérivées par appel, pour borner le coût
+MAX_DERIVED = 2000
+
+
+def _mask(variables) -> int:
+    mask = 0
+    for v in variables:
+        mask |= 1 << v
+    return mask
+
+
+def _indices(mask: int) -> List[int]:
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+
+class Contradiction(Exception):
+    """Les contraintes n'admettent aucune solution."""
+
+
+class _Reducer:
+    """Ensemble de contraintes (masque -> somme) et variables déjà fixées."""
+
+    def __init__(self, num_vars: int):
+        self.num_vars = num_vars
+        self.constraints: Dict[int, int] = {}
+        self.mines = 0
+        self.safe = 0
+        self.derived = 0
+
+    def add(self, mask: int, total: int) -> bool:
+        """Ajoute une contrainte réduite aux variables libres. Retourne True si elle est nouvelle."""
+        known = self.mines | self.safe
+        total -= bin(mask & self.mines).count("1")
+        mask &= ~known
+        size = bin(mask).count("1")
+        if total < 0 or total > size:
+            raise Contradiction()
+        if not mask:
+            return False
+        if total == 0:
+            self.safe |= mask
+            return True
+        if total == size:
+            self.mines |= mask
+            return True
+        old = self.constraints.get(mask)
+        if old is not None:
+            if old != total:
+                raise Contradiction()
+            return False
+        self.constraints[mask] = total
+        return True
+
+    def normalize(self):
+        """Retire les variables fixées de toutes les contraintes, jusqu'à stabilité."""
+        while True:
+            known = self.mines | self.safe
+            stale = [mask for mask in self.constraints if mask & known]
+            if not stale:
+                return
+            for mask in stale:
+                total = self.constraints.pop(mask)
+                self.add(mask, total)
+
+    def pair_pass(self) -> bool:
+        """Applique les règles d'inclusion et de chevauchement à toutes les paires."""
+        changed = False
+        items = list(self.constraints.items())
+        for i, (a, sum_a) in enumerate(items):
+            for b, sum_b in items[i + 1:]:
+                common = a & b
+                if not common:
+                    continue
+                if self.derived >= MAX_DERIVED:
+                    return changed
+                only_a, only_b = a & ~b, b & ~a
+                if not only_a:
+                    new = [(only_b, sum_b - sum_a)]
+                elif not only_b:
+                    new = [(only_a, sum_a - sum_b)]
+                else:
+                    # Bornes sur le nombre de mines de A ∩ B
+                    low = max(sum_a - bin(only_a).count("1"), sum_b - bin(only_b).count("1"), 0)
+                    high = min(sum_a, sum_b, bin(common).count("1"))
+                    if low > high:
+                        raise Contradiction()
+                    if low != high:
+                        continue
+                    new = [(common, low), (only_a, sum_a - low), (only_b, sum_b - low)]
+                for mask, total in new:
+                    if self.add(mask, total):
+                        self.derived += 1
+                        changed = True
+        return changed
+
+    def global_pass(self, mines_left: int, interior: int) -> Optional[int]:
+        """
+        Règle du nombre total de mines avec un ensemble glouton de contraintes
+        disjointes. Retourne la valeur des cases intérieures (0 ou 1) si elle
+        est déterminée, None sinon.
+        """
+        remaining = mines_left - bin(self.mines).count("1")
+        covered, minimum = 0, 0
+        for mask, total in sorted(self.constraints.items(), key=lambda item: (-item[1], item[0].bit_length())):
+            if not mask & covered:
+                covered |= mask
+                minimum += total
+        free = ((1 << self.num_vars) - 1) & ~(covered | self.mines | self.safe)
+        free_count = bin(free).count("1") + interior
+        if remaining < minimum or remaining - minimum > free_count:
+            raise Contradiction()
+        if remaining == minimum:
+            self.safe |= free
+            return 0 if interior else None
+        if remaining - minimum == free_count:
+            self.mines |= free
+            return 1 if interior else None
+        return None
+
+
+def reduce_constraints(num_vars: int, constraints: Sequence[Constraint],
+                       mines_left: Optional[int] = None,
+                       interior: int = 0) -> Optional[Tuple[Dict[int, int], Optional[int]]]:
+    """
+    Déduit les variables dont la valeur est forcée par les contraintes.
+
+    Args:
+        num_vars: Nombre de variables de la frontière
+        constraints: Contraintes (variables, somme) sur la frontière
+        mines_left: Nombre de mines restant à placer (frontière et intérieur),
+            ou None pour ignorer la contrainte globale
+        interior: Nombre de cases inconnues hors frontière
+
+    Returns:
+        tuple: ({variable: 1 si mine, 0 si sûre}, valeur des cases intérieures
+        ou None si elle n'est pas déterminée), ou None si les contraintes sont
+        incohérentes.
+    """
+    reducer = _Reducer(num_vars)
+    interior_value = None
+    try:
+        for variables, total in constraints:
+            reducer.add(_mask(variables), total)
+        while True:
+            known = reducer.mines | reducer.safe
+            reducer.normalize()
+            changed = reducer.pair_pass()
+            reducer.normalize()
+            if mines_left is not None and interior_value is None:
+                interior_value = reducer.global_pass(mines_left, interior)
+            if not changed and reducer.mines | reducer.safe == known:
+                break
+    except Contradiction:
+        return None
+
+    assignment = {v: 1 for v in _indices(reducer.mines)}
+    assignment.update((v, 0) for v in _indices(reducer.safe))
+    return assignment, interior_value
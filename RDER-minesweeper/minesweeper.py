@@ -1,5 +1,6 @@
 import numpy as np
 import random
+import weakref
 import matplotlib.pyplot as plt
 from typing import Tuple, List, Set, Optional
 
@@ -43,6 +44,9 @@ class Minesweeper:
         
         # Drapeaux placés
         self.flagged_cells = set()
+
+        # Fonctions prévenues de chaque case révélée et de chaque drapeau
+        self._listeners = []
         
     def initialize_mines(self, first_click: Tuple[int, int] = None):
         """
@@ -124,6 +128,7 @@ class Minesweeper:
         adjacent_mines = self.count_adjacent_mines(row, col)
         self.board[row, col] = adjacent_mines
         self.revealed_cells.add((row, col))
+        self._notify('reveal', row, col)
         
         # Si aucune mine adjacente, révéler automatiquement les cases voisines
         if adjacent_mines == 0:
@@ -167,13 +172,54 @@ class Minesweeper:
         if (row, col) in self.flagged_cells:
             self.flagged_cells.remove((row, col))
             self.board[row, col] = self.UNKNOWN
+            self._notify('unflag', row, col)
         else:
             # Placer un drapeau
             self.flagged_cells.add((row, col))
             self.board[row, col] = self.FLAG
+            self._notify('flag', row, col)
         
         return True
-    
+
+    def add_listener(self, callback):
+        """
+        Enregistre une fonction appelée après chaque modification de la grille
+        visible, avec (type, row, col) où type vaut 'reveal', 'flag' ou 'unflag'.
+        Une révélation en cascade produit un appel par case révélée.
+
+        Les méthodes sont référencées faiblement: un solveur qui n'est plus
+        utilisé cesse d'être prévenu.
+
+        Args:
+            callback: Fonction ou méthode à appeler
+        """
+        try:
+            self._listeners.append(weakref.WeakMethod(callback))
+        except TypeError:
+            self._listeners.append(lambda: callback)
+
+    def _notify(self, kind: str, row: int, col: int):
+        """Prévient les fonctions enregistrées d'une modification."""
+        for ref in list(self._listeners):
+            callback = ref()
+            if callback is None:
+                self._listeners.remove(ref)
+            else:
+                callback(kind, row, col)
+
+    def __getstate__(self):
+        """
+        État copié par pickle et copy.deepcopy: les fonctions enregistrées
+        (références faibles) ne sont pas copiées, la copie n'en a aucune.
+        """
+        state = self.__dict__.copy()
+        del state['_listeners']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._listeners = []
+
     def get_visible_board(self) -> np.ndarray:
         """
         Retourne la grille visible par le joueur/solveur.
@@ -1,60 +1,263 @@
 import random
+from math import comb
 import questionary
-from constraint import Problem, ExactSumConstraint
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 
 
 
+def _add_shifted(target, poly, shift):
+    # target += poly * X^shift (polynômes en nombre de mines, target est agrandi si besoin)
+    if len(target) < len(poly) + shift:
+        target.extend([0] * (len(poly) + shift - len(target)))
+    for i, x in enumerate(poly):
+        target[i + shift] += x
+
+
+def _multiply(a, b):
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
 class MinesweeperGrid:
     def __init__(self, grid, rows, cols):
         self.grid = grid
         self.rows = rows
         self.cols = cols
+        # Voisins précalculés une seule fois par case
+        self.neighbors = {
+            (i, j): [
+                (i + di, j + dj)
+                for di in (-1, 0, 1)
+                for dj in (-1, 0, 1)
+                if (di or dj) and 0 <= i + di < rows and 0 <= j + dj < cols
+                and (i + di, j + dj) in grid
+            ]
+            for (i, j) in grid
+        }
 
     def get_neighbors(self, pos):
-        i, j = pos
-        return [
-            (i + di, j + dj)
-            for di in [-1, 0, 1]
-            for dj in [-1, 0, 1]
-            if not (di == 0 and dj == 0) and (i + di, j + dj) in self.grid
-        ]
+        return self.neighbors[pos]
 
-    def apply_solution(self, solution):
-        return {pos: (solution[pos] if self.grid[pos] == "?" else self.grid[pos])
-                for pos in self.grid}
+
+class SolverResult:
+    def __init__(self, solution_count, probabilities, safe, mines):
+        # Nombre de solutions de la frontière (ou du plateau si le nombre de mines est connu)
+        self.solution_count = solution_count
+        # Probabilité d'être une mine de chaque case inconnue (None si non contrainte)
+        self.probabilities = probabilities
+        self.safe = safe
+        self.mines = mines
 
 
 class MinesweeperSolver:
-    def __init__(self, minesweeper_grid):
+    def __init__(self, minesweeper_grid, total_mines=None):
         self.grid_obj = minesweeper_grid
-        self.problem = Problem()
+        self.total_mines = total_mines
+        self.components = []
 
     def setup_problem(self):
+        # Seules les cases inconnues voisines d'un chiffre sont des variables;
+        # elles sont regroupées en composantes indépendantes
         grid = self.grid_obj.grid
-        unknown = [pos for pos, val in grid.items() if val == "?"]
-        for pos in unknown:
-            self.problem.addVariable(pos, [0, 1])
+        constraints = []
         for pos, val in grid.items():
             if val != "?":
                 neighbors = [n for n in self.grid_obj.get_neighbors(
                     pos) if grid[n] == "?"]
                 if neighbors:
-                    self.problem.addConstraint(
-                        ExactSumConstraint(val), neighbors)
+                    constraints.append((neighbors, val))
+
+        parent = {}
+
+        def find(pos):
+            while parent[pos] != pos:
+                parent[pos] = parent[parent[pos]]
+                pos = parent[pos]
+            return pos
+
+        for neighbors, _ in constraints:
+            for pos in neighbors:
+                parent.setdefault(pos, pos)
+            root = find(neighbors[0])
+            for pos in neighbors[1:]:
+                parent[find(pos)] = root
+
+        groups = {}
+        for neighbors, val in constraints:
+            groups.setdefault(find(neighbors[0]), []).append((neighbors, val))
+        self.components = []
+        for component_constraints in groups.values():
+            variables = sorted({pos for neighbors, _ in component_constraints
+                                for pos in neighbors})
+            self.components.append((variables, component_constraints))
+
+    def count_component(self, variables, constraints):
+        # Pour chaque nombre de mines k: nombre de solutions et, par case,
+        # nombre de solutions où elle est minée.
+        # Les solutions ne sont pas énumérées: programmation dynamique sur les
+        # cases prises dans l'ordre d'un parcours en largeur; l'état est ce
+        # qu'il reste à placer dans chaque contrainte entamée et non terminée.
+        cell_constraints = {}
+        for c, (cells, _) in enumerate(constraints):
+            for pos in cells:
+                cell_constraints.setdefault(pos, []).append(c)
+        order, seen = [variables[0]], {variables[0]}
+        for pos in order:
+            for c in cell_constraints[pos]:
+                for other in constraints[c][0]:
+                    if other not in seen:
+                        seen.add(other)
+                        order.append(other)
+
+        index = {pos: i for i, pos in enumerate(order)}
+        last = [max(index[pos] for pos in cells) for cells, _ in constraints]
+        n = len(order)
+        # Pour chaque case: ses contraintes et leur nombre de cases restant après elle
+        touches = [[(c, sum(1 for other in constraints[c][0] if index[other] > i))
+                    for c in cell_constraints[pos]]
+                   for i, pos in enumerate(order)]
+        # Contraintes ouvertes avant la case i
+        open_at = [()]
+        opened = set()
+        for i in range(n):
+            opened.update(c for c, _ in touches[i])
+            opened.difference_update(c for c, _ in touches[i] if last[c] == i)
+            open_at.append(tuple(sorted(opened)))
+
+        def transition(i, state, value):
+            # Etat après avoir donné value à la case i, None si une contrainte est violée
+            residual = dict(zip(open_at[i], state))
+            for c, left in touches[i]:
+                need = residual.get(c, constraints[c][1]) - value
+                if need < 0 or need > left:
+                    return None
+                residual[c] = need
+            return tuple(residual[c] for c in open_at[i + 1])
+
+        # Etats atteignables de chaque couche, avec leurs successeurs pour 0 et 1
+        layers = [{(): None}]
+        for i in range(n):
+            successors = layers[i]
+            next_layer = {}
+            for state in successors:
+                successors[state] = (transition(i, state, 0), transition(i, state, 1))
+                for new_state in successors[state]:
+                    if new_state is not None:
+                        next_layer[new_state] = None
+            layers.append(next_layer)
+
+        # Passe arrière: nombre de façons de compléter depuis chaque état, par nombre de mines
+        backward = [None] * (n + 1)
+        backward[n] = {state: [1] for state in layers[n]}
+        for i in range(n - 1, -1, -1):
+            after = backward[i + 1]
+            counts = {}
+            for state, (zero, one) in layers[i].items():
+                poly = []
+                if zero is not None:
+                    _add_shifted(poly, after[zero], 0)
+                if one is not None:
+                    _add_shifted(poly, after[one], 1)
+                counts[state] = poly
+            backward[i] = counts
+        total = backward[0][()]
+
+        # Passe avant: façons d'atteindre chaque état, d'où les mines par case
+        mines = {}
+        forward = {(): [1]}
+        for i in range(n):
+            cell_mines = []
+            next_forward = {}
+            after = backward[i + 1]
+            for state, ways in forward.items():
+                for value, new_state in enumerate(layers[i][state]):
+                    if new_state is None or not any(after[new_state]):
+                        continue
+                    if value:
+                        _add_shifted(cell_mines, _multiply(ways, after[new_state]), 1)
+                    _add_shifted(next_forward.setdefault(new_state, []), ways, value)
+            mines[order[i]] = cell_mines
+            forward = next_forward
+
+        return {k: [n_k, {pos: (mines[pos][k] if k < len(mines[pos]) else 0)
+                          for pos in variables}]
+                for k, n_k in enumerate(total) if n_k}
 
     def solve(self):
         self.setup_problem()
-        return self.problem.getSolutions()
+        grid = self.grid_obj.grid
+        frontier = {pos for variables, _ in self.components for pos in variables}
+        interior = [pos for pos, val in grid.items()
+                    if val == "?" and pos not in frontier]
+        counted = [(variables, self.count_component(variables, constraints))
+                   for variables, constraints in self.components]
+
+        def weight(mines):
+            # Nombre de façons de placer les mines restantes hors de la frontière
+            if self.total_mines is None:
+                return 1
+            left = self.total_mines - mines
+            return comb(len(interior), left) if 0 <= left <= len(interior) else 0
+
+        def convolve(distributions):
+            result = {0: 1}
+            for distribution in distributions:
+                merged = {}
+                for a, x in result.items():
+                    for b, (y, _) in distribution.items():
+                        merged[a + b] = merged.get(a + b, 0) + x * y
+                result = merged
+            return result
+
+        all_counts = [counts for _, counts in counted]
+        frontier_counts = convolve(all_counts)
+        solution_count = sum(n * weight(k) for k, n in frontier_counts.items())
+        if solution_count == 0:
+            return SolverResult(0, {}, [], [])
+
+        # Numérateurs entiers: une case est sûre (ou minée) seulement si son
+        # numérateur vaut exactement 0 (ou le dénominateur)
+        probabilities = {}
+        safe, mine_cells = [], []
+        for index, (variables, counts) in enumerate(counted):
+            others = convolve(all_counts[:index] + all_counts[index + 1:])
+            mine_weight = dict.fromkeys(variables, 0)
+            for k, (_, mines) in counts.items():
+                rest = sum(n * weight(k + j) for j, n in others.items())
+                for pos in variables:
+                    mine_weight[pos] += mines[pos] * rest
+            for pos in variables:
+                probabilities[pos] = mine_weight[pos] / solution_count
+                if mine_weight[pos] == 0:
+                    safe.append(pos)
+                elif mine_weight[pos] == solution_count:
+                    mine_cells.append(pos)
+        if interior and self.total_mines is not None:
+            expected = sum(n * weight(k) * (self.total_mines - k)
+                           for k, n in frontier_counts.items())
+            interior_probability = expected / (solution_count * len(interior))
+            if expected == 0:
+                safe.extend(interior)
+            elif expected == solution_count * len(interior):
+                mine_cells.extend(interior)
+        else:
+            interior_probability = None
+        for pos in interior:
+            probabilities[pos] = interior_probability
+
+        return SolverResult(solution_count, probabilities, sorted(safe), sorted(mine_cells))
 
 
 class PrettyPrinter:
     @staticmethod
-    def print_grid(result_grid, original_grid, rows, cols, title="Solution"):
+    def print_probabilities(result, original_grid, rows, cols, title="Analyse CSP"):
         console = Console()
-        #console.clear()
         table = Table(title=title, show_lines=True)
         table.add_column("Row", style="bold magenta", justify="center")
         for j in range(cols):
@@ -63,12 +266,18 @@ class PrettyPrinter:
             row = [str(i)]
             for j in range(cols):
                 pos = (i, j)
-                val = result_grid.get(pos, " ")
                 orig = original_grid.get(pos, " ")
-                if orig == "?":
-                    cell_text = "[bold red]1[/bold red]" if val == 1 else "[green]0[/green]"
-                else:
+                proba = result.probabilities.get(pos)
+                if orig != "?":
                     cell_text = f"[blue]{orig}[/blue]"
+                elif proba is None:
+                    cell_text = "[grey]?[/grey]"
+                elif proba == 1:
+                    cell_text = "[bold red]M[/bold red]"
+                elif proba == 0:
+                    cell_text = "[green]S[/green]"
+                else:
+                    cell_text = f"[yellow]{round(100 * proba)}%[/yellow]"
                 row.append(cell_text)
             table.add_row(*row)
         console.print(Panel(table, title=title, expand=False))
@@ -174,9 +383,9 @@ class MinesweeperGame:
     def solve_with_csp(self):
         csp_grid = self.build_csp_grid()
         mgrid = MinesweeperGrid(csp_grid, self.rows, self.cols)
-        solver = MinesweeperSolver(mgrid)
-        solutions = solver.solve()
-        return mgrid, solutions
+        solver = MinesweeperSolver(mgrid, self.mine_count)
+        result = solver.solve()
+        return mgrid, result
 
     def play(self):
         console = Console()
@@ -214,12 +423,10 @@ class MinesweeperGame:
             elif action == "Poser/décrocher un drapeau":
                 self.toggle_flag(pos)
             elif action == "Utiliser le solveur (CSP)":
-                mgrid, solutions = self.solve_with_csp()
-                if solutions:
-                    solution = solutions[0]
-                    result_grid = mgrid.apply_solution(solution)
-                    PrettyPrinter.print_grid(
-                        result_grid, mgrid.grid, self.rows, self.cols, title="Solution CSP")
+                mgrid, result = self.solve_with_csp()
+                if result.solution_count:
+                    PrettyPrinter.print_probabilities(
+                        result, mgrid.grid, self.rows, self.cols, title="Solution CSP")
                     questionary.text(
                         "Appuyez sur Entrée pour continuer...").ask()
                 else:
@@ -24,14 +24,10 @@ def main():
         }
         mgrid = MinesweeperGrid(grid_6x6, 6, 6)
         solver = MinesweeperSolver(mgrid)
-        solutions = solver.solve()
+        result = solver.solve()
         console.clear()
-        console.print(f"\nNombre de solutions: [bold yellow]{len(solutions)}[/bold yellow]\n")
-        for num, solution in enumerate(solutions, start=1):
-            console.print(f"Solution {num}:", style="underline bold")
-            result_grid = mgrid.apply_solution(solution)
-            PrettyPrinter.print_grid(result_grid, mgrid.grid, 6, 6)
-            console.print("-" * 40)
+        console.print(f"\nNombre de solutions: [bold yellow]{result.solution_count}[/bold yellow]\n")
+        PrettyPrinter.print_probabilities(result, mgrid.grid, 6, 6)
         questionary.text("Appuyez sur Entrée pour quitter...").ask()
     elif choice == "Jouer à Minesweeper":
         rows = int(questionary.text("Nombre de lignes :", default="9").ask())
@@ -149,10 +149,7 @@ if __name__ == "__main__":
         # Pour une grille carrée, on passe 'size' pour les lignes et colonnes
         mgrid = MinesweeperGrid(grid, size, size)
         solver = MinesweeperSolver(mgrid)
-        solutions = solver.solve()
-        console.print(f"Nombre de solutions: [bold yellow]{len(solutions)}[/bold yellow]")
-        for num, solution in enumerate(solutions, start=1):
-            console.print(f"\nSolution {num}:", style="underline bold")
-            result_grid = mgrid.apply_solution(solution)
-            PrettyPrinter.print_grid(result_grid, mgrid.grid, mgrid.rows, mgrid.cols)
-            console.print("-" * 40)
+        result = solver.solve()
+        console.print(f"Nombre de solutions: [bold yellow]{result.solution_count}[/bold yellow]")
+        PrettyPrinter.print_probabilities(result, mgrid.grid, mgrid.rows, mgrid.cols)
+        console.print("-" * 40)
@@ -14,9 +14,173 @@ from instances.instance_small import small_instance
 from instances.instance_large import large_instance
 from visualization import visualize_advanced_schedule, print_solution
 
+def check_setup_triangle(jobs_data, machine, operations, setup_times):
+    """
+    Vérifie l'inégalité triangulaire des temps de préparation d'une machine.
+    
+    Le circuit ne contraint que les opérations consécutives: il n'est équivalent
+    au modèle par paires que si passer par une opération intermédiaire b ne
+    raccourcit jamais l'écart imposé entre a et c, c'est-à-dire si
+    setup(a, c) <= setup(a, b) + durée(b) + setup(b, c).
+    
+    Args:
+        jobs_data: Liste de jobs (voir solve_advanced_jobshop).
+        machine: Identifiant de la machine.
+        operations: Liste des opérations (job_id, op_id) de la machine.
+        setup_times: setup_times[prev_job_id][next_job_id][machine_id] = setup_time.
+    
+    Raises:
+        ValueError: Si l'inégalité est violée pour un triplet d'opérations.
+    """
+    jobs = [job_id for job_id, _ in operations]
+    durations = [jobs_data[job_id][op_id][1] for job_id, op_id in operations]
+    setup = [[setup_times.get(a, {}).get(c, {}).get(machine, 0) if a != c else 0 for c in jobs]
+             for a in jobs]
+    for b in range(len(jobs)):
+        through_b = durations[b]
+        for a in range(len(jobs)):
+            if a == b:
+                continue
+            via = setup[a][b] + through_b
+            for c in range(len(jobs)):
+                if c != a and c != b and setup[a][c] > via + setup[b][c]:
+                    raise ValueError(
+                        f"Temps de préparation non triangulaires sur la machine {machine}: "
+                        f"setup(job{jobs[a]}, job{jobs[c]}) = {setup[a][c]} > "
+                        f"setup(job{jobs[a]}, job{jobs[b]}) + {through_b} + "
+                        f"setup(job{jobs[b]}, job{jobs[c]}); utiliser setup_model='pairwise'")
+
+def dispatch_schedule(jobs_data, setup_times, maintenance_periods=None, due_dates=None,
+                      resource_capacity=float('inf'), resource_usage=None):
+    """
+    Construit un ordonnancement réalisable par une règle de dispatch gloutonne.
+    
+    À chaque étape, parmi les prochaines opérations de chaque job, celle qui peut
+    commencer le plus tôt est placée (à égalité: date d'échéance la plus proche,
+    puis plus grand travail restant). Le début respecte l'ordre du job, les
+    maintenances, la capacité de ressource et le temps de préparation depuis
+    chacune des opérations déjà placées sur la machine: la solution est donc
+    réalisable pour les deux formulations des temps de préparation (voir
+    solve_advanced_jobshop), dont elle est la solution initiale (AddHint).
+    
+    Args:
+        jobs_data: Liste de jobs (voir solve_advanced_jobshop).
+        setup_times: setup_times[prev_job_id][next_job_id][machine_id] = setup_time.
+        maintenance_periods: Liste de tuples (machine_id, start_time, duration).
+        due_dates: Dictionnaire des dates d'échéance par job.
+        resource_capacity: Capacité de la ressource cumulative.
+        resource_usage: Consommation de ressource par opération (job_id, op_id).
+    
+    Returns:
+        tuple: (schedule, sequences) où schedule[(job_id, op_id)] = (start, end) et
+               sequences[machine] est la liste des opérations de la machine dans
+               l'ordre où elles sont traitées.
+    """
+    maintenance = {}
+    for machine, start, duration in maintenance_periods or []:
+        maintenance.setdefault(machine, []).append((start, start + duration))
+    due_dates = due_dates or {}
+    resource_usage = resource_usage or {}
+    
+    remaining_work = [sum(op[1] for op in job) for job in jobs_data]
+    next_op = [0] * len(jobs_data)
+    job_ready = [0] * len(jobs_data)
+    machine_ops = {}
+    schedule = {}
+    sequences = {}
+    
+    def machine_start(job_id, machine):
+        """Début au plus tôt sur la machine, temps de préparation compris."""
+        start = job_ready[job_id]
+        for prev_job_id, prev_end in machine_ops.get(machine, []):
+            start = max(start, prev_end + setup_times.get(prev_job_id, {}).get(job_id, {}).get(machine, 0))
+        return start
+    
+    def feasible_start(start, machine, duration, usage):
+        """Décale un début au-delà des maintenances et des dépassements de capacité."""
+        while True:
+            moved = False
+            for m_start, m_end in maintenance.get(machine, []):
+                if start < m_end and m_start < start + duration:
+                    start, moved = m_end, True
+            if usage and resource_capacity < float('inf'):
+                overlapping = [(s, e, resource_usage.get(op, 0)) for op, (s, e) in schedule.items()
+                               if s < start + duration and start < e]
+                # La charge maximale est atteinte au début d'une opération
+                peak = max((sum(u for s2, e2, u in overlapping if s2 <= t < e2)
+                            for t in [start] + [s for s, _, _ in overlapping if s > start]),
+                           default=0)
+                if peak + usage > resource_capacity:
+                    start, moved = min(e for _, e, _ in overlapping if e > start), True
+            if not moved:
+                return start
+    
+    num_ops = sum(len(job) for job in jobs_data)
+    while len(schedule) < num_ops:
+        candidates = [job_id for job_id in range(len(jobs_data)) if next_op[job_id] < len(jobs_data[job_id])]
+        job_id = min(candidates, key=lambda j: (machine_start(j, jobs_data[j][next_op[j]][0]),
+                                                due_dates.get(j, 0), -remaining_work[j]))
+        op_id = next_op[job_id]
+        machine, duration = jobs_data[job_id][op_id]
+        start = feasible_start(machine_start(job_id, machine), machine, duration,
+                               resource_usage.get((job_id, op_id), 0))
+        schedule[(job_id, op_id)] = (start, start + duration)
+        sequences.setdefault(machine, []).append((job_id, op_id))
+        next_op[job_id] += 1
+        job_ready[job_id] = start + duration
+        machine_ops.setdefault(machine, []).append((job_id, start + duration))
+        remaining_work[job_id] -= duration
+    return schedule, sequences
+
+def add_setup_circuit(model, machine, operations, task_starts, task_ends, setup_times, sequence=None):
+    """
+    Temps de préparation d'une machine modélisés par un circuit de successeurs.
+    
+    Le noeud 0 est un noeud fictif (début et fin de la séquence), le noeud i + 1
+    est operations[i]. Chaque arc (i, j) a un littéral vrai si j suit directement
+    i sur la machine, qui impose alors début(j) >= fin(i) + setup(i, j). Le
+    circuit impose une séquence unique des opérations: une seule contrainte
+    linéaire par arc au lieu de deux, et une propagation globale par AddCircuit.
+    
+    Args:
+        model: Modèle CP-SAT.
+        machine: Identifiant de la machine.
+        operations: Liste des opérations (job_id, op_id) de la machine.
+        task_starts: Variables de début par opération.
+        task_ends: Variables de fin par opération.
+        setup_times: setup_times[prev_job_id][next_job_id][machine_id] = setup_time.
+        sequence: Ordre des opérations d'une solution connue, dont les arcs sont
+                  donnés en indication (AddHint) au solveur.
+    """
+    hinted_arcs = set()
+    if sequence:
+        nodes = {op: i for i, op in enumerate(operations, start=1)}
+        path = [0] + [nodes[op] for op in sequence] + [0]
+        hinted_arcs = set(zip(path, path[1:]))
+    
+    arcs = []
+    for i, (job_id1, op_id1) in enumerate(operations, start=1):
+        # Première et dernière opération de la machine
+        arcs.append((0, i, model.NewBoolVar(f'first_m{machine}_job{job_id1}_op{op_id1}')))
+        arcs.append((i, 0, model.NewBoolVar(f'last_m{machine}_job{job_id1}_op{op_id1}')))
+        for j, (job_id2, op_id2) in enumerate(operations, start=1):
+            if i == j:
+                continue
+            setup_time = setup_times.get(job_id1, {}).get(job_id2, {}).get(machine, 0)
+            
+            # Vrai si job2 suit directement job1 sur cette machine
+            job2_follows_job1 = model.NewBoolVar(f'job{job_id2}_op{op_id2}_follows_job{job_id1}_op{op_id1}')
+            model.Add(task_starts[(job_id2, op_id2)] >= 
+                      task_ends[(job_id1, op_id1)] + setup_time).OnlyEnforceIf(job2_follows_job1)
+            arcs.append((i, j, job2_follows_job1))
+    if sequence:
+        for i, j, literal in arcs:
+            model.AddHint(literal, (i, j) in hinted_arcs)
+    model.AddCircuit(arcs)
+
 def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None, 
                          setup_times=None, resource_capacity=None, 
-                         resource_usage=None, time_limit=120):
+                         resource_usage=None, time_limit=120, setup_model='pairwise'):
     """
     Résout un problème avancé de Job-Shop Scheduling avec contraintes supplémentaires.
     
@@ -32,6 +196,18 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
         resource_usage: Consommation de ressources par opération.
                       resource_usage[(job_id, op_id)] = resource_amount.
         time_limit: Limite de temps pour la résolution en secondes.
+        setup_model: Formulation des temps de préparation:
+                    - 'pairwise': une variable booléenne par paire ordonnée d'opérations
+                      d'une machine; le temps de préparation s'applique entre toute
+                      opération et toutes celles qui la suivent.
+                    - 'circuit': un circuit (AddCircuit) par machine dont les arcs sont
+                      les successeurs directs; le temps de préparation s'applique entre
+                      deux opérations consécutives. Les temps de préparation doivent
+                      respecter l'inégalité triangulaire (ValueError sinon), les deux
+                      modèles ont alors le même optimum; le modèle par paires reste le
+                      plus rapide (voir compare_setup_models.py).
+                    Avec des temps de préparation, les deux modèles partent d'une
+                    solution gloutonne (dispatch_schedule).
         
     Returns:
         tuple: (instance, all_tasks, makespan, tardiness) où:
@@ -71,6 +247,28 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
                          for job_id in all_jobs 
                          for op_id in range(len(jobs_data[job_id]))}
     
+    # Poids de l'objectif
+    # makespan_weight devrait être beaucoup plus grand que tardiness_weight
+    # pour prioriser la minimisation du makespan
+    makespan_weight = 1
+    tardiness_weight = 1000
+    
+    if setup_model not in ('pairwise', 'circuit'):
+        raise ValueError(f"setup_model inconnu: {setup_model} ('pairwise' ou 'circuit')")
+    schedule_hint = None
+    if setup_times:
+        # Solution initiale gloutonne: sans elle, à partir d'une cinquantaine
+        # d'opérations par machine, le modèle par paires s'arrête sur une
+        # solution médiocre et le circuit n'en trouve aucune dans le temps imparti
+        schedule_hint, sequences = dispatch_schedule(jobs_data, setup_times, maintenance_periods,
+                                                     due_dates, resource_capacity, resource_usage)
+        # L'objectif de cette solution borne le makespan de toute solution meilleure
+        hint_ends = [schedule_hint[(job_id, len(jobs_data[job_id]) - 1)][1] for job_id in all_jobs]
+        hint_objective = (makespan_weight * max(hint_ends) +
+                          tardiness_weight * sum(max(0, end - due_dates[job_id])
+                                                 for job_id, end in zip(all_jobs, hint_ends)))
+        horizon = min(horizon, hint_objective)
+    
     # Création du modèle
     model = cp_model.CpModel()
     
@@ -111,6 +309,12 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
             machine_to_intervals[machine].append(interval_var)
             machine_to_jobs[machine].append(job_id)
 
+    # Solution initiale des opérations
+    if schedule_hint:
+        for op, (start, end) in schedule_hint.items():
+            model.AddHint(task_starts[op], start)
+            model.AddHint(task_ends[op], end)
+    
     # Ajouter les périodes de maintenance
     if maintenance_periods:
         for machine_id, start_time, duration in maintenance_periods:
@@ -147,6 +351,12 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
             if len(jobs_on_machine) <= 1:
                 continue
             
+            if setup_model == 'circuit':
+                check_setup_triangle(jobs_data, machine, jobs_on_machine, setup_times)
+                add_setup_circuit(model, machine, jobs_on_machine, task_starts, task_ends,
+                                  setup_times, sequences.get(machine))
+                continue
+            
             # Pour chaque paire d'opérations sur cette machine
             for i, (job_id1, op_id1) in enumerate(jobs_on_machine):
                 for j, (job_id2, op_id2) in enumerate(jobs_on_machine):
@@ -158,6 +368,9 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
                     
                     # Créer une variable booléenne indiquant si job2 suit job1 (pas nécessairement directement)
                     job2_after_job1 = model.NewBoolVar(f'job{job_id2}_op{op_id2}_after_job{job_id1}_op{op_id1}')
+                    if schedule_hint:
+                        model.AddHint(job2_after_job1, schedule_hint[(job_id1, op_id1)][0] <
+                                      schedule_hint[(job_id2, op_id2)][0])
                     
                     # Si job2_after_job1 est vrai, alors job2 commence après la fin de job1 + temps de setup
                     model.Add(task_starts[(job_id2, op_id2)] >= 
@@ -184,9 +397,9 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
                     resource_intervals.append(interval_var)
                     resource_demands.append(usage)
     
-    # Ajouter une contrainte cumulative sur toutes les opérations
-    if resource_intervals:
-        model.AddCumulative(resource_intervals, resource_demands, resource_capacity)
+        # Ajouter une contrainte cumulative sur toutes les opérations
+        if resource_intervals:
+            model.AddCumulative(resource_intervals, resource_demands, resource_capacity)
     
     # Variables pour les dates d'échéance et retards
     tardiness_vars = []
@@ -199,6 +412,8 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
         tardiness = model.NewIntVar(0, horizon, f'tardiness_job{job_id}')
         model.AddMaxEquality(tardiness, [model.NewConstant(0), job_end - due_date])
         tardiness_vars.append(tardiness)
+        if schedule_hint:
+            model.AddHint(tardiness, max(0, schedule_hint[(job_id, last_op_id)][1] - due_date))
     
     # Objectif: Minimiser le makespan et le retard total
     makespan_var = model.NewIntVar(0, horizon, 'makespan')
@@ -207,12 +422,12 @@ def solve_advanced_jobshop(jobs_data, maintenance_periods=None, due_dates=None,
     
     total_tardiness = model.NewIntVar(0, horizon * num_jobs, 'total_tardiness')
     model.Add(total_tardiness == sum(tardiness_vars))
+    if schedule_hint:
+        model.AddHint(makespan_var, max(hint_ends))
+        model.AddHint(total_tardiness, sum(max(0, end - due_dates[job_id])
+                                           for job_id, end in zip(all_jobs, hint_ends)))
     
     # Objectif à deux critères pondérés
-    # makespan_weight devrait être beaucoup plus grand que tardiness_weight
-    # pour prioriser la minimisation du makespan
-    makespan_weight = 1
-    tardiness_weight = 1000
     model.Minimize(makespan_weight * makespan_var + tardiness_weight * total_tardiness)
     
     # Résolution du modèle
@@ -0,0 +1,137 @@
+"""
+Comparaison des deux formulations des temps de préparation de
+solve_advanced_jobshop ('pairwise' et 'circuit') sur les instances petite,
+moyenne et grande, ainsi que sur une instance de 50 jobs et 5 machines
+(50 opérations par machine).
+
+Les temps de préparation sont tirés entre 1 et 6 à partir d'une position
+aléatoire de chaque job sur chaque machine (setup = 1 + écart des positions):
+ils respectent l'inégalité triangulaire, condition pour que les deux modèles
+aient le même optimum. Tous les tirages utilisent une graine fixe.
+
+Pour chaque résolution, le planning est vérifié (ordre des jobs,
+non-chevauchement et temps de préparation entre opérations consécutives
+d'une machine); quand les deux modèles terminent avant la limite de temps
+(optimum prouvé), leurs objectifs doivent être égaux.
+
+Utilisation:
+    python compare_setup_models.py [limite de temps par résolution, en secondes]
+"""
+
+import random
+import sys
+import time
+
+from advanced_jobshop import solve_advanced_jobshop
+from instances.instance_small import small_instance
+from instances.instance_medium import medium_instance
+from instances.instance_large import large_instance, generate_large_instance
+
+TIME_LIMIT = 40
+SETUP_MODELS = ['pairwise', 'circuit']
+
+
+def get_instances():
+    """Instances comparées: liste de tuples (nom, jobs_data)."""
+    return [
+        ('petite', small_instance()),
+        ('moyenne', medium_instance()),
+        ('grande', large_instance()),
+        ('50x5', generate_large_instance(seed=1, num_jobs=50, num_machines=5)),
+    ]
+
+
+def triangular_setup_times(jobs_data, seed=3):
+    """
+    Temps de préparation entre 1 et 6 respectant l'inégalité triangulaire.
+
+    Returns:
+        dict: setup_times[prev_job_id][next_job_id][machine_id] = setup_time
+    """
+    rng = random.Random(seed)
+    num_jobs = len(jobs_data)
+    num_machines = 1 + max(machine for job in jobs_data for machine, _ in job)
+    position = [[rng.randint(0, 5) for _ in range(num_machines)] for _ in range(num_jobs)]
+    return {
+        job1: {
+            job2: {m: 1 + abs(position[job1][m] - position[job2][m]) for m in range(num_machines)}
+            for job2 in range(num_jobs) if job2 != job1
+        }
+        for job1 in range(num_jobs)
+    }
+
+
+def check_schedule(jobs_data, setup_times, assignments):
+    """
+    Vérifie un planning: ordre des opérations de chaque job, pas de chevauchement
+    et temps de préparation respectés entre opérations consécutives d'une machine.
+
+    Returns:
+        list: Descriptions des violations (vide si le planning est valide).
+    """
+    errors = []
+    for job_id, job in enumerate(jobs_data):
+        for op_id in range(len(job) - 1):
+            if assignments[(job_id, op_id + 1)][0] < assignments[(job_id, op_id)][1]:
+                errors.append(f"job {job_id}: opération {op_id + 1} avant la fin de {op_id}")
+
+    by_machine = {}
+    for (job_id, op_id), (start, end, machine) in assignments.items():
+        by_machine.setdefault(machine, []).append((start, end, job_id))
+    for machine, operations in by_machine.items():
+        operations.sort()
+        for (_, end1, job1), (start2, _, job2) in zip(operations, operations[1:]):
+            setup = setup_times.get(job1, {}).get(job2, {}).get(machine, 0)
+            if start2 < end1 + setup:
+                errors.append(f"machine {machine}: job {job2} commence à {start2}, "
+                              f"avant {end1} + setup {setup} après le job {job1}")
+    return errors
+
+
+def compare(time_limit=TIME_LIMIT):
+    """
+    Résout chaque instance avec les deux formulations et affiche les résultats.
+
+    Returns:
+        bool: True si tous les plannings sont valides et les optimums prouvés égaux.
+    """
+    rows = []
+    ok = True
+    for name, jobs_data in get_instances():
+        setup_times = triangular_setup_times(jobs_data)
+        num_machines = 1 + max(machine for job in jobs_data for machine, _ in job)
+        per_machine = sum(len(job) for job in jobs_data) // num_machines
+        proven = {}
+        for setup_model in SETUP_MODELS:
+            print(f"\n{name} ({len(jobs_data)} jobs, {per_machine} opérations/machine), {setup_model}")
+            start_time = time.time()
+            _, assignments, makespan, tardiness = solve_advanced_jobshop(
+                jobs_data, setup_times=setup_times, time_limit=time_limit, setup_model=setup_model)
+            elapsed = time.time() - start_time
+
+            status = 'aucune solution'
+            if assignments is not None:
+                errors = check_schedule(jobs_data, setup_times, assignments)
+                for error in errors:
+                    print(f"  ERREUR: {error}")
+                ok = ok and not errors
+                status = 'invalide' if errors else 'optimal' if elapsed < time_limit else 'limite de temps'
+                if status == 'optimal':
+                    proven[setup_model] = (makespan, tardiness)
+            else:
+                ok = False
+            rows.append((name, setup_model, makespan, tardiness, elapsed, status))
+
+        if len(proven) == len(SETUP_MODELS) and len(set(proven.values())) > 1:
+            print(f"  ERREUR: optimums différents sur {name}: {proven}")
+            ok = False
+
+    print(f"\n{'Instance':<10}{'Modèle':<10}{'Makespan':>10}{'Retard':>8}{'Temps (s)':>11}  Statut")
+    for name, setup_model, makespan, tardiness, elapsed, status in rows:
+        print(f"{name:<10}{setup_model:<10}{str(makespan):>10}{str(tardiness):>8}{elapsed:>11.1f}  {status}")
+    return ok
+
+
+if __name__ == '__main__':
+    limit = float(sys.argv[1]) if len(sys.argv) > 1 else TIME_LIMIT
+    sys.exit(0 if compare(limit) else 1)
@@ -5,7 +5,7 @@ Cette instance contient 15 jobs et 10 machines.
 
 import random
 
-def generate_large_instance(seed=42):
+def generate_large_instance(seed=42, num_jobs=15, num_machines=10):
     """
     Génère une instance aléatoire de grande taille du problème de Job-Shop.
     
@@ -14,14 +14,14 @@ def generate_large_instance(seed=42):
     
     Args:
         seed: Graine pour le générateur de nombres aléatoires
+        num_jobs: Nombre de jobs (chaque job passe une fois sur chaque machine)
+        num_machines: Nombre de machines
         
     Returns:
         list: Données de l'instance
     """
     random.seed(seed)
     
-    num_jobs = 15
-    num_machines = 10
     min_time = 2
     max_time = 10
     
@@ -1,21 +1,162 @@
+import contextlib
+import csv
+import glob
+import multiprocessing
+import os
 import time
 import random
+import zlib
 import numpy as np
 import matplotlib.pyplot as plt
-from collections import defaultdict
 import pandas as pd
 from backend import MinesweeperBackend
 from tqdm import tqdm
 
+# Columns identifying a trial: a result with the same key is not played again on resume
+TRIAL_KEY = ["board_size", "density", "solver", "trial"]
+RESULT_COLUMNS = TRIAL_KEY + [
+    "seed",
+    "num_mines",
+    "success",
+    "iterations",
+    "explosions",
+    "time",
+]
+
+
+def trial_seed(base_seed, width, height, density, trial):
+    """
+    Deterministic seed of a trial. It doesn't depend on the solver, so every
+    solver plays the same boards.
+    """
+    return (base_seed + zlib.crc32(f"{width}x{height}/{density}/{trial}".encode())) & 0xFFFFFFFF
+
+
+def run_trial(task):
+    """
+    Play one game to completion (run in a worker process).
+
+    Args:
+        task: (width, height, density, solver_type, trial, seed)
+
+    Returns:
+        dict: One result row (see RESULT_COLUMNS)
+    """
+    width, height, density, solver_type, trial, seed = task
+    num_mines = int(width * height * density / 100)
+    random.seed(seed)
+
+    start_time = time.time()
+    # The backend prints on every move
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        game = MinesweeperBackend(width, height, num_mines, solver_type)
+        solve_result = game.solve_game(max_iterations=max(10000, width * height))
+    end_time = time.time()
+
+    return {
+        "board_size": f"{width}x{height}",
+        "density": density,
+        "solver": solver_type,
+        "trial": trial,
+        "seed": seed,
+        "num_mines": num_mines,
+        "success": solve_result["success"],
+        "iterations": solve_result["iterations"],
+        "explosions": solve_result["explosions"],
+        "time": end_time - start_time,
+    }
+
+
+class ResultStore:
+    """
+    Results file written as trials finish, and read back to resume a run.
+
+    - CSV (default): one row appended and flushed per trial.
+    - Parquet (path ending in .parquet, needs pyarrow): the path is a
+      directory of part files; rows are buffered and written as a new part
+      every `parquet_batch` rows and when the store is closed.
+    """
+
+    def __init__(self, path, parquet_batch=256):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self.parquet_batch = parquet_batch
+        self.buffer = []
+        self.file = None
+        self.writer = None
+
+    def load(self):
+        """Return the results already stored (empty DataFrame if none)."""
+        if self.parquet:
+            parts = sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+            if parts:
+                return pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+        elif os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            return pd.read_csv(self.path)
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    def append(self, row):
+        if self.parquet:
+            self.buffer.append(row)
+            if len(self.buffer) >= self.parquet_batch:
+                self.flush()
+            return
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self.file = open(self.path, "a", newline="")
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_COLUMNS)
+            if new_file:
+                self.writer.writeheader()
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def flush(self):
+        if self.parquet and self.buffer:
+            os.makedirs(self.path, exist_ok=True)
+            part = len(glob.glob(os.path.join(self.path, "part-*.parquet")))
+            pd.DataFrame(self.buffer, columns=RESULT_COLUMNS).to_parquet(
+                os.path.join(self.path, f"part-{part:05d}.parquet"), index=False
+            )
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = self.writer = None
+
 
 class MinesweeperBenchmark:
     """Benchmark class for evaluating Minesweeper solvers."""
 
-    def __init__(self, board_sizes=None, mine_densities=None, num_trials=50):
+    def __init__(
+        self,
+        board_sizes=None,
+        mine_densities=None,
+        num_trials=50,
+        solver_types=None,
+        workers=None,
+        results_path="benchmarks/results.csv",
+        seed=0,
+    ):
+        """
+        Args:
+            board_sizes: (width, height) of the boards
+            mine_densities: mine densities in percent
+            num_trials: games per (board size, density, solver)
+            solver_types: solvers to compare (SolverFactory names)
+            workers: number of worker processes (default: number of CPUs)
+            results_path: CSV file, or .parquet directory, where results are
+                streamed; an existing file is resumed
+            seed: base seed of the trial seeds
+        """
         self.board_sizes = board_sizes or [
             (9, 9),
             (16, 16),
             (30, 16),
+            (100, 100),
+            (200, 200),
         ]
         self.mine_densities = mine_densities or [
             10,
@@ -24,56 +165,70 @@ class MinesweeperBenchmark:
             25,
         ]
         self.num_trials = num_trials
-        self.solver_types = ["greedy", "astar", "astar_boost"]  # All three solvers
-        self.results = defaultdict(list)
-
-    def run_benchmark(self):
-        """Run the benchmarking process across all configurations."""
-        self.results = defaultdict(list)
-
-        total_tests = (
-            len(self.board_sizes)
-            * len(self.mine_densities)
-            * len(self.solver_types)
-            * self.num_trials
-        )
-        with tqdm(total=total_tests, desc="Running benchmarks") as pbar:
-            for width, height in self.board_sizes:
-                for density in self.mine_densities:
-                    total_cells = width * height
-                    num_mines = int(total_cells * density / 100)
-
-                    for solver_type in self.solver_types:
-                        for trial in range(self.num_trials):
-                            random.seed(width * height * density * trial)
-
-                            # Create a new game
-                            start_time = time.time()
-                            game = MinesweeperBackend(
-                                width, height, num_mines, solver_type
-                            )
-
-                            # Solve the game
-                            solve_result = game.solve_game(max_iterations=10000)
-                            end_time = time.time()
-
-                            # Record results
-                            self.results["board_size"].append(f"{width}x{height}")
-                            self.results["density"].append(density)
-                            self.results["solver"].append(solver_type)
-                            self.results["num_mines"].append(num_mines)
-                            self.results["success"].append(solve_result["success"])
-                            self.results["iterations"].append(
-                                solve_result["iterations"]
-                            )
-                            self.results["explosions"].append(
-                                solve_result["explosions"]
-                            )
-                            self.results["time"].append(end_time - start_time)
-
-                            pbar.update(1)
-
-        self.df_results = pd.DataFrame(self.results)
+        self.solver_types = solver_types or ["greedy", "astar", "astar_boost", "exact"]
+        self.workers = workers or os.cpu_count() or 1
+        self.results_path = results_path
+        self.seed = seed
+
+    def trials(self):
+        """All trials of the configuration matrix, as run_trial tasks."""
+        return [
+            (width, height, density, solver_type, trial,
+             trial_seed(self.seed, width, height, density, trial))
+            for width, height in self.board_sizes
+            for density in self.mine_densities
+            for solver_type in self.solver_types
+            for trial in range(self.num_trials)
+        ]
+
+    def run_benchmark(self, resume=True):
+        """
+        Run the benchmarking process across all configurations.
+
+        Trials are shared between worker processes, largest boards first, and
+        each result is appended to the results file as soon as it finishes.
+        With resume=True, trials already present in the file are skipped.
+
+        Returns:
+            DataFrame: all results of the configuration matrix
+        """
+        store = ResultStore(self.results_path)
+        if not resume and os.path.exists(self.results_path):
+            raise FileExistsError(f"{self.results_path} already exists")
+        done = store.load()
+        done_keys = set(done[TRIAL_KEY].astype(str).itertuples(index=False, name=None))
+
+        tasks = [
+            task for task in self.trials()
+            if (f"{task[0]}x{task[1]}", str(task[2]), task[3], str(task[4])) not in done_keys
+        ]
+        # Long games first, so that they don't end up alone at the end of the run
+        tasks.sort(key=lambda task: task[0] * task[1], reverse=True)
+        if done_keys:
+            print(f"Resuming: {len(done_keys)} trials already done, {len(tasks)} to run")
+
+        try:
+            with multiprocessing.Pool(self.workers) as pool, tqdm(
+                total=len(tasks), desc="Running benchmarks"
+            ) as pbar:
+                for row in pool.imap_unordered(run_trial, tasks):
+                    store.append(row)
+                    pbar.update(1)
+        finally:
+            store.close()
+
+        results = store.load()
+        configured = {
+            (f"{width}x{height}", density, solver_type)
+            for width, height in self.board_sizes
+            for density in self.mine_densities
+            for solver_type in self.solver_types
+        }
+        keep = [
+            (board, density, solver) in configured and trial < self.num_trials
+            for board, density, solver, trial in results[TRIAL_KEY].itertuples(index=False, name=None)
+        ]
+        self.df_results = results[keep].reset_index(drop=True)
         return self.df_results
 
     def generate_reports(self, output_dir="benchmarks"):
@@ -92,8 +247,8 @@ class MinesweeperBenchmark:
         # Create line plots for explosions and success rate by density
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
 
-        colors = ["#ff9999", "#66b3ff", "#99ff99"]  # Different colors for each solver
-        markers = ["o", "s", "^"]  # Different markers for each solver
+        colors = ["#ff9999", "#66b3ff", "#99ff99", "#ffcc66"]  # Different colors for each solver
+        markers = ["o", "s", "^", "D"]  # Different markers for each solver
 
         for i, solver in enumerate(self.solver_types):
             solver_data = self.df_results[self.df_results["solver"] == solver]
@@ -106,8 +261,8 @@ class MinesweeperBenchmark:
             ax1.plot(
                 explosions.index,
                 explosions.values,
-                marker=markers[i],
-                color=colors[i],
+                marker=markers[i % len(markers)],
+                color=colors[i % len(colors)],
                 linewidth=2,
                 label=f"{solver} Solver",
             )
@@ -117,8 +272,8 @@ class MinesweeperBenchmark:
             ax2.plot(
                 success_rate.index,
                 success_rate.values,
-                marker=markers[i],
-                color=colors[i],
+                marker=markers[i % len(markers)],
+                color=colors[i % len(colors)],
                 linewidth=2,
                 label=f"{solver} Solver",
             )
@@ -153,11 +308,11 @@ class MinesweeperBenchmark:
         solver_types = time_data["solver"].unique()
 
         x = np.arange(len(board_sizes) * len(densities))
-        width = 0.25  # Adjusted for three solvers
+        width = 0.8 / len(solver_types)
 
         fig, ax = plt.subplots(figsize=(16, 8))  # Made wider for more bars
 
-        colors = ["#ff9999", "#66b3ff", "#99ff99"]  # Different colors for each solver
+        colors = ["#ff9999", "#66b3ff", "#99ff99", "#ffcc66"]  # Different colors for each solver
 
         for i, solver in enumerate(solver_types):
             solver_data = time_data[time_data["solver"] == solver]
@@ -193,7 +348,7 @@ class MinesweeperBenchmark:
         labels = [
             f"{board}\n{density}%" for board in board_sizes for density in densities
         ]
-        ax.set_xticks(x + width)  # Adjusted for three bars
+        ax.set_xticks(x + width * (len(solver_types) - 1) / 2)
         ax.set_xticklabels(labels, rotation=45, ha="right")
         ax.legend()
 
@@ -206,10 +361,24 @@ class MinesweeperBenchmark:
 
 
 if __name__ == "__main__":
-    import os
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark of the Minesweeper solvers")
+    parser.add_argument("--trials", type=int, default=30, help="Games per configuration")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: number of CPUs)")
+    parser.add_argument(
+        "--output",
+        default="benchmarks/results.csv",
+        help="Results file (.csv) or directory (.parquet); an existing one is resumed",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Base seed of the trials")
+    args = parser.parse_args()
 
     benchmark = MinesweeperBenchmark(
-        num_trials=30,
+        num_trials=args.trials,
+        workers=args.workers,
+        results_path=args.output,
+        seed=args.seed,
     )
 
     os.makedirs("benchmarks", exist_ok=True)
@@ -217,9 +386,13 @@ if __name__ == "__main__":
     results = benchmark.run_benchmark()
 
     print("Generating reports...")
-    summary = benchmark.generate_reports(output_dir="benchmarks")
+    benchmark.generate_reports(output_dir="benchmarks")
 
     print("\nBenchmark Summary:")
-    print(summary)
+    print(
+        results.groupby(["board_size", "density", "solver"])[
+            ["success", "explosions", "time"]
+        ].mean()
+    )
 
     print("All charts and data have been exported to the 'benchmarks' folder")
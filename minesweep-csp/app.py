@@ -1,6 +1,9 @@
-from flask import Flask, request, jsonify
+import os
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from backend import MinesweeperBackend
+from sessions import GameRegistry
+from simulation import BatchRunner, game_lines, ndjson, parse_spec
 
 app = Flask(__name__)
 CORS(
@@ -16,8 +19,42 @@ CORS(
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
 )
 
-# Store active games
-games = {}
+
+def _env_number(name, default, cast=float):
+    value = os.environ.get(name)
+    return cast(value) if value else default
+
+
+# Store active games: least recently used games are snapshotted out of memory
+# (or dropped if MINESWEEPER_SNAPSHOTS=0) beyond the configured limits
+games = GameRegistry(
+    max_games=_env_number("MINESWEEPER_MAX_GAMES", 1000, int),
+    ttl=_env_number("MINESWEEPER_TTL", 24 * 3600),
+    idle_timeout=_env_number("MINESWEEPER_IDLE_TIMEOUT", 600),
+    max_memory_bytes=(
+        int(_env_number("MINESWEEPER_MEMORY_MB", 0) * 1024 * 1024) or None
+    ),
+    snapshots=os.environ.get("MINESWEEPER_SNAPSHOTS", "1") != "0",
+    snapshot_dir=os.environ.get("MINESWEEPER_SNAPSHOT_DIR") or None,
+)
+
+# Server-side simulation of batches of games on a process pool
+batches = BatchRunner(
+    workers=_env_number("MINESWEEPER_BATCH_WORKERS", None, int),
+    max_batches=_env_number("MINESWEEPER_MAX_BATCHES", 2, int),
+)
+MAX_BATCH_SIZE = _env_number("MINESWEEPER_MAX_BATCH_SIZE", 10000, int)
+
+
+def _max_iterations(data):
+    """Optional positive max_iterations parameter of a solve request."""
+    value = data.get("max_iterations")
+    if value is None:
+        return None
+    value = int(value)
+    if value < 1:
+        raise ValueError("max_iterations must be positive")
+    return value
 
 
 @app.route("/api/game/new", methods=["POST"])
@@ -30,10 +67,9 @@ def new_game():
         num_mines = data.get("num_mines", 10)
         solver_type = data.get("solver_type", "basic")
 
-        game_id = str(len(games))
-        games[game_id] = MinesweeperBackend(width, height, num_mines, solver_type)
-
-        return jsonify({"game_id": game_id, "state": games[game_id].get_game_state()})
+        game_id = games.create(width, height, num_mines, solver_type)
+        with games.checkout(game_id) as game:
+            return jsonify({"game_id": game_id, "state": game.get_game_state()})
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -41,108 +77,179 @@ def new_game():
 @app.route("/api/game/<game_id>/state", methods=["GET"])
 def get_game_state(game_id):
     """Get the current state of a game."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    state = games[game_id].get_game_state()
+        state = game.get_game_state()
 
-    state["explosions"] = games[game_id].nb_explosions
+        state["explosions"] = game.nb_explosions
 
-    return jsonify({"state": state})
+        return jsonify({"state": state})
 
 
 @app.route("/api/game/<game_id>/reveal", methods=["POST"])
 def reveal_cell(game_id):
     """Reveal a cell in the game."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    try:
-        data = request.get_json()
-        x = data.get("x")
-        y = data.get("y")
+        try:
+            data = request.get_json()
+            x = data.get("x")
+            y = data.get("y")
 
-        if x is None or y is None:
-            return jsonify({"error": "Missing x or y coordinates"}), 400
+            if x is None or y is None:
+                return jsonify({"error": "Missing x or y coordinates"}), 400
 
-        game = games[game_id]
-        game_continues = game.reveal(x, y)
+            game_continues = game.reveal(x, y)
 
-        return jsonify(
-            {"state": game.get_game_state(), "game_continues": game_continues}
-        )
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+            return jsonify(
+                {"state": game.get_game_state(), "game_continues": game_continues}
+            )
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
 
 
 @app.route("/api/game/<game_id>/flag", methods=["POST"])
 def toggle_flag(game_id):
     """Toggle a flag on a cell."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    try:
-        data = request.get_json()
-        x = data.get("x")
-        y = data.get("y")
+        try:
+            data = request.get_json()
+            x = data.get("x")
+            y = data.get("y")
 
-        if x is None or y is None:
-            return jsonify({"error": "Missing x or y coordinates"}), 400
+            if x is None or y is None:
+                return jsonify({"error": "Missing x or y coordinates"}), 400
 
-        game = games[game_id]
-        game.toggle_flag(x, y)
+            game.toggle_flag(x, y)
 
-        return jsonify({"state": game.get_game_state()})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+            return jsonify({"state": game.get_game_state()})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
 
 
 @app.route("/api/game/<game_id>/solve/next", methods=["GET"])
 def get_next_solve_move(game_id):
     """Get the next move from the solver."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    game = games[game_id]
-    next_move = game.solve_next_move()
+        next_move = game.solve_next_move()
 
-    if next_move is None:
-        return jsonify({"error": "No moves available"}), 400
+        if next_move is None:
+            return jsonify({"error": "No moves available"}), 400
 
-    return jsonify({"x": next_move[0], "y": next_move[1]})
+        return jsonify({"x": next_move[0], "y": next_move[1]})
 
 
 @app.route("/api/game/<game_id>/solve/apply", methods=["POST"])
 def apply_solver_move(game_id):
     """Apply the next move from the solver."""
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
+
+        move_applied = game.apply_solver_move()
+
+        return jsonify({"state": game.get_game_state(), "move_applied": move_applied})
+
+
+@app.route("/api/game/<game_id>/solve/run", methods=["POST"])
+def run_solver(game_id):
+    """
+    Solve a game to completion on the server. Streams newline-delimited JSON:
+    one line per move (unless "moves" is false), then a "result" line.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        max_iterations = _max_iterations(data)
+        record_moves = bool(data.get("moves", True))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
     if game_id not in games:
         return jsonify({"error": "Game not found"}), 404
 
-    game = games[game_id]
-    move_applied = game.apply_solver_move()
+    def generate():
+        with games.checkout(game_id) as game:
+            if game is None:
+                yield ndjson({"error": "Game not found"})
+                return
+            yield from game_lines(game, max_iterations, record_moves)
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@app.route("/api/solve/batch", methods=["POST"])
+def run_batch():
+    """
+    Create and solve a batch of games on the server. The body holds "games", a
+    list of {width, height, num_mines, seed, solver_type} specs (or "game" for a
+    single one). Streams newline-delimited JSON: one line per finished game with
+    its "index" in the batch (and its "moves" if "moves" is true), then a
+    "summary" line.
+    """
+    try:
+        data = request.get_json()
+        specs = data.get("games")
+        if specs is None and "game" in data:
+            specs = [data["game"]]
+        if not isinstance(specs, list) or not specs:
+            return jsonify({"error": "Missing games parameter"}), 400
+        if len(specs) > MAX_BATCH_SIZE:
+            return (
+                jsonify({"error": f"A batch holds at most {MAX_BATCH_SIZE} games"}),
+                413,
+            )
+        parsed = []
+        for index, spec in enumerate(specs):
+            try:
+                parsed.append(parse_spec(spec))
+            except ValueError as e:
+                return jsonify({"error": f"Game {index}: {e}"}), 400
+        max_iterations = _max_iterations(data)
+        record_moves = bool(data.get("moves", False))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not batches.try_acquire():
+        return jsonify({"error": "Too many batches running, retry later"}), 429
 
-    return jsonify({"state": game.get_game_state(), "move_applied": move_applied})
+    response = Response(
+        batches.run(parsed, max_iterations, record_moves),
+        mimetype="application/x-ndjson",
+    )
+    # Also called if the client disconnects before the stream starts
+    response.call_on_close(batches.release)
+    return response
 
 
 @app.route("/api/game/<game_id>/solver", methods=["PUT"])
 def change_solver(game_id):
     """Change the solver for a game."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    try:
-        data = request.get_json()
-        solver_type = data.get("solver_type")
+        try:
+            data = request.get_json()
+            solver_type = data.get("solver_type")
 
-        if not solver_type:
-            return jsonify({"error": "Missing solver_type parameter"}), 400
+            if not solver_type:
+                return jsonify({"error": "Missing solver_type parameter"}), 400
 
-        game = games[game_id]
-        game.change_solver(solver_type)
+            game.change_solver(solver_type)
 
-        return jsonify({"state": game.get_game_state()})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+            return jsonify({"state": game.get_game_state()})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
 
 
 @app.route("/api/solvers", methods=["GET"])
@@ -166,6 +273,11 @@ def get_available_solvers():
                     "name": "A* Boost",
                     "description": "An enhanced A* solver with probabilistic frontier analysis for better mine probability estimation when no trivial moves is found",
                 },
+                {
+                    "id": "exact",
+                    "name": "Exact Probabilities",
+                    "description": "Computes exact mine probabilities by counting the configurations of each frontier component with the global mine count, and reveals the safest cell when no move is certain",
+                },
             ]
         }
     )
@@ -174,53 +286,54 @@ def get_available_solvers():
 @app.route("/api/game/<game_id>/reset", methods=["POST"])
 def reset_game(game_id):
     """Reset a game to its initial state."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    game = games[game_id]
-    game.reset_game()
+        game.reset_game()
 
-    return jsonify({"state": game.get_game_state()})
+        return jsonify({"state": game.get_game_state()})
 
 
 @app.route("/api/games", methods=["GET"])
 def list_games():
     """List all active games."""
-    return jsonify({"games": [{"id": game_id} for game_id in games.keys()]})
+    return jsonify({"games": [{"id": game_id} for game_id in games.ids()]})
 
 
 @app.route("/api/game/<game_id>", methods=["DELETE"])
 def delete_game(game_id):
     """Delete a game."""
-    if game_id not in games:
+    if not games.delete(game_id):
         return jsonify({"error": "Game not found"}), 404
 
-    del games[game_id]
     return jsonify({"message": "Game deleted successfully"})
 
 
 @app.route("/api/game/<game_id>/explosions", methods=["GET"])
 def get_explosion_count(game_id):
     """Get the number of explosions for a specific game."""
-    if game_id not in games:
-        return jsonify({"error": "Game not found"}), 404
+    with games.checkout(game_id) as game:
+        if game is None:
+            return jsonify({"error": "Game not found"}), 404
 
-    return jsonify({"explosions": games[game_id].nb_explosions, "game_id": game_id})
+        return jsonify({"explosions": game.nb_explosions, "game_id": game_id})
 
 
 @app.route("/api/explosions", methods=["GET"])
 def get_all_explosion_stats():
     """Get explosion statistics for all active games."""
+    summaries = games.summaries()
+    total = sum(summary["explosions"] for summary in summaries.values())
     stats = {
-        "total_explosions": sum(game.nb_explosions for game in games.values()),
-        "average_explosions": (
-            sum(game.nb_explosions for game in games.values()) / len(games)
-            if games
-            else 0
-        ),
+        "total_explosions": total,
+        "average_explosions": total / len(summaries) if summaries else 0,
         "games": {
-            game_id: {"explosions": game.nb_explosions, "solver_type": game.solver_type}
-            for game_id, game in games.items()
+            game_id: {
+                "explosions": summary["explosions"],
+                "solver_type": summary["solver_type"],
+            }
+            for game_id, summary in summaries.items()
         },
     }
 
@@ -1,80 +1,283 @@
-from typing import Tuple, Optional
+from functools import lru_cache
+from typing import Iterator, Tuple, Optional
 import random
+import struct
+import numpy as np
 from solvers.astarsolver import AstarSolver
 from solvers.astarboostedsolver import AstarBoostedSolver
 from solvers.greedysolver import GreedySolver
+from solvers.exactsolver import ExactSolver
 
 
 class SolverFactory:
     """Factory for creating different solver instances."""
 
+    SOLVER_TYPES = ("basic", "greedy", "astar", "astar_boost", "exact")
+
     @staticmethod
     def create_solver(solver_type, game):
-        if solver_type == "basic":
+        if solver_type in ("basic", "greedy"):
             return GreedySolver(game)
         elif solver_type == "astar":
             return AstarSolver(game)
         elif solver_type == "astar_boost":
             return AstarBoostedSolver(game)
+        elif solver_type == "exact":
+            return ExactSolver(game)
         else:
             return GreedySolver(game)
 
 
+class CellSet:
+    """
+    Set of (x, y) cells supporting O(1) add, discard, membership and random choice.
+
+    Cells are kept in a list; a removed cell is swapped with the last one.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = []
+        self.index = {}
+        for cell in cells:
+            self.add(cell)
+
+    def add(self, cell):
+        if cell not in self.index:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        i = self.index.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[i] = last
+            self.index[last] = i
+
+    def choice(self, rng=random):
+        """Return a random cell (the set must not be empty)."""
+        return rng.choice(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+
+@lru_cache(maxsize=32)
+def neighbor_table(width: int, height: int):
+    """
+    Neighbors of every cell, indexed [y][x], as tuples of (x, y).
+    Shared by all games with the same dimensions.
+    """
+    return tuple(
+        tuple(
+            tuple(
+                (nx, ny)
+                for ny in range(max(0, y - 1), min(height, y + 2))
+                for nx in range(max(0, x - 1), min(width, x + 2))
+                if (nx, ny) != (x, y)
+            )
+            for x in range(width)
+        )
+        for y in range(height)
+    )
+
+
+# Snapshot header: magic, width, height, mines, explosions, game_over, won, solver name length
+SNAPSHOT_HEADER = struct.Struct("<4sHHII??B")
+SNAPSHOT_MAGIC = b"MSW1"
+
+
 class MinesweeperBackend:
     def __init__(
-        self, width: int, height: int, num_mines: int, solver_type: str = "basic"
+        self,
+        width: int,
+        height: int,
+        num_mines: int,
+        solver_type: str = "basic",
+        seed: Optional[int] = None,
     ):
         """
         Initialize a new Minesweeper game backend.
 
+        The board is stored in NumPy arrays indexed [y, x]: `grid` (int8, -1 for
+        a mine, else the number of adjacent mines), `revealed` and `flagged`
+        (bool). The following are kept up to date on every reveal and flag so
+        that solvers never have to scan the whole board:
+            - hidden: CellSet of cells neither revealed nor flagged
+            - frontier: set of hidden cells adjacent to a revealed cell
+            - boundary: set of revealed cells with at least one hidden neighbor
+            - hidden_neighbors, flagged_neighbors: int8 arrays of neighbor counts
+            - flag_count, revealed_count
+
         Args:
             width (int): Width of the game board
             height (int): Height of the game board
             num_mines (int): Number of mines to place
-            solver_type (str): Type of solver to use ('basic', 'astar', 'astar_boost')
+            solver_type (str): Type of solver to use ('basic', 'astar', 'astar_boost', 'exact')
+            seed (Optional[int]): Seed of the game's own random generator (mine
+                placement and solver guesses). Without a seed the global
+                `random` module is used.
         """
+        self.rng = random.Random(seed) if seed is not None else random
         self.width = width
         self.height = height
         self.num_mines = num_mines
-        self.grid = [[0 for _ in range(width)] for _ in range(height)]
-        self.revealed = [[False for _ in range(width)] for _ in range(height)]
-        self.flagged = [[False for _ in range(width)] for _ in range(height)]
+        self.solver_type = solver_type
+        self.neighbors = neighbor_table(width, height)
+        self._new_board()
+
+    def _new_board(self):
+        """Create a new board with fresh mines, reset the game state and the solver."""
+        self.grid = np.zeros((self.height, self.width), dtype=np.int8)
+        self.revealed = np.zeros((self.height, self.width), dtype=bool)
+        self.flagged = np.zeros((self.height, self.width), dtype=bool)
         self.game_over = False
         self.won = False
-        self.solver_type = solver_type
         self._place_mines()
         self._calculate_numbers()
-        self.solver = SolverFactory.create_solver(solver_type, self)
+        self._rebuild_state()
+
+        self.solver = SolverFactory.create_solver(self.solver_type, self)
         self.nb_explosions = 0
 
+    def _rebuild_state(self):
+        """Compute the incremental sets and counts from the revealed and flagged arrays."""
+        hidden = ~self.revealed & ~self.flagged
+        self.hidden_neighbors = self._neighbor_sum(hidden.astype(np.int8))
+        self.flagged_neighbors = self._neighbor_sum(self.flagged.astype(np.int8))
+        revealed_neighbors = self._neighbor_sum(self.revealed.astype(np.int8))
+        self.hidden = CellSet(
+            (int(x), int(y)) for y, x in zip(*np.nonzero(hidden))
+        )
+        self.frontier = {
+            (int(x), int(y)) for y, x in zip(*np.nonzero(hidden & (revealed_neighbors > 0)))
+        }
+        self.boundary = {
+            (int(x), int(y))
+            for y, x in zip(*np.nonzero(self.revealed & (self.hidden_neighbors > 0)))
+        }
+        self.flag_count = int(self.flagged.sum())
+        self.revealed_count = int(self.revealed.sum())
+
+    def snapshot(self) -> bytes:
+        """
+        Serialize the game into a compact snapshot: a small header followed by
+        the mine, revealed and flagged boards packed 8 cells per byte.
+        Solver state is not saved (solvers recompute their moves every step).
+        """
+        name = self.solver_type.encode()
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC,
+            self.width,
+            self.height,
+            self.num_mines,
+            self.nb_explosions,
+            self.game_over,
+            self.won,
+            len(name),
+        )
+        boards = np.stack([self.grid == -1, self.revealed, self.flagged])
+        return header + name + np.packbits(boards).tobytes()
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> "MinesweeperBackend":
+        """Rebuild a game saved with snapshot()."""
+        magic, width, height, num_mines, explosions, game_over, won, name_length = (
+            SNAPSHOT_HEADER.unpack_from(data)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a Minesweeper snapshot")
+        offset = SNAPSHOT_HEADER.size
+        solver_type = data[offset : offset + name_length].decode()
+        bits = np.unpackbits(
+            np.frombuffer(data, dtype=np.uint8, offset=offset + name_length),
+            count=3 * width * height,
+        ).astype(bool)
+        mines, revealed, flagged = bits.reshape(3, height, width)
+
+        game = cls.__new__(cls)
+        game.width = width
+        game.height = height
+        game.num_mines = num_mines
+        game.solver_type = solver_type
+        game.rng = random
+        game.neighbors = neighbor_table(width, height)
+        game.grid = np.where(mines, np.int8(-1), np.int8(0))
+        game._calculate_numbers()
+        game.revealed = revealed.copy()
+        game.flagged = flagged.copy()
+        game.game_over = game_over
+        game.won = won
+        game._rebuild_state()
+        game.solver = SolverFactory.create_solver(solver_type, game)
+        game.nb_explosions = explosions
+        return game
+
+    def memory_size(self) -> int:
+        """Approximate memory used by the game, in bytes (arrays and cell sets)."""
+        arrays = (
+            self.grid.nbytes
+            + self.revealed.nbytes
+            + self.flagged.nbytes
+            + self.hidden_neighbors.nbytes
+            + self.flagged_neighbors.nbytes
+        )
+        # A cell entry of a set or CellSet costs roughly 150 bytes (tuple, ints, hash slots)
+        cells = 2 * len(self.hidden) + len(self.frontier) + len(self.boundary)
+        return 1024 + arrays + 150 * cells
+
     def _place_mines(self):
         """Place mines randomly on the board."""
         positions = [(x, y) for x in range(self.width) for y in range(self.height)]
-        mine_positions = random.sample(positions, self.num_mines)
+        mine_positions = self.rng.sample(positions, self.num_mines)
         for x, y in mine_positions:
-            self.grid[y][x] = -1  # -1 represents a mine
+            self.grid[y, x] = -1  # -1 represents a mine
+
+    def _neighbor_sum(self, values: np.ndarray) -> np.ndarray:
+        """Sum of the 8 neighbors of every cell (3x3 box convolution minus the cell itself)."""
+        padded = np.pad(values, 1)
+        total = np.zeros_like(values)
+        for dy in range(3):
+            for dx in range(3):
+                if dy != 1 or dx != 1:
+                    total += padded[dy : dy + self.height, dx : dx + self.width]
+        return total
 
     def _calculate_numbers(self):
         """Calculate the numbers for each cell based on adjacent mines."""
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.grid[y][x] == -1:
-                    continue
-                count = 0
-                for dy in [-1, 0, 1]:
-                    for dx in [-1, 0, 1]:
-                        nx, ny = x + dx, y + dy
-                        if (dx == 0 and dy == 0) or not (
-                            0 <= nx < self.width and 0 <= ny < self.height
-                        ):
-                            continue
-                        if self.grid[ny][nx] == -1:
-                            count += 1
-                self.grid[y][x] = count
+        mines = self.grid == -1
+        counts = self._neighbor_sum(mines.astype(np.int8))
+        self.grid = np.where(mines, np.int8(-1), counts).astype(np.int8)
+
+    def _hide(self, x: int, y: int):
+        """Update the incremental sets when a hidden cell is revealed or flagged."""
+        self.hidden.discard((x, y))
+        self.frontier.discard((x, y))
+        for nx, ny in self.neighbors[y][x]:
+            self.hidden_neighbors[ny, nx] -= 1
+            if self.hidden_neighbors[ny, nx] == 0:
+                self.boundary.discard((nx, ny))
+
+    def _unhide(self, x: int, y: int):
+        """Update the incremental sets when a flag is removed."""
+        self.hidden.add((x, y))
+        for nx, ny in self.neighbors[y][x]:
+            self.hidden_neighbors[ny, nx] += 1
+            if self.revealed[ny, nx]:
+                self.boundary.add((nx, ny))
+                self.frontier.add((x, y))
 
     def reveal(self, x: int, y: int) -> bool:
         """
-        Reveal a cell at the given coordinates.
+        Reveal a cell at the given coordinates. Empty areas are opened with an
+        iterative flood fill.
 
         Args:
             x (int): X coordinate
@@ -85,26 +288,29 @@ class MinesweeperBackend:
         """
         if not (0 <= x < self.width and 0 <= y < self.height):
             return True
-        if self.flagged[y][x] or self.revealed[y][x]:
+        if self.flagged[y, x] or self.revealed[y, x]:
             return True
 
-        self.revealed[y][x] = True
-
-        if self.grid[y][x] == -1:
+        if self.grid[y, x] == -1:
             self.nb_explosions += 1
-            self.revealed[y][x] = False
             self.toggle_flag(x, y)
             return True
 
-        if self.grid[y][x] == 0:
-            for dy in [-1, 0, 1]:
-                for dx in [-1, 0, 1]:
-                    nx, ny = x + dx, y + dy
-                    if (dx == 0 and dy == 0) or not (
-                        0 <= nx < self.width and 0 <= ny < self.height
-                    ):
-                        continue
-                    self.reveal(nx, ny)
+        stack = [(x, y)]
+        while stack:
+            cx, cy = stack.pop()
+            if self.revealed[cy, cx] or self.flagged[cy, cx]:
+                continue
+            self.revealed[cy, cx] = True
+            self.revealed_count += 1
+            self._hide(cx, cy)
+            if self.hidden_neighbors[cy, cx]:
+                self.boundary.add((cx, cy))
+            for nx, ny in self.neighbors[cy][cx]:
+                if not self.revealed[ny, nx] and not self.flagged[ny, nx]:
+                    self.frontier.add((nx, ny))
+                    if self.grid[cy, cx] == 0:
+                        stack.append((nx, ny))
 
         if self._check_win():
             self.won = True
@@ -122,20 +328,31 @@ class MinesweeperBackend:
         """
         if not (0 <= x < self.width and 0 <= y < self.height):
             return
-        if not self.revealed[y][x]:
-            self.flagged[y][x] = not self.flagged[y][x]
+        if not self.revealed[y, x]:
+            flag = not self.flagged[y, x]
+            self.flagged[y, x] = flag
+            delta = 1 if flag else -1
+            self.flag_count += delta
+            for nx, ny in self.neighbors[y][x]:
+                self.flagged_neighbors[ny, nx] += delta
+            if flag:
+                self._hide(x, y)
+            else:
+                self._unhide(x, y)
         if self._check_win():
             self.won = True
             self.game_over = True
 
     def _check_win(self) -> bool:
-        """Check if the game has been won."""
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.grid[y][x] == -1 and not self.flagged[y][x]:
-                    return False
-                if self.grid[y][x] != -1 and not self.revealed[y][x]:
-                    return False
+        """
+        Check if the game has been won: every safe cell revealed and every mine
+        flagged (flags can only be on mines once all safe cells are revealed).
+        """
+        if (
+            self.revealed_count != self.width * self.height - self.num_mines
+            or self.flag_count != self.num_mines
+        ):
+            return False
         print("Game won")
         return True
 
@@ -147,9 +364,9 @@ class MinesweeperBackend:
             dict: Dictionary containing the game state
         """
         return {
-            "grid": self.grid,
-            "revealed": self.revealed,
-            "flagged": self.flagged,
+            "grid": self.grid.tolist(),
+            "revealed": self.revealed.tolist(),
+            "flagged": self.flagged.tolist(),
             "game_over": self.game_over,
             "won": self.won,
             "width": self.width,
@@ -200,15 +417,37 @@ class MinesweeperBackend:
     def reset_game(self):
         """Reset the game to its initial state."""
         print("Resetting game")
-        self.grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
-        self.revealed = [[False for _ in range(self.width)] for _ in range(self.height)]
-        self.flagged = [[False for _ in range(self.width)] for _ in range(self.height)]
-        self.game_over = False
-        self.won = False
-        self._place_mines()
-        self._calculate_numbers()
-        self.solver = SolverFactory.create_solver(self.solver_type, self)
-        self.nb_explosions = 0
+        self._new_board()
+
+    def iter_solve(self, max_iterations: int = 1000) -> Iterator[dict]:
+        """
+        Run the solver until the game ends, yielding every move as it is applied.
+
+        Args:
+            max_iterations (int): Maximum number of solver steps to prevent infinite loops
+
+        Yields:
+            dict: One solver step
+                - 'step': Step number, starting at 0
+                - 'flags': Cells flagged during the step, as [x, y] lists
+                - 'reveal': Cell revealed, as [x, y], or None
+                - 'explosion': Boolean indicating if the revealed cell was a mine
+        """
+        for step in range(max_iterations):
+            if self.game_over or self.solve_next_move() is None:
+                return
+            flags = [
+                [x, y] for x, y in self.solver.flagged_cells if not self.flagged[y, x]
+            ]
+            reveal = list(self.solver.safe_moves[0]) if self.solver.safe_moves else None
+            explosions = self.nb_explosions
+            self.solver.apply_moves()
+            yield {
+                "step": step,
+                "flags": flags,
+                "reveal": reveal,
+                "explosion": self.nb_explosions > explosions,
+            }
 
     def solve_game(self, max_iterations: int = 1000) -> dict:
         """
@@ -224,30 +463,9 @@ class MinesweeperBackend:
                 - 'explosions': Number of mine explosions
                 - 'won': Boolean indicating if the game was won
         """
-        # Reset tracking variables
-        iterations = 0
         initial_explosions = self.nb_explosions
+        iterations = sum(1 for _ in self.iter_solve(max_iterations))
 
-        # Attempt to solve the game
-        while not self.game_over and iterations < max_iterations:
-            # Try to get and apply the next solver move
-            move = self.solve_next_move()
-
-            # If no move is available, break the loop
-            if move is None:
-                break
-
-            # Apply the solver move
-            move_result = self.apply_solver_move()
-
-            # Increment iterations
-            iterations += 1
-
-            # Break if the game is over (won or lost)
-            if self.game_over:
-                break
-
-        # Prepare and return results
         return {
             "success": self.won,
             "iterations": iterations,
@@ -0,0 +1,300 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from backend import MinesweeperBackend
+
+
+class _Entry:
+    """A registered game: either live in memory or swapped out as a snapshot."""
+
+    __slots__ = (
+        "game",
+        "snapshot",
+        "path",
+        "lock",
+        "users",
+        "last_access",
+        "size",
+        "explosions",
+        "solver_type",
+    )
+
+    def __init__(self, game: MinesweeperBackend):
+        self.game = game
+        self.snapshot = None
+        self.path = None
+        self.lock = threading.RLock()
+        self.users = 0
+        self.last_access = time.monotonic()
+        self.size = game.memory_size()
+        self.explosions = game.nb_explosions
+        self.solver_type = game.solver_type
+
+    def memory(self) -> int:
+        if self.game is not None:
+            return self.size
+        return len(self.snapshot) if self.snapshot is not None else 0
+
+
+class GameRegistry:
+    """
+    Thread-safe store of the games served by the API.
+
+    Games get random unique IDs and are kept in least-recently-used order.
+    When there are more than max_games live games, when the estimated memory
+    goes over max_memory_bytes, or when a game has been idle for idle_timeout
+    seconds, the least recently used games are moved out of memory: if
+    snapshots are enabled they are serialized (bit-packed boards, in memory or
+    in snapshot_dir) and restored transparently on the next access, otherwise
+    they are dropped. Games not accessed for ttl seconds are deleted.
+
+    Every access goes through checkout(), which holds the game's lock so that
+    concurrent requests on the same game are serialized.
+    """
+
+    def __init__(
+        self,
+        max_games: int = 1000,
+        ttl: Optional[float] = 24 * 3600,
+        idle_timeout: Optional[float] = 600,
+        max_memory_bytes: Optional[int] = None,
+        snapshots: bool = True,
+        max_snapshots: int = 100000,
+        snapshot_dir: Optional[str] = None,
+    ):
+        self.max_games = max_games
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self.max_memory_bytes = max_memory_bytes
+        self.snapshots = snapshots
+        self.max_snapshots = max_snapshots
+        self.snapshot_dir = snapshot_dir
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+
+        # All games, and the live and swapped-out ones separately, each in
+        # least-recently-used order, plus the running memory estimate, so that
+        # eviction only visits the games it evicts
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._live: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._swapped: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, game_id: str) -> bool:
+        with self._lock:
+            return game_id in self._entries
+
+    def create(
+        self, width: int, height: int, num_mines: int, solver_type: str = "basic"
+    ) -> str:
+        """
+        Create a new game and register it.
+
+        Returns:
+            str: ID of the new game
+        """
+        game = MinesweeperBackend(width, height, num_mines, solver_type)
+        game_id = uuid.uuid4().hex
+        entry = _Entry(game)
+        with self._lock:
+            self._entries[game_id] = entry
+            self._live[game_id] = entry
+            self._memory += entry.memory()
+        self._evict()
+        return game_id
+
+    @contextmanager
+    def checkout(self, game_id: str) -> Iterator[Optional[MinesweeperBackend]]:
+        """
+        Lock a game for the duration of a with block, restoring it from its
+        snapshot if it was swapped out. Yields None if the game does not exist.
+        """
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None:
+                self._entries.move_to_end(game_id)
+                (self._live if entry.game is not None else self._swapped).move_to_end(game_id)
+                entry.last_access = time.monotonic()
+                entry.users += 1
+        if entry is None:
+            yield None
+            return
+
+        try:
+            with entry.lock:
+                if entry.game is None:
+                    self._restore(game_id, entry)
+                try:
+                    yield entry.game
+                finally:
+                    size = entry.game.memory_size()
+                    with self._lock:
+                        if self._entries.get(game_id) is entry:
+                            self._memory += size - entry.size
+                        entry.size = size
+                    entry.explosions = entry.game.nb_explosions
+                    entry.solver_type = entry.game.solver_type
+        finally:
+            with self._lock:
+                entry.users -= 1
+            self._evict()
+
+    def delete(self, game_id: str) -> bool:
+        """Remove a game. Returns False if it does not exist."""
+        with self._lock:
+            entry = self._remove(game_id)
+        if entry is None:
+            return False
+        self._discard_file(entry)
+        return True
+
+    def ids(self) -> List[str]:
+        """IDs of all registered games, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def summaries(self) -> Dict[str, dict]:
+        """Explosion count, solver and residency of every game, without restoring any."""
+        with self._lock:
+            return {
+                game_id: {
+                    "explosions": entry.explosions,
+                    "solver_type": entry.solver_type,
+                    "in_memory": entry.game is not None,
+                }
+                for game_id, entry in self._entries.items()
+            }
+
+    def memory_usage(self) -> int:
+        """Estimated memory used by live games and in-memory snapshots, in bytes."""
+        with self._lock:
+            return self._memory
+
+    def _remove(self, game_id: str) -> Optional[_Entry]:
+        """Unregister a game. Must hold the registry lock."""
+        entry = self._entries.pop(game_id, None)
+        if entry is not None:
+            self._live.pop(game_id, None)
+            self._swapped.pop(game_id, None)
+            self._memory -= entry.memory()
+        return entry
+
+    def _restore(self, game_id: str, entry: _Entry):
+        """Load a swapped-out game back in memory. Must hold the game's lock."""
+        data = entry.snapshot
+        if data is None:
+            with open(entry.path, "rb") as f:
+                data = f.read()
+            self._discard_file(entry)
+        game = MinesweeperBackend.from_snapshot(data)
+        with self._lock:
+            registered = self._entries.get(game_id) is entry
+            if registered:
+                self._memory -= entry.memory()
+                del self._swapped[game_id]
+                self._live[game_id] = entry
+            entry.game = game
+            entry.snapshot = None
+            entry.size = game.memory_size()
+            if registered:
+                self._memory += entry.size
+
+    def _swap_out(self, game_id: str, entry: _Entry) -> bool:
+        """
+        Snapshot (or drop) an idle live game. Must hold the registry lock; the
+        caller moves the game out of the live list.
+        """
+        if entry.users or not entry.lock.acquire(blocking=False):
+            return False
+        try:
+            self._memory -= entry.memory()
+            if self.snapshots:
+                data = entry.game.snapshot()
+                if self.snapshot_dir:
+                    entry.path = os.path.join(self.snapshot_dir, game_id + ".snap")
+                    with open(entry.path, "wb") as f:
+                        f.write(data)
+                else:
+                    entry.snapshot = data
+            entry.game = None
+            self._memory += entry.memory()
+            return True
+        finally:
+            entry.lock.release()
+
+    def _discard_file(self, entry: _Entry):
+        if entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            entry.path = None
+
+    def _evict(self):
+        """
+        Apply the TTL, idle timeout, game count and memory limits, oldest first.
+
+        Games are visited in least-recently-used order and the walk stops at
+        the first game that no limit applies to, so the cost is proportional
+        to the number of games evicted (plus the few ones in use).
+        """
+        removed = []
+        with self._lock:
+            now = time.monotonic()
+
+            if self.ttl is not None:
+                expired = []
+                for game_id, entry in self._entries.items():
+                    if now - entry.last_access <= self.ttl:
+                        break
+                    if entry.users == 0:
+                        expired.append(game_id)
+                removed.extend(self._remove(game_id) for game_id in expired)
+
+            live = len(self._live)
+            swapped_out = []
+            for game_id, entry in self._live.items():
+                over_count = live > self.max_games
+                over_memory = (
+                    self.max_memory_bytes is not None
+                    and self._memory > self.max_memory_bytes
+                )
+                too_idle = (
+                    self.idle_timeout is not None
+                    and now - entry.last_access > self.idle_timeout
+                )
+                if not (over_count or over_memory or too_idle):
+                    break
+                if self._swap_out(game_id, entry):
+                    live -= 1
+                    swapped_out.append(game_id)
+            for game_id in swapped_out:
+                entry = self._live.pop(game_id)
+                if self.snapshots:
+                    self._swapped[game_id] = entry
+                else:
+                    del self._entries[game_id]
+
+            # Bound the number of snapshots kept
+            excess = len(self._swapped) - self.max_snapshots
+            if excess > 0:
+                dropped = []
+                for game_id, entry in self._swapped.items():
+                    if len(dropped) == excess:
+                        break
+                    if entry.users == 0:
+                        dropped.append(game_id)
+                removed.extend(self._remove(game_id) for game_id in dropped)
+
+        for entry in removed:
+            self._discard_file(entry)
@@ -0,0 +1,222 @@
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, List, Optional
+
+from backend import MinesweeperBackend, SolverFactory
+
+# Largest board accepted for server-side simulation
+MAX_CELLS = 250000
+
+
+def parse_spec(spec: dict) -> dict:
+    """
+    Validate a game specification from a batch request.
+
+    Args:
+        spec (dict): width, height, num_mines, seed (optional) and solver_type (optional)
+
+    Returns:
+        dict: The normalized specification
+
+    Raises:
+        ValueError: If the specification is invalid
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("Each game must be an object")
+    try:
+        width = int(spec.get("width", 9))
+        height = int(spec.get("height", 9))
+        num_mines = int(spec.get("num_mines", 10))
+        seed = spec.get("seed")
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        raise ValueError("width, height, num_mines and seed must be integers")
+    solver_type = spec.get("solver_type", "basic")
+    if width < 1 or height < 1 or width * height > MAX_CELLS:
+        raise ValueError(f"Board size must be between 1 and {MAX_CELLS} cells")
+    if not 0 <= num_mines < width * height:
+        raise ValueError("num_mines must be between 0 and the number of cells - 1")
+    if solver_type not in SolverFactory.SOLVER_TYPES:
+        raise ValueError(f"Unknown solver type: {solver_type}")
+    return {
+        "width": width,
+        "height": height,
+        "num_mines": num_mines,
+        "seed": seed,
+        "solver_type": solver_type,
+    }
+
+
+def solve_spec(
+    spec: dict, max_iterations: Optional[int] = None, record_moves: bool = False
+) -> dict:
+    """
+    Create a game from a specification and solve it to completion (run in a worker process).
+
+    Args:
+        spec (dict): A specification returned by parse_spec
+        max_iterations (Optional[int]): Step limit, by default the number of cells
+        record_moves (bool): Whether to return the list of moves
+
+    Returns:
+        dict: The specification with 'won', 'iterations', 'explosions' and
+            'time' (seconds), plus 'moves' if record_moves is set
+    """
+    start_time = time.perf_counter()
+    # The backend prints when a game is won
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        game = MinesweeperBackend(
+            spec["width"],
+            spec["height"],
+            spec["num_mines"],
+            spec["solver_type"],
+            seed=spec["seed"],
+        )
+        if max_iterations is None:
+            max_iterations = spec["width"] * spec["height"]
+        moves = list(game.iter_solve(max_iterations))
+
+    result = dict(spec)
+    result.update(
+        {
+            "won": game.won,
+            "iterations": len(moves),
+            "explosions": game.nb_explosions,
+            "time": time.perf_counter() - start_time,
+        }
+    )
+    if record_moves:
+        result["moves"] = moves
+    return result
+
+
+def ndjson(record: dict) -> str:
+    """One line of newline-delimited JSON."""
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def game_lines(
+    game: MinesweeperBackend,
+    max_iterations: Optional[int] = None,
+    record_moves: bool = False,
+) -> Iterator[str]:
+    """
+    Solve a registered game to completion, yielding NDJSON lines: every move if
+    record_moves is set, then the final statistics.
+    """
+    if max_iterations is None:
+        max_iterations = game.width * game.height
+    start_time = time.perf_counter()
+    initial_explosions = game.nb_explosions
+    iterations = 0
+    for move in game.iter_solve(max_iterations):
+        iterations += 1
+        if record_moves:
+            yield ndjson(move)
+    yield ndjson(
+        {
+            "result": {
+                "won": game.won,
+                "game_over": game.game_over,
+                "iterations": iterations,
+                "explosions": game.nb_explosions - initial_explosions,
+                "time": time.perf_counter() - start_time,
+            }
+        }
+    )
+
+
+class BatchRunner:
+    """
+    Runs batches of games on a shared process pool and limits how many
+    batches can run at the same time.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_batches: int = 2):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batches = max_batches
+        self._slots = threading.BoundedSemaphore(max_batches)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers don't inherit the web server's threads and locks
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def try_acquire(self) -> bool:
+        """Reserve a batch slot. Returns False if max_batches batches are running."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+    def run(
+        self,
+        specs: List[dict],
+        max_iterations: Optional[int] = None,
+        record_moves: bool = False,
+    ) -> Iterator[str]:
+        """
+        Solve every game of a batch, yielding NDJSON lines as games finish (in
+        completion order): one line per game with its index in the batch (and
+        its moves if record_moves is set), then a summary line. Games not yet
+        started are cancelled if the consumer stops early.
+        """
+        start_time = time.perf_counter()
+        pool = self._pool()
+        # Keep a bounded number of games in flight so huge batches don't flood the pool
+        pending = {}
+        queue = iter(enumerate(specs))
+        won = explosions = iterations = games = 0
+
+        def submit(count):
+            for index, spec in itertools.islice(queue, count):
+                future = pool.submit(solve_spec, spec, max_iterations, record_moves)
+                pending[future] = index
+
+        try:
+            submit(4 * self.workers)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    result = future.result()
+                    games += 1
+                    won += result["won"]
+                    explosions += result["explosions"]
+                    iterations += result["iterations"]
+                    yield ndjson({"index": index, **result})
+                submit(len(done))
+            yield ndjson(
+                {
+                    "summary": {
+                        "games": games,
+                        "won": won,
+                        "win_rate": won / games if games else 0,
+                        "explosions": explosions,
+                        "average_explosions": explosions / games if games else 0,
+                        "iterations": iterations,
+                        "time": time.perf_counter() - start_time,
+                    }
+                }
+            )
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
@@ -1,6 +1,3 @@
-import random
-
-
 class AstarBoostedSolver:
     def __init__(self, game):
         self.game = game
@@ -28,121 +25,85 @@ class AstarBoostedSolver:
 
     def update_mine_count(self):
         """Update the remaining mine count based on flagged cells."""
-        flag_count = sum(sum(1 for cell in row if cell) for row in self.game.flagged)
-        self.remaining_mines = self.game.num_mines - flag_count
+        self.remaining_mines = self.game.num_mines - self.game.flag_count
 
     def get_unrevealed_neighbors(self, x, y):
         """Get a list of unrevealed neighboring cells."""
-        neighbors = []
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                nx, ny = x + dx, y + dy
-                if (dx == 0 and dy == 0) or not (
-                    0 <= nx < self.width and 0 <= ny < self.height
-                ):
-                    continue
-                if not self.game.revealed[ny][nx]:
-                    neighbors.append((nx, ny))
-        return neighbors
+        revealed = self.game.revealed
+        return [(nx, ny) for nx, ny in self.game.neighbors[y][x] if not revealed[ny, nx]]
 
     def get_flagged_neighbors_count(self, x, y):
         """Count the number of flagged neighboring cells."""
-        count = 0
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                nx, ny = x + dx, y + dy
-                if (dx == 0 and dy == 0) or not (
-                    0 <= nx < self.width and 0 <= ny < self.height
-                ):
-                    continue
-                if self.game.flagged[ny][nx]:
-                    count += 1
-        return count
+        return int(self.game.flagged_neighbors[y, x])
 
     def find_trivial_moves(self):
-        """Find obvious moves based on revealed cell numbers."""
+        """
+        Find obvious moves based on revealed cell numbers.
+        Only revealed cells bordering hidden cells (game.boundary) can give a move.
+        """
         self.safe_moves = []
         self.flagged_cells = []
+        seen = set()
+
+        game = self.game
+        hidden_counts, flagged_counts = game.hidden_neighbors, game.flagged_neighbors
+        for x, y in game.boundary:
+            value = game.grid[y, x]
+            flagged_count = flagged_counts[y, x]
+            if hidden_counts[y, x] + flagged_count != value and flagged_count != value:
+                continue
+            hidden = [
+                (nx, ny)
+                for nx, ny in game.neighbors[y][x]
+                if not game.revealed[ny, nx] and not game.flagged[ny, nx]
+            ]
 
-        for y in range(self.height):
-            for x in range(self.width):
-                # Skip unrevealed or zero cells
-                if not self.game.revealed[y][x] or self.game.grid[y][x] <= 0:
-                    continue
-
-                unrevealed = self.get_unrevealed_neighbors(x, y)
-                flagged_count = self.get_flagged_neighbors_count(x, y)
-
-                # If unrevealed + flagged == cell number, all unrevealed are mines
-                if len(unrevealed) + flagged_count == self.game.grid[y][x]:
-                    for nx, ny in unrevealed:
-                        if not self.game.flagged[ny][nx]:
-                            self.flagged_cells.append((nx, ny))
-
-                # If flagged count equals cell number, all other unrevealed are safe
-                if flagged_count == self.game.grid[y][x]:
-                    for nx, ny in unrevealed:
-                        if (
-                            not self.game.flagged[ny][nx]
-                            and (nx, ny) not in self.safe_moves
-                        ):
-                            self.safe_moves.append((nx, ny))
+            # If hidden + flagged == cell number, all hidden neighbors are mines
+            if len(hidden) + flagged_count == value:
+                for cell in hidden:
+                    if cell not in seen:
+                        seen.add(cell)
+                        self.flagged_cells.append(cell)
+
+            # If flagged count equals cell number, all other hidden neighbors are safe
+            elif flagged_count == value:
+                for cell in hidden:
+                    if cell not in seen:
+                        seen.add(cell)
+                        self.safe_moves.append(cell)
 
     def probabilistic_frontier_solver(self):
         """
         Advanced probabilistic solver tracking mine frontiers
         Estimates mine probabilities across board regions
         """
-        frontier_cells = []
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.game.revealed[y][x]:
-                    unrevealed_neighbors = [
-                        (nx, ny)
-                        for nx in range(max(0, x - 1), min(self.width, x + 2))
-                        for ny in range(max(0, y - 1), min(self.height, y + 2))
-                        if not self.game.revealed[ny][nx]
-                        and not self.game.flagged[ny][nx]
-                    ]
-
-                    # Compute local mine probability
-                    remaining_mines = self.game.grid[y][
-                        x
-                    ] - self.get_flagged_neighbors_count(x, y)
-                    local_prob = (
-                        remaining_mines / len(unrevealed_neighbors)
-                        if unrevealed_neighbors
-                        else 0
-                    )
-
-                    frontier_cells.extend(
-                        (nx, ny, local_prob) for nx, ny in unrevealed_neighbors
-                    )
+        game = self.game
+        best_cell, best_prob = None, None
+        for x, y in game.boundary:
+            unrevealed_neighbors = [
+                (nx, ny)
+                for nx, ny in game.neighbors[y][x]
+                if not game.revealed[ny, nx] and not game.flagged[ny, nx]
+            ]
+
+            # Compute local mine probability
+            remaining_mines = game.grid[y, x] - self.get_flagged_neighbors_count(x, y)
+            local_prob = remaining_mines / len(unrevealed_neighbors)
+
+            if best_prob is None or local_prob < best_prob:
+                best_cell, best_prob = unrevealed_neighbors[0], local_prob
 
         # If no frontier cells found, fall back to random
-        if not frontier_cells:
-            candidates = [
-                (x, y)
-                for y in range(self.height)
-                for x in range(self.width)
-                if not self.game.revealed[y][x] and not self.game.flagged[y][x]
-            ]
-            return random.choice(candidates) if candidates else (0, 0)
+        if best_cell is None:
+            return game.hidden.choice(game.rng) if game.hidden else (0, 0)
 
         # Return cell with lowest probability of being a mine
-        return min(frontier_cells, key=lambda x: x[2])[:2]
+        return best_cell
 
     def make_random_guess(self):
         """Make a random guess when no other strategy works."""
-        candidates = [
-            (x, y)
-            for y in range(self.height)
-            for x in range(self.width)
-            if not self.game.revealed[y][x] and not self.game.flagged[y][x]
-        ]
-
-        if candidates:
-            self.safe_moves.append(random.choice(candidates))
+        if self.game.hidden:
+            self.safe_moves.append(self.game.hidden.choice(self.game.rng))
             return True
         return False
 
@@ -150,7 +111,7 @@ class AstarBoostedSolver:
         """Apply the moves found by the solver to the game."""
         # Apply flag moves first
         for x, y in self.flagged_cells:
-            if not self.game.flagged[y][x]:
+            if not self.game.flagged[y, x]:
                 self.game.toggle_flag(x, y)
 
         # Then reveal one safe cell (if any)
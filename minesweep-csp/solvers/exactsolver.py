@@ -0,0 +1,396 @@
+import random
+import time
+from math import comb, nextafter
+
+from solvers.astarsolver import AstarSolver
+
+
+class ComputationTimeout(Exception):
+    """Raised when the exact count of a frontier component exceeds the time budget."""
+
+
+def _multiply(a, b):
+    """Product of two polynomials given as coefficient lists (index = number of mines)."""
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def _add_shifted(target, poly, shift):
+    """target += poly * X^shift (target is extended if needed)."""
+    if len(target) < len(poly) + shift:
+        target.extend([0] * (len(poly) + shift - len(target)))
+    for i, x in enumerate(poly):
+        target[i + shift] += x
+
+
+class ExactSolver(AstarSolver):
+    """
+    Solver computing exact mine probabilities when no trivial move is found.
+
+    The frontier (hidden cells next to revealed numbers) is split into
+    independent components. Each component is counted with a memoized
+    dynamic program over its cells: the state is the number of mines still
+    needed by the constraints that are partially assigned, and the count is
+    kept per total number of mines of the component. Components are then
+    combined with the global mine total: a frontier total of k mines leaves
+    C(interior, remaining - k) ways to place the other mines in the hidden
+    cells that touch no number.
+
+    Cells with probability 0 are revealed and cells with probability 1 are
+    flagged; otherwise the cell with the lowest probability is guessed. When
+    a component cannot be counted within the time budget (huge frontiers),
+    its probabilities are estimated by sampling random consistent
+    configurations instead.
+    """
+
+    def __init__(self, game, time_limit=1.0, samples=2000):
+        """
+        Args:
+            game: The MinesweeperBackend to solve
+            time_limit (float): Time budget in seconds for one probability computation
+            samples (int): Maximum number of samples per component in the fallback
+        """
+        super().__init__(game)
+        self.time_limit = time_limit
+        self.samples = samples
+        self.pending_safe = []  # Safe cells found by the last computation, not revealed yet
+        self.probabilities = {}
+        self.sampled = False  # True if the last computation used sampling
+        self.estimated_cells = set()  # Cells whose probability was sampled
+
+    def solve_step(self):
+        """Perform one step of the solving process."""
+        self.update_mine_count()
+        self.find_trivial_moves()
+
+        if self.safe_moves or self.flagged_cells:
+            return True
+
+        # Safe cells deduced by the previous computation
+        hidden = self.game.hidden
+        self.pending_safe = [cell for cell in self.pending_safe if cell in hidden]
+        if self.pending_safe:
+            self.safe_moves = list(self.pending_safe)
+            return True
+
+        if not hidden:
+            return False
+
+        self.probabilities = self.compute_probabilities()
+        if not self.probabilities:
+            return self.make_random_guess()
+
+        # Sampled estimates are never treated as certain
+        certain = {
+            cell: p for cell, p in self.probabilities.items()
+            if cell not in self.estimated_cells
+        }
+        safe = [cell for cell, p in certain.items() if p == 0]
+        mines = [cell for cell, p in certain.items() if p == 1]
+        if safe or mines:
+            self.safe_moves = safe
+            self.flagged_cells = mines
+            self.pending_safe = safe
+            return True
+
+        self.safe_moves.append(min(self.probabilities, key=self.probabilities.get))
+        return True
+
+    def build_constraints(self):
+        """
+        Constraints of the revealed numbers bordering hidden cells.
+
+        Returns:
+            list: (hidden neighbor cells, mines still needed) for each boundary cell
+        """
+        game = self.game
+        constraints = []
+        for x, y in game.boundary:
+            hidden = [
+                (nx, ny)
+                for nx, ny in game.neighbors[y][x]
+                if not game.revealed[ny, nx] and not game.flagged[ny, nx]
+            ]
+            constraints.append((hidden, int(game.grid[y, x]) - int(game.flagged_neighbors[y, x])))
+        return constraints
+
+    @staticmethod
+    def split_components(constraints):
+        """Group the constraints into independent components (sharing no cell)."""
+        parent = {}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        for cells, _ in constraints:
+            for cell in cells:
+                parent.setdefault(cell, cell)
+            root = find(cells[0])
+            for cell in cells[1:]:
+                other = find(cell)
+                if other != root:
+                    parent[other] = root
+
+        components = {}
+        for constraint in constraints:
+            components.setdefault(find(constraint[0][0]), []).append(constraint)
+        return list(components.values())
+
+    def compute_probabilities(self):
+        """
+        Mine probability of every hidden cell.
+
+        Returns:
+            dict: {(x, y): probability}, empty if the board is inconsistent
+        """
+        deadline = time.perf_counter() + self.time_limit
+        self.sampled = False
+        counted = []
+        self.estimated_cells = set()
+        for component in self.split_components(self.build_constraints()):
+            try:
+                counted.append(self.count_component(component, deadline))
+            except ComputationTimeout:
+                self.sampled = True
+                sample = self.sample_component(component, deadline + self.time_limit)
+                self.estimated_cells.update(sample[0])
+                counted.append(sample)
+        frontier = {cell for cells, _, _ in counted for cell in cells}
+        interior = [cell for cell in self.game.hidden if cell not in frontier]
+        return self.combine(counted, interior)
+
+    def count_component(self, constraints, deadline):
+        """
+        Count the mine configurations of a component.
+
+        Returns:
+            tuple: (cells, total, mines) where total[k] is the number of
+            configurations with k mines and mines[cell][k] the number of those
+            where cell is a mine
+        """
+        # Breadth-first cell order keeps few constraints open at a time
+        cell_constraints = {}
+        for j, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                cell_constraints.setdefault(cell, []).append(j)
+        start = constraints[0][0][0]
+        order, seen = [start], {start}
+        for cell in order:
+            for j in cell_constraints[cell]:
+                for other in constraints[j][0]:
+                    if other not in seen:
+                        seen.add(other)
+                        order.append(other)
+
+        position = {cell: i for i, cell in enumerate(order)}
+        last = [max(position[cell] for cell in cells) for cells, _ in constraints]
+        n = len(order)
+        # For each cell: its constraints with the number of their cells assigned after it
+        touches = []
+        for i, cell in enumerate(order):
+            touches.append([
+                (j, sum(1 for other in constraints[j][0] if position[other] > i))
+                for j in cell_constraints[cell]
+            ])
+        # Constraints open before assigning cell i: started earlier and not finished
+        open_at = [()]
+        opened = set()
+        for i in range(n):
+            opened.update(j for j, _ in touches[i])
+            opened.difference_update(j for j, _ in touches[i] if last[j] == i)
+            open_at.append(tuple(sorted(opened)))
+
+        def transition(i, state, value):
+            """State after assigning value to cell i, or None if a constraint breaks."""
+            residual = dict(zip(open_at[i], state))
+            for j, left in touches[i]:
+                need = residual.get(j, constraints[j][1]) - value
+                if need < 0 or need > left:
+                    return None
+                residual[j] = need
+            return tuple(residual[j] for j in open_at[i + 1])
+
+        # Reachable states of each layer, with their successors for both values
+        layers = [{(): None}]
+        for i in range(n):
+            if time.perf_counter() > deadline:
+                raise ComputationTimeout()
+            successors = layers[i]
+            next_layer = {}
+            for state in successors:
+                successors[state] = (transition(i, state, 0), transition(i, state, 1))
+                for new_state in successors[state]:
+                    if new_state is not None:
+                        next_layer[new_state] = None
+            layers.append(next_layer)
+
+        # Backward pass: configurations of cells i.. from each state, by number of mines
+        backward = [None] * (n + 1)
+        backward[n] = {state: [1] for state in layers[n]}
+        for i in range(n - 1, -1, -1):
+            if time.perf_counter() > deadline:
+                raise ComputationTimeout()
+            after = backward[i + 1]
+            counts = {}
+            for state, (zero, one) in layers[i].items():
+                result = []
+                if zero is not None:
+                    _add_shifted(result, after[zero], 0)
+                if one is not None:
+                    _add_shifted(result, after[one], 1)
+                counts[state] = result
+            backward[i] = counts
+        total = backward[0][()]
+
+        # Forward pass: ways to reach each state, then mine counts per cell
+        mines = {}
+        forward = {(): [1]}
+        for i in range(n):
+            cell_mines = []
+            next_forward = {}
+            after = backward[i + 1]
+            for state, ways in forward.items():
+                for value, new_state in enumerate(layers[i][state]):
+                    if new_state is None or not after[new_state]:
+                        continue
+                    if value:
+                        _add_shifted(cell_mines, _multiply(ways, after[new_state]), 1)
+                    _add_shifted(next_forward.setdefault(new_state, []), ways, value)
+            mines[order[i]] = cell_mines
+            forward = next_forward
+        return order, total, mines
+
+    def sample_component(self, constraints, deadline):
+        """
+        Estimate the mine probabilities of a component from random consistent
+        configurations (randomized backtracking with forward checking), for
+        components too large to count exactly. Each sample is weighted as one
+        configuration.
+
+        Returns:
+            tuple: (cells, total, mines) in the same form as count_component
+        """
+        cells = sorted({cell for cell_list, _ in constraints for cell in cell_list})
+        cell_constraints = [[] for _ in cells]
+        index = {cell: i for i, cell in enumerate(cells)}
+        for j, (cell_list, _) in enumerate(constraints):
+            for cell in cell_list:
+                cell_constraints[index[cell]].append(j)
+        total = []
+        mines = {cell: [] for cell in cells}
+
+        for _ in range(self.samples):
+            assignment = self._sample(
+                len(cells), cell_constraints, constraints, deadline, self.game.rng
+            )
+            if assignment is None:
+                break
+            k = sum(assignment)
+            _add_shifted(total, [1], k)
+            for i, value in enumerate(assignment):
+                if value:
+                    _add_shifted(mines[cells[i]], [1], k)
+        return cells, total or [0], mines
+
+    @staticmethod
+    def _sample(n, cell_constraints, constraints, deadline, rng=random):
+        """
+        One random assignment of n cells satisfying the constraints, found by
+        iterative backtracking. Returns None when the deadline is reached.
+        """
+        need = [count for _, count in constraints]
+        left = [len(cell_list) for cell_list, _ in constraints]
+        assignment = []
+        choices = []  # Values still to try for each assigned cell
+        steps = 0
+        i = 0
+        pending = rng.sample((0, 1), 2)
+        while i < n:
+            steps += 1
+            if not steps & 1023 and time.perf_counter() > deadline:
+                return None
+            if pending:
+                value = pending.pop()
+                if all(0 <= need[j] - value <= left[j] - 1 for j in cell_constraints[i]):
+                    for j in cell_constraints[i]:
+                        need[j] -= value
+                        left[j] -= 1
+                    assignment.append(value)
+                    choices.append(pending)
+                    i += 1
+                    pending = rng.sample((0, 1), 2)
+                continue
+            # Both values failed: undo the previous cell
+            if not assignment:
+                return None
+            i -= 1
+            value = assignment.pop()
+            pending = choices.pop()
+            for j in cell_constraints[i]:
+                need[j] += value
+                left[j] += 1
+        return assignment
+
+    @staticmethod
+    def _ratio(numerator, denominator):
+        """numerator / denominator as a float that is 0 or 1 only when exact."""
+        if numerator == 0:
+            return 0.0
+        if numerator == denominator:
+            return 1.0
+        return min(max(numerator / denominator, nextafter(0.0, 1.0)), nextafter(1.0, 0.0))
+
+    def combine(self, counted, interior):
+        """
+        Combine the component counts with the global mine total.
+
+        Args:
+            counted: (cells, total, mines) of each component
+            interior: hidden cells touching no revealed number
+
+        Returns:
+            dict: {(x, y): probability}, empty if no configuration is possible
+        """
+        remaining = self.remaining_mines
+        # Product of all component totals except one, via prefix and suffix products
+        prefix = [[1]]
+        for _, total, _ in counted:
+            prefix.append(_multiply(prefix[-1], total))
+        suffix = [[1]]
+        for _, total, _ in reversed(counted):
+            suffix.append(_multiply(suffix[-1], total))
+        suffix.reverse()
+
+        def weight(k):
+            rest = remaining - k
+            return comb(len(interior), rest) if 0 <= rest <= len(interior) else 0
+
+        all_total = prefix[-1]
+        norm = sum(ways * weight(k) for k, ways in enumerate(all_total))
+        if norm == 0:
+            return {}
+
+        probabilities = {}
+        for index, (cells, _, mines) in enumerate(counted):
+            others = _multiply(prefix[index], suffix[index + 1])
+            for cell in cells:
+                poly = _multiply(mines[cell], others) if mines[cell] else []
+                probabilities[cell] = self._ratio(
+                    sum(ways * weight(k) for k, ways in enumerate(poly)), norm
+                )
+
+        if interior:
+            interior_mines = sum(
+                ways * weight(k) * (remaining - k) for k, ways in enumerate(all_total)
+            )
+            interior_probability = self._ratio(interior_mines, norm * len(interior))
+            for cell in interior:
+                probabilities[cell] = interior_probability
+        return probabilities
@@ -0,0 +1,127 @@
+"""
+Résolution de fichiers de Sudoku par lots, en parallèle.
+
+Les grilles sont lues au fil de l'eau (voir utils.iter_sudoku_file), regroupées
+en paquets et réparties sur un pool de processus. Chaque résultat est écrit dès
+que son paquet est terminé, avec le temps de résolution de chaque grille.
+
+Exemple:
+    python batch_solve.py HardestDatabase110626.txt -s norvig -o solutions.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+from implems.board import string_to_cells, cells_to_grid, cells_to_string, grid_to_cells
+from utils.solvers import SOLVERS, get_solver, solution_to_grid
+from utils.utils import iter_sudoku_file
+
+
+def solve_chunk(solver_name, chunk):
+    """
+    Résout un paquet de grilles dans un processus du pool.
+
+    Args:
+        solver_name (str): Nom du solveur (clé de SOLVERS)
+        chunk (list): Liste de couples (indice, grille sur 81 caractères)
+
+    Returns:
+        list: Liste de tuples (indice, grille, solution ou '', temps en secondes)
+    """
+    solver = get_solver(solver_name)
+    results = []
+    for index, puzzle in chunk:
+        grid = cells_to_grid(string_to_cells(puzzle))
+        start = time.perf_counter()
+        solution = solution_to_grid(solver(grid))
+        elapsed = time.perf_counter() - start
+        results.append((index, puzzle,
+                        cells_to_string(grid_to_cells(solution)) if solution else '',
+                        elapsed))
+    return results
+
+
+def iter_chunks(file_path, chunksize):
+    """Découpe le flux de grilles d'un fichier en paquets de chunksize grilles."""
+    grids = enumerate(cells_to_string(grid_to_cells(grid))
+                      for grid in iter_sudoku_file(file_path))
+    while True:
+        chunk = list(islice(grids, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(file_path, solver_name, output, workers=None, chunksize=64):
+    """
+    Résout toutes les grilles d'un fichier et écrit les résultats en CSV.
+
+    Le nombre de paquets en cours est borné (deux par processus), de sorte que
+    la mémoire utilisée ne dépend pas de la taille du fichier.
+
+    Args:
+        file_path (str): Fichier de grilles (9 lignes par grille ou 1 ligne de 81 caractères)
+        solver_name (str): Nom du solveur (clé de SOLVERS)
+        output: Flux texte dans lequel écrire les résultats
+        workers (int): Nombre de processus (par défaut, le nombre de cœurs)
+        chunksize (int): Nombre de grilles envoyées à la fois à un processus
+
+    Returns:
+        tuple: (nombre de grilles, nombre de grilles résolues)
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = csv.writer(output)
+    writer.writerow(['index', 'puzzle', 'solution', 'time_ms'])
+
+    total = solved = 0
+    chunks = iter_chunks(file_path, chunksize)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for chunk in islice(chunks, 2 * workers):
+            pending.add(executor.submit(solve_chunk, solver_name, chunk))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for index, puzzle, solution, elapsed in future.result():
+                    writer.writerow([index, puzzle, solution, f'{elapsed * 1000:.3f}'])
+                    total += 1
+                    solved += bool(solution)
+                # Remplace le paquet terminé par le suivant
+                for chunk in islice(chunks, 1):
+                    pending.add(executor.submit(solve_chunk, solver_name, chunk))
+            output.flush()
+
+    return total, solved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Résolution parallèle de fichiers de Sudoku")
+    parser.add_argument('input', help="Fichier de grilles (format hard_test.txt ou HardestDatabase110626.txt)")
+    parser.add_argument('-s', '--solver', default='norvig', choices=sorted(SOLVERS),
+                        help="Solveur à utiliser (défaut: norvig)")
+    parser.add_argument('-o', '--output', help="Fichier CSV de sortie (défaut: sortie standard)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Nombre de processus (défaut: nombre de cœurs)")
+    parser.add_argument('-c', '--chunksize', type=int, default=64,
+                        help="Nombre de grilles par paquet (défaut: 64)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as output:
+            total, solved = run_batch(args.input, args.solver, output, args.workers, args.chunksize)
+    else:
+        total, solved = run_batch(args.input, args.solver, sys.stdout, args.workers, args.chunksize)
+    elapsed = time.perf_counter() - start
+
+    print(f"{solved}/{total} grilles résolues en {elapsed:.2f}s avec le solveur {args.solver}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Banc d'essai des solveurs de Sudoku.
+
+Chaque solveur de implems/ (voir utils.solvers.SOLVERS) est exécuté sur les
+fichiers de grilles du dépôt, dans un processus séparé, avec une limite de temps
+par grille. Pour chaque grille sont mesurés:
+- le temps de résolution (mesure sans instrumentation);
+- le nombre de nœuds de recherche (appels de la fonction de recherche récursive);
+- le pic de mémoire allouée (tracemalloc).
+Les résultats sont écrits en JSON et peuvent être comparés à une référence
+enregistrée pour détecter les régressions.
+
+Utilisation (depuis sudoku_ppc/):
+    python -m benchmark.benchmark -s norvig mrv dlx --save-baseline
+    python -m benchmark.benchmark -s norvig mrv dlx --baseline benchmark/baseline.json
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from implems.board import grid_to_cells, is_solved
+from utils.solvers import SOLVERS, get_solver, solution_to_grid
+from utils.utils import iter_sudoku_file
+
+
+CORPORA = ['test.txt', 'hard_test.txt', 'HardestDatabase110626.txt']
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Fonction de recherche récursive de chaque solveur: (module, attribut[, méthode])
+NODE_COUNTERS = {
+    'backtrack': ('implems.backtrack', 'backtrack'),
+    'mrv': ('implems.mrv', 'backtrack_with_mrv'),
+    'norvig': ('implems.norvig', 'search'),
+    'dlx': ('implems.dlx', 'DancingLinks', '_search'),
+}
+
+# La passe instrumentée (tracemalloc, compteur de nœuds) est plus lente:
+# sa limite de temps est celle de la grille multipliée par ce facteur
+PROFILE_TIMEOUT_FACTOR = 10
+
+
+def install_node_counter(solver_name):
+    """
+    Remplace la fonction de recherche d'un solveur par une version qui compte
+    ses appels. Les appels récursifs passant par le nom global (ou l'attribut de
+    classe), chaque nœud de l'arbre de recherche est compté.
+
+    Returns:
+        list: Compteur à un élément, ou None si le solveur n'a pas de fonction
+        de recherche identifiée.
+    """
+    if solver_name not in NODE_COUNTERS:
+        return None
+    module_name, *path = NODE_COUNTERS[solver_name]
+    owner = importlib.import_module(module_name)
+    for attr in path[:-1]:
+        owner = getattr(owner, attr)
+    original = getattr(owner, path[-1])
+    counter = [0]
+
+    def counted(*args, **kwargs):
+        counter[0] += 1
+        return original(*args, **kwargs)
+
+    setattr(owner, path[-1], counted)
+    return counter
+
+def is_valid_solution(grid, solution):
+    """Vérifie qu'une solution est complète, valide et respecte les chiffres donnés."""
+    if solution is None:
+        return False
+    cells = grid_to_cells(solution)
+    return is_solved(cells) and all(
+        given in (0, value) for given, value in zip(grid_to_cells(grid), cells)
+    )
+
+def worker(solver_name, conn):
+    """
+    Processus de mesure: reçoit des grilles, et pour chacune envoie deux
+    messages, le résultat chronométré puis le profil (nœuds, mémoire).
+    """
+    solver = get_solver(solver_name)
+    counter = install_node_counter(solver_name)
+    while True:
+        grid = conn.recv()
+        if grid is None:
+            return
+
+        # Passe chronométrée, sans instrumentation
+        try:
+            start = time.perf_counter()
+            solution = solution_to_grid(solver(grid))
+            elapsed = time.perf_counter() - start
+            conn.send({'status': 'ok' if is_valid_solution(grid, solution) else 'failed',
+                       'time': elapsed})
+        except Exception as e:
+            conn.send({'status': 'error', 'time': None, 'error': repr(e)})
+            continue
+
+        # Passe instrumentée
+        if counter is not None:
+            counter[0] = 0
+        tracemalloc.start()
+        try:
+            solver(grid)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        conn.send({'nodes': counter[0] if counter is not None else None,
+                   'peak_memory_kb': peak / 1024})
+
+class SolverRunner:
+    """Processus de mesure d'un solveur, relancé après chaque dépassement de temps."""
+
+    def __init__(self, solver_name):
+        self.solver_name = solver_name
+        self.process = None
+        self.conn = None
+
+    def start(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=worker, args=(self.solver_name, child_conn),
+                                               daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.process = None
+
+    def stop(self):
+        if self.process is not None:
+            self.conn.send(None)
+            self.process.join()
+            self.conn.close()
+            self.process = None
+
+    def _receive(self, timeout):
+        """Attend un message du processus, ou le tue si la limite de temps est dépassée."""
+        if self.conn.poll(timeout):
+            try:
+                return self.conn.recv()
+            except EOFError:
+                pass  # Le processus est mort (mémoire épuisée, signal...)
+        self.kill()
+        return None
+
+    def run(self, grid, timeout):
+        """Mesure la résolution d'une grille."""
+        if self.process is None:
+            self.start()
+        self.conn.send(grid)
+
+        record = self._receive(timeout)
+        if record is None:
+            return {'status': 'timeout', 'time': None, 'nodes': None, 'peak_memory_kb': None}
+        record.update(nodes=None, peak_memory_kb=None)
+        if record['status'] == 'error':
+            return record
+
+        profile = self._receive(timeout * PROFILE_TIMEOUT_FACTOR)
+        if profile is not None:
+            record.update(profile)
+        return record
+
+def summarize(records):
+    """Agrège les mesures d'un solveur sur un fichier de grilles."""
+    times = [r['time'] for r in records if r['status'] == 'ok']
+    nodes = [r['nodes'] for r in records if r['status'] == 'ok' and r['nodes'] is not None]
+    memory = [r['peak_memory_kb'] for r in records if r['peak_memory_kb'] is not None]
+    count = len(records)
+    summary = {
+        'grids': count,
+        'solved': len(times),
+        'timeouts': sum(r['status'] == 'timeout' for r in records),
+        'errors': sum(r['status'] == 'error' for r in records),
+        'success_rate': len(times) / count if count else 0.0,
+        'time_total': sum(times),
+        'time_mean': statistics.mean(times) if times else None,
+        'time_median': statistics.median(times) if times else None,
+        'time_p95': sorted(times)[int(0.95 * (len(times) - 1))] if times else None,
+        'time_max': max(times) if times else None,
+        'nodes_mean': statistics.mean(nodes) if nodes else None,
+        'nodes_max': max(nodes) if nodes else None,
+        'peak_memory_kb': max(memory) if memory else None,
+    }
+    return summary
+
+def run_benchmark(solvers, corpora, timeout=10.0, limit=None, details=False, log=sys.stderr):
+    """
+    Exécute chaque solveur sur chaque fichier de grilles.
+
+    Args:
+        solvers: Noms des solveurs (clés de SOLVERS).
+        corpora: Chemins des fichiers de grilles.
+        timeout: Limite de temps par grille, en secondes.
+        limit: Nombre maximal de grilles lues par fichier (None pour toutes).
+        details: Si vrai, conserve aussi les mesures de chaque grille.
+        log: Flux de suivi de l'avancement (None pour aucun).
+
+    Returns:
+        dict: Résultats {'meta': ..., 'results': {solveur: {fichier: résumé}}}
+    """
+    results = {}
+    for solver_name in solvers:
+        runner = SolverRunner(solver_name)
+        results[solver_name] = {}
+        try:
+            for corpus in corpora:
+                records = []
+                for index, grid in enumerate(iter_sudoku_file(corpus)):
+                    if limit is not None and index >= limit:
+                        break
+                    record = runner.run(grid, timeout)
+                    record['index'] = index
+                    records.append(record)
+                summary = summarize(records)
+                if details:
+                    summary['grids_detail'] = records
+                results[solver_name][os.path.basename(corpus)] = summary
+                if log:
+                    mean = summary['time_mean']
+                    print(f"{solver_name:>10} {os.path.basename(corpus):>28}: "
+                          f"{summary['solved']}/{summary['grids']} résolues, "
+                          f"{summary['timeouts']} hors délai, "
+                          f"moyenne {mean * 1000 if mean is not None else float('nan'):.2f} ms",
+                          file=log)
+        finally:
+            runner.stop()
+
+    meta = {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timeout': timeout,
+        'limit': limit,
+    }
+    return {'meta': meta, 'results': results}
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Compare des résultats à une référence.
+
+    Une régression est signalée si le taux de réussite baisse, ou si le temps
+    moyen ou le nombre moyen de nœuds augmente de plus de tolerance (relatif).
+    Seuls les couples (solveur, fichier) présents dans les deux résultats sont
+    comparés.
+
+    Returns:
+        list: Liste de tuples (solveur, fichier, métrique, référence, actuel)
+    """
+    regressions = []
+    for solver_name, corpora in current['results'].items():
+        for corpus, summary in corpora.items():
+            reference = baseline['results'].get(solver_name, {}).get(corpus)
+            if reference is None:
+                continue
+            if summary['success_rate'] < reference['success_rate']:
+                regressions.append((solver_name, corpus, 'success_rate',
+                                    reference['success_rate'], summary['success_rate']))
+            for metric in ('time_mean', 'nodes_mean'):
+                old, new = reference.get(metric), summary.get(metric)
+                if old and new is not None and new > old * (1 + tolerance):
+                    regressions.append((solver_name, corpus, metric, old, new))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des solveurs de Sudoku")
+    parser.add_argument('-s', '--solvers', nargs='+', default=sorted(SOLVERS), choices=sorted(SOLVERS),
+                        help="Solveurs à mesurer (défaut: tous)")
+    parser.add_argument('-c', '--corpora', nargs='+', default=CORPORA,
+                        help="Fichiers de grilles (défaut: fichiers du dépôt)")
+    parser.add_argument('-t', '--timeout', type=float, default=10.0,
+                        help="Limite de temps par grille en secondes (défaut: 10)")
+    parser.add_argument('-n', '--limit', type=int, default=None,
+                        help="Nombre maximal de grilles par fichier")
+    parser.add_argument('-o', '--output', default='benchmark_results.json',
+                        help="Fichier JSON des résultats (défaut: benchmark_results.json)")
+    parser.add_argument('--details', action='store_true',
+                        help="Inclure les mesures de chaque grille dans les résultats")
+    parser.add_argument('--baseline', default=None,
+                        help=f"Référence à comparer (défaut: {DEFAULT_BASELINE} si présente)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Enregistrer les résultats comme nouvelle référence")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Hausse relative tolérée avant de signaler une régression (défaut: 0.2)")
+    args = parser.parse_args(argv)
+
+    current = run_benchmark(args.solvers, args.corpora, args.timeout, args.limit, args.details)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2)
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    regressions = []
+    if not args.save_baseline and os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for solver_name, corpus, metric, old, new in regressions:
+            print(f"RÉGRESSION {solver_name} / {corpus}: {metric} {old:.6g} -> {new:.6g}")
+        if not regressions:
+            print(f"Aucune régression par rapport à {baseline_path}")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Référence enregistrée dans {baseline_path}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
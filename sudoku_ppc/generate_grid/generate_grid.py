@@ -1,101 +1,316 @@
+import argparse
+import os
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def is_valid(grid, row, col, num):
-    # Vérifie la ligne
-    if num in grid[row]:
+from implems.board import (ALL_DIGITS, ROW_OF, COL_OF, BOX_OF, DIGIT_BIT,
+                           POPCOUNT, MASK_DIGITS, grid_to_cells, cells_to_grid,
+                           unit_masks)
+from implems.norvig import ALL_UNITS, propagate, assign
+
+
+# Nombre de cases à vider selon la difficulté (generate_sudoku)
+CELLS_TO_REMOVE = {
+    'facile': 35,
+    'moyen': 45,
+    'difficile': 55
+}
+
+# Bandes de difficulté: nombre de choix (hypothèses) nécessaires à un
+# solveur par propagation de contraintes (voir rate_difficulty)
+DIFFICULTY_BANDS = {
+    'facile': (0, 0),
+    'moyen': (1, 2),
+    'difficile': (3, 10),
+    'extreme': (11, None)
+}
+
+
+def _fill(cells, empties, rows, cols, boxes, rng):
+    """Remplit les cases vides avec MRV, en essayant les chiffres dans un ordre aléatoire."""
+    if not empties:
+        return True
+
+    # Case avec le moins de valeurs possibles (MRV)
+    best_k, best_mask, best_count = -1, 0, 10
+    for k, i in enumerate(empties):
+        mask = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+        if POPCOUNT[mask] < best_count:
+            best_k, best_mask, best_count = k, mask, POPCOUNT[mask]
+            if best_count <= 1:
+                break
+    if best_count == 0:
         return False
-    
-    # Vérifie la colonne
-    for i in range(9):
-        if grid[i][col] == num:
-            return False
-    
-    # Vérifie le bloc 3x3
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-    for i in range(3):
-        for j in range(3):
-            if grid[start_row + i][start_col + j] == num:
-                return False
-    return True
-
-def generate_full_sudoku():
-    grid = [[0 for _ in range(9)] for _ in range(9)]
-    
-    # Remplit les blocs diagonaux 3x3
-    for box in range(0, 9, 3):
-        nums = list(range(1, 10))
-        random.shuffle(nums)
-        for i in range(3):
-            for j in range(3):
-                grid[box + i][box + j] = nums.pop()
-    
-    # Remplit le reste avec backtracking
-    def backtrack(row, col):
-        if row == 9:
+
+    empties[best_k], empties[-1] = empties[-1], empties[best_k]
+    pos = empties.pop()
+    r, c, b = ROW_OF[pos], COL_OF[pos], BOX_OF[pos]
+    digits = list(MASK_DIGITS[best_mask])
+    rng.shuffle(digits)
+    for num in digits:
+        bit = DIGIT_BIT[num]
+        cells[pos] = num
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        if _fill(cells, empties, rows, cols, boxes, rng):
             return True
-        if col == 9:
-            return backtrack(row + 1, 0)
-        if grid[row][col] != 0:
-            return backtrack(row, col + 1)
-        
-        for num in random.sample(range(1, 10), 9):  # Ordre aléatoire
-            if is_valid(grid, row, col, num):
-                grid[row][col] = num
-                if backtrack(row, col + 1):
-                    return True
-                grid[row][col] = 0
+        rows[r] &= ~bit
+        cols[c] &= ~bit
+        boxes[b] &= ~bit
+    cells[pos] = 0
+    empties.append(pos)
+    return False
+
+def _count(empties, rows, cols, boxes, banned, limit):
+    """
+    Compte les solutions (au plus limit) par backtracking MRV sur les masques.
+
+    banned[i] contient les chiffres interdits en plus des contraintes du Sudoku
+    pour la case i, ce qui permet de chercher une solution différente d'une
+    solution connue sans copier la grille.
+    """
+    if not empties:
+        return 1
+
+    best_k, best_mask, best_count = -1, 0, 10
+    for k, i in enumerate(empties):
+        mask = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]] | banned[i])
+        if POPCOUNT[mask] < best_count:
+            best_k, best_mask, best_count = k, mask, POPCOUNT[mask]
+            if best_count <= 1:
+                break
+    if best_count == 0:
+        return 0
+
+    last = len(empties) - 1
+    empties[best_k], empties[last] = empties[last], empties[best_k]
+    pos = empties.pop()
+    r, c, b = ROW_OF[pos], COL_OF[pos], BOX_OF[pos]
+    total = 0
+    for num in MASK_DIGITS[best_mask]:
+        bit = DIGIT_BIT[num]
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        total += _count(empties, rows, cols, boxes, banned, limit - total)
+        rows[r] &= ~bit
+        cols[c] &= ~bit
+        boxes[b] &= ~bit
+        if total >= limit:
+            break
+    empties.append(pos)
+    empties[best_k], empties[last] = empties[last], empties[best_k]
+    return total
+
+def generate_full_sudoku(rng=random):
+    """Génère une grille complète aléatoire."""
+    cells = [0] * 81
+    rows, cols, boxes = [0] * 9, [0] * 9, [0] * 9
+    _fill(cells, list(range(81)), rows, cols, boxes, rng)
+    return cells_to_grid(cells)
+
+def count_solutions(grid, limit=2):
+    """
+    Compte les solutions d'une grille en s'arrêtant dès que limit est atteint.
+
+    Args:
+        grid: Une grille de Sudoku 9x9 (les cases vides valant 0).
+        limit: Nombre maximal de solutions à compter (2 suffit pour tester l'unicité).
+
+    Returns:
+        int: Le nombre de solutions, borné par limit.
+    """
+    cells = grid_to_cells(grid)
+    masks = unit_masks(cells)
+    if masks is None:
+        return 0
+    rows, cols, boxes = masks
+    empties = [i for i in range(81) if cells[i] == 0]
+    return _count(empties, rows, cols, boxes, [0] * 81, limit)
+
+def rate_difficulty(grid):
+    """
+    Évalue la difficulté d'une grille: nombre de choix (hypothèses) que doit
+    faire le solveur par propagation de contraintes (voir implems/norvig.py)
+    avant de trouver la solution. 0 signifie que la propagation suffit.
+    """
+    values = [DIGIT_BIT[v] if v else ALL_DIGITS for v in grid_to_cells(grid)]
+    if not propagate(values, [i for i in range(81) if POPCOUNT[values[i]] == 1], ALL_UNITS):
+        return None
+
+    guesses = 0
+
+    def rated_search(values):
+        nonlocal guesses
+        unsolved = [i for i in range(81) if POPCOUNT[values[i]] > 1]
+        if not unsolved:
+            return values
+        s = min(unsolved, key=lambda i: POPCOUNT[values[i]])
+        for d in MASK_DIGITS[values[s]]:
+            guesses += 1
+            attempt = values.copy()
+            if assign(attempt, s, DIGIT_BIT[d]) and rated_search(attempt):
+                return attempt
         return False
-    
-    backtrack(0, 0)
-    return grid
-
-def count_solutions(grid):
-    for i in range(9):
-        for j in range(9):
-            if grid[i][j] == 0:
-                count = 0
-                for num in range(1, 10):
-                    if is_valid(grid, i, j, num):
-                        grid[i][j] = num
-                        count += count_solutions(grid)
-                        grid[i][j] = 0
-                        if count > 1:
-                            return count
-                return count
-    return 1  # Solution unique
+
+    rated_search(values)
+    return guesses
+
+def remove_clues(solution, target_clues, rng=random):
+    """
+    Retire des chiffres d'une grille complète tant que la solution reste unique.
+
+    Le test d'unicité est incrémental: les masques de lignes, colonnes et blocs
+    sont mis à jour à chaque retrait, et retirer le chiffre v de la case i ne
+    garde une solution unique que s'il n'existe aucune solution avec une autre
+    valeur que v en i. Une seule solution est donc cherchée par essai.
+
+    Args:
+        solution: Grille complète 9x9.
+        target_clues: Nombre de chiffres à conserver (au plus).
+        rng: Générateur aléatoire.
+
+    Returns:
+        list: La grille 9x9 obtenue, dont le nombre de chiffres est au moins target_clues.
+    """
+    cells = grid_to_cells(solution)
+    rows, cols, boxes = unit_masks(cells)
+    banned = [0] * 81
+    empties = []
+    clues = 81
+
+    order = list(range(81))
+    rng.shuffle(order)
+    for pos in order:
+        if clues <= target_clues:
+            break
+        num = cells[pos]
+        bit = DIGIT_BIT[num]
+        r, c, b = ROW_OF[pos], COL_OF[pos], BOX_OF[pos]
+
+        # Retire le chiffre et cherche une solution où la case prend une autre valeur
+        rows[r] &= ~bit
+        cols[c] &= ~bit
+        boxes[b] &= ~bit
+        empties.append(pos)
+        banned[pos] = bit
+        other = _count(empties, rows, cols, boxes, banned, 1)
+        banned[pos] = 0
+
+        if other:
+            # La solution ne serait plus unique: annule le retrait
+            empties.pop()
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+        else:
+            cells[pos] = 0
+            clues -= 1
+
+    return cells_to_grid(cells)
+
+def in_band(score, band):
+    """Vérifie qu'un score de difficulté appartient à une bande de DIFFICULTY_BANDS."""
+    low, high = DIFFICULTY_BANDS[band]
+    return score >= low and (high is None or score <= high)
+
+def generate_puzzle(clues=None, band=None, rng=random, max_attempts=1000):
+    """
+    Génère une grille à solution unique.
+
+    Args:
+        clues: Nombre de chiffres visés (None pour une grille minimale).
+        band: Bande de difficulté visée (clé de DIFFICULTY_BANDS) ou None.
+        rng: Générateur aléatoire.
+        max_attempts: Nombre maximal de grilles complètes essayées.
+
+    Returns:
+        tuple: (grille, solution, score de difficulté), ou None si aucune grille
+        ne satisfait les critères après max_attempts essais.
+    """
+    target = clues if clues is not None else 0
+    for _ in range(max_attempts):
+        solution = generate_full_sudoku(rng)
+        puzzle = remove_clues(solution, target, rng)
+        if clues is not None and sum(v != 0 for row in puzzle for v in row) != clues:
+            continue
+        score = rate_difficulty(puzzle)
+        if band is None or in_band(score, band):
+            return puzzle, solution, score
+    return None
+
+def _generate_task(args):
+    """Génère une grille dans un processus du pool (graine déterministe)."""
+    seed, clues, band, max_attempts = args
+    return generate_puzzle(clues, band, random.Random(seed), max_attempts)
+
+def generate_puzzles(count, clues=None, band=None, workers=None, seed=None, max_attempts=1000):
+    """
+    Génère count grilles à solution unique en parallèle.
+
+    Chaque grille utilise sa propre graine (seed + indice), ce qui rend la
+    génération reproductible quel que soit le nombre de processus.
+
+    Yields:
+        tuple: (grille, solution, score de difficulté), dans l'ordre des graines.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    tasks = ((seed + i, clues, band, max_attempts) for i in range(count))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from (r for r in map(_generate_task, tasks) if r is not None)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_generate_task, tasks, chunksize=4):
+            if result is not None:
+                yield result
+
+def write_grid(file, grid):
+    """Écrit une grille au format lu par process_sudoku_file (9 lignes puis une ligne vide)."""
+    for row in grid:
+        file.write(''.join(str(v) for v in row) + "\n")
+    file.write("\n")
 
 def generate_sudoku(difficulty='medium'):
     full_grid = generate_full_sudoku()
-    cells = [(i, j) for i in range(9) for j in range(9)]
-    random.shuffle(cells)
-    
+
     # Nombre de cases à vider selon la difficulté
-    to_remove = {
-        'facile': 35,
-        'moyen': 45,
-        'difficile': 55
-    }.get(difficulty, 45)
-    
-    puzzle = [row.copy() for row in full_grid]
-    removed = 0
-    
-    for (i, j) in cells:
-        if removed >= to_remove:
-            break
-        original = puzzle[i][j]
-        puzzle[i][j] = 0
-        
-        # Vérifie que la solution reste unique
-        grid_copy = [row.copy() for row in puzzle]
-        if count_solutions(grid_copy) == 1:
-            removed += 1
-        else:
-            puzzle[i][j] = original  # Annule la suppression
-    
-    return puzzle
+    to_remove = CELLS_TO_REMOVE.get(difficulty, 45)
+
+    return remove_clues(full_grid, 81 - to_remove)
+
+# Utilisation (depuis sudoku_ppc/):
+#   python -m generate_grid.generate_grid -n 1000 -d difficile -o grilles.txt
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génération de grilles de Sudoku à solution unique")
+    parser.add_argument('-n', '--count', type=int, default=10, help="Nombre de grilles (défaut: 10)")
+    parser.add_argument('--clues', type=int, default=None,
+                        help="Nombre exact de chiffres donnés (défaut: grille minimale)")
+    parser.add_argument('-d', '--difficulty', choices=list(DIFFICULTY_BANDS), default=None,
+                        help="Bande de difficulté visée")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Nombre de processus (défaut: nombre de cœurs)")
+    parser.add_argument('--seed', type=int, default=None, help="Graine aléatoire")
+    parser.add_argument('-o', '--output', help="Fichier de sortie (défaut: sortie standard)")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        generated = 0
+        for puzzle, _, _ in generate_puzzles(args.count, args.clues, args.difficulty,
+                                             args.workers, args.seed):
+            write_grid(output, puzzle)
+            output.flush()
+            generated += 1
+    finally:
+        if args.output:
+            output.close()
+    if generated < args.count:
+        print(f"{args.count - generated} grilles n'ont pas pu être générées", file=sys.stderr)
 
 # Exemple d'utilisation
 if __name__ == "__main__":
-    sudoku = generate_sudoku('moyen')
-    for row in sudoku:
-        print(row)
\ No newline at end of file
+    main()
@@ -1,48 +1,44 @@
-def find_empty_cell(grid):
-    """Trouve la prochaine cellule vide (valeur 0) dans la grille"""
-    for row in range(9):
-        for col in range(9):
-            if grid[row][col] == 0:
-                return (row, col)
-    return None
+from implems.board import (ALL_DIGITS, ROW_OF, COL_OF, BOX_OF, DIGIT_BIT,
+                           MASK_DIGITS, grid_to_cells, cells_to_grid, unit_masks)
 
-def is_valid(grid, row, col, num):
-    """Vérifie si un nombre peut être placé dans une cellule (identique à votre version existante)"""
-    # Vérifie la ligne
-    if num in grid[row]:
-        return False
-    
-    # Vérifie la colonne
-    for i in range(9):
-        if grid[i][col] == num:
-            return False
-    
-    # Vérifie le bloc 3x3
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-    for i in range(3):
-        for j in range(3):
-            if grid[start_row + i][start_col + j] == num:
-                return False
-    return True
 
 def solve_sudoku_backtracking(input_grid):
     """Résout un Sudoku et retourne la grille solution complète"""
-    # Crée une copie profonde pour ne pas modifier l'original
-    grid = [row.copy() for row in input_grid]
+    # Copie la grille dans un tableau plat pour ne pas modifier l'original
+    cells = grid_to_cells(input_grid)
+    
+    # Masques des chiffres déjà utilisés par ligne, colonne et bloc
+    masks = unit_masks(cells)
+    if masks is None:
+        return None
+    rows, cols, boxes = masks
     
-    def backtrack():
-        cell = find_empty_cell(grid)
-        if not cell:
-            return True  # Sudoku résolu
-        
-        row, col = cell
-        for num in range(1, 10):
-            if is_valid(grid, row, col, num):
-                grid[row][col] = num
-                if backtrack():
-                    return True
-                grid[row][col] = 0  # Backtrack
-        return False
+    # Cases vides, dans l'ordre de lecture
+    empties = [i for i in range(81) if cells[i] == 0]
     
     # Retourne la grille résolue ou None si pas de solution
-    return grid if backtrack() else None
\ No newline at end of file
+    return cells_to_grid(cells) if backtrack(cells, empties, 0, rows, cols, boxes) else None
+
+def backtrack(cells, empties, k, rows, cols, boxes):
+    """Remplit récursivement les cases vides à partir de la k-ième."""
+    if k == len(empties):
+        return True  # Sudoku résolu
+    
+    pos = empties[k]
+    r, c, b = ROW_OF[pos], COL_OF[pos], BOX_OF[pos]
+    
+    # Seules les valeurs absentes de la ligne, colonne et bloc sont essayées
+    candidates = ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b])
+    for num in MASK_DIGITS[candidates]:
+        bit = DIGIT_BIT[num]
+        cells[pos] = num
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        if backtrack(cells, empties, k + 1, rows, cols, boxes):
+            return True
+        rows[r] &= ~bit  # Backtrack
+        cols[c] &= ~bit
+        boxes[b] &= ~bit
+    cells[pos] = 0
+    return False
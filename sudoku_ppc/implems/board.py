@@ -0,0 +1,161 @@
+"""
+Noyau commun de représentation d'une grille de Sudoku.
+
+La grille est stockée sous forme d'un tableau plat de 81 cases (indice
+``i = 9 * ligne + colonne``). Les candidats d'une case sont représentés par
+un masque de 9 bits : le bit ``d - 1`` est levé si le chiffre ``d`` est encore
+possible. Les tables d'unités et de pairs sont calculées une seule fois au
+chargement du module et partagées par tous les solveurs.
+"""
+
+# Masque contenant les 9 chiffres
+ALL_DIGITS = 0x1FF
+
+# Coordonnées de chaque case
+ROW_OF = tuple(i // 9 for i in range(81))
+COL_OF = tuple(i % 9 for i in range(81))
+BOX_OF = tuple((i // 27) * 3 + (i % 9) // 3 for i in range(81))
+
+# Les 27 unités : 9 lignes, 9 colonnes puis 9 blocs 3x3
+UNITS = (
+    tuple(tuple(r * 9 + c for c in range(9)) for r in range(9)) +
+    tuple(tuple(r * 9 + c for r in range(9)) for c in range(9)) +
+    tuple(
+        tuple(r * 9 + c
+              for r in range(br, br + 3)
+              for c in range(bc, bc + 3))
+        for br in (0, 3, 6)
+        for bc in (0, 3, 6)
+    )
+)
+
+# Pour chaque case, les indices (dans UNITS) de ses trois unités
+CELL_UNIT_INDICES = tuple(
+    (ROW_OF[i], 9 + COL_OF[i], 18 + BOX_OF[i]) for i in range(81)
+)
+
+# Pour chaque case, les trois unités qui la contiennent (ligne, colonne, bloc)
+CELL_UNITS = tuple(
+    tuple(UNITS[u] for u in CELL_UNIT_INDICES[i]) for i in range(81)
+)
+
+# Pour chaque case, les 20 cases qui partagent une unité avec elle
+PEERS = tuple(
+    tuple(sorted(set(CELL_UNITS[i][0] + CELL_UNITS[i][1] + CELL_UNITS[i][2]) - {i}))
+    for i in range(81)
+)
+
+# Masque d'un chiffre : DIGIT_BIT[d] pour d dans 1..9 (DIGIT_BIT[0] = 0)
+DIGIT_BIT = (0,) + tuple(1 << (d - 1) for d in range(1, 10))
+
+# Tables indexées par un masque de 9 bits
+POPCOUNT = tuple(bin(m).count('1') for m in range(512))
+MASK_DIGITS = tuple(
+    tuple(d for d in range(1, 10) if m & DIGIT_BIT[d])
+    for m in range(512)
+)
+# Chiffre correspondant à un masque à un seul bit (0 sinon)
+MASK_TO_DIGIT = tuple(
+    MASK_DIGITS[m][0] if POPCOUNT[m] == 1 else 0
+    for m in range(512)
+)
+
+
+def grid_to_cells(grid):
+    """
+    Convertit une grille 9x9 (liste de listes) en tableau plat de 81 valeurs.
+
+    Args:
+        grid: Une grille de Sudoku 9x9, les cases vides valant 0.
+
+    Returns:
+        list: Les 81 valeurs de la grille, ligne par ligne.
+    """
+    return [int(v) for row in grid for v in row]
+
+
+def cells_to_grid(cells):
+    """
+    Convertit un tableau plat de 81 valeurs en grille 9x9 (liste de listes).
+    """
+    return [list(cells[r * 9:(r + 1) * 9]) for r in range(9)]
+
+
+def string_to_cells(line):
+    """
+    Convertit une grille sur une ligne (81 caractères, '.' ou '0' pour les
+    cases vides) en tableau plat de 81 valeurs.
+    """
+    return [0 if ch in '.0' else int(ch) for ch in line[:81]]
+
+
+def cells_to_string(cells):
+    """
+    Convertit un tableau plat de 81 valeurs en chaîne de 81 chiffres.
+    """
+    return ''.join(str(v) for v in cells)
+
+
+def unit_masks(cells):
+    """
+    Calcule les masques des chiffres déjà placés dans chaque ligne, colonne
+    et bloc.
+
+    Args:
+        cells: Tableau plat de 81 valeurs.
+
+    Returns:
+        tuple: (rows, cols, boxes), trois listes de 9 masques, ou None si
+        un chiffre apparaît deux fois dans une même unité.
+    """
+    rows = [0] * 9
+    cols = [0] * 9
+    boxes = [0] * 9
+    for i, v in enumerate(cells):
+        if v:
+            bit = DIGIT_BIT[v]
+            r, c, b = ROW_OF[i], COL_OF[i], BOX_OF[i]
+            if (rows[r] | cols[c] | boxes[b]) & bit:
+                return None
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+    return rows, cols, boxes
+
+
+def candidate_masks(cells):
+    """
+    Calcule le masque des candidats de chaque case à partir des chiffres
+    déjà placés.
+
+    Args:
+        cells: Tableau plat de 81 valeurs.
+
+    Returns:
+        list: 81 masques de candidats (le masque d'une case remplie ne
+        contient que son chiffre), ou None si la grille est contradictoire.
+    """
+    masks = unit_masks(cells)
+    if masks is None:
+        return None
+    rows, cols, boxes = masks
+    return [
+        DIGIT_BIT[v] if v else
+        ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+        for i, v in enumerate(cells)
+    ]
+
+
+def is_solved(cells):
+    """
+    Vérifie qu'un tableau de 81 valeurs est une grille complète et valide.
+    """
+    if len(cells) != 81 or 0 in cells:
+        return False
+    for unit in UNITS:
+        seen = 0
+        for i in unit:
+            seen |= DIGIT_BIT[cells[i]]
+        if seen != ALL_DIGITS:
+            return False
+    return True
@@ -1,309 +1,327 @@
+from implems.board import ROW_OF, COL_OF, BOX_OF, grid_to_cells, cells_to_grid
+
+
 class DancingLinks:
     """
     Implémentation de l'algorithme Dancing Links (DLX) pour résoudre
     des problèmes de couverture exacte.
+
+    Les nœuds ne sont pas des objets Python: chaque nœud est un indice entier
+    et ses liens sont stockés dans des tableaux plats (left, right, up, down).
+    Le nœud 0 est l'en-tête principal et les nœuds 1..num_cols sont les
+    en-têtes de colonnes, la colonne c ayant pour en-tête le nœud c + 1.
     """
     def __init__(self):
-        self.header = None  # En-tête de la matrice de contraintes
+        # Liens circulaires de chaque nœud
+        self.left = []
+        self.right = []
+        self.up = []
+        self.down = []
+        self.column = []  # En-tête de colonne de chaque nœud
+        self.row = []  # Identifiant de ligne de chaque nœud (-1 pour les en-têtes)
+        self.size = []  # Nombre de nœuds de chaque colonne (indexé par nœud d'en-tête)
+
         self.solution = []  # Solution courante
-        self.final_solution = None  # Solution finale
-        self.found_solution = False  # Indicateur de solution trouvée
-    
-    class Node:
-        """Nœud de la matrice de Dancing Links."""
-        def __init__(self, row, col):
-            self.row = row  # Identifiant de la ligne
-            self.col = col  # Identifiant de la colonne
-            
-            # Pointeurs pour les liens circulaires
-            self.left = self
-            self.right = self
-            self.up = self
-            self.down = self
-            
-            # Colonne du nœud (pour les nœuds de données)
-            # Taille de la colonne (pour les nœuds d'en-tête)
-            self.column = None
-            self.size = 0
-    
+        self.final_solution = None  # Première solution trouvée
+        self.count = 0  # Nombre de solutions trouvées
+
     def create_header(self, num_cols):
         """Crée l'en-tête de la matrice avec le nombre spécifié de colonnes."""
-        self.header = self.Node(-1, -1)  # Nœud d'en-tête principal
-        prev_node = self.header
-        
-        # Crée les nœuds d'en-tête pour chaque colonne
-        for col in range(num_cols):
-            new_node = self.Node(-1, col)
-            new_node.column = new_node  # Le nœud d'en-tête de colonne pointe vers lui-même
-            
-            # Insère le nouveau nœud dans la liste circulaire horizontale
-            new_node.left = prev_node
-            prev_node.right = new_node
-            new_node.right = self.header
-            self.header.left = new_node
-            
-            prev_node = new_node
-    
+        n = num_cols + 1
+        self.left = [n - 1] + list(range(n - 1))
+        self.right = list(range(1, n)) + [0]
+        self.up = list(range(n))
+        self.down = list(range(n))
+        self.column = list(range(n))
+        self.row = [-1] * n
+        self.size = [0] * n
+
     def add_row(self, row, cols):
         """
         Ajoute une ligne à la matrice.
         row: identifiant de la ligne
         cols: liste des indices de colonnes où cette ligne a des 1
+
+        Returns:
+            int: Le premier nœud de la ligne
         """
-        prev_node = None
-        first_node = None
-        
-        for col in cols:
-            # Crée un nouveau nœud
-            new_node = self.Node(row, col)
-            
-            # Trouve le nœud d'en-tête de colonne
-            col_node = self.header
-            for _ in range(col + 1):
-                col_node = col_node.right
-            
-            # Insère le nouveau nœud dans la liste circulaire verticale
-            new_node.up = col_node.up
-            col_node.up.down = new_node
-            new_node.down = col_node
-            col_node.up = new_node
-            
-            # Associe le nœud à sa colonne
-            new_node.column = col_node
-            
-            # Incrémente la taille de la colonne
-            col_node.size += 1
-            
+        left, right, up, down = self.left, self.right, self.up, self.down
+        first = len(left)
+
+        for k, col in enumerate(cols):
+            node = first + k
+            header = col + 1
+
+            # Insère le nouveau nœud en bas de la liste circulaire verticale
+            up.append(up[header])
+            down.append(header)
+            down[up[header]] = node
+            up[header] = node
+
             # Insère le nouveau nœud dans la liste circulaire horizontale
-            if prev_node:
-                new_node.left = prev_node
-                prev_node.right = new_node
-            else:
-                first_node = new_node
-            
-            prev_node = new_node
-        
-        # Complète la liste circulaire horizontale
-        if first_node and prev_node:
-            first_node.left = prev_node
-            prev_node.right = first_node
-    
-    def cover_column(self, col_node):
-        """Couvre une colonne en la retirant de la matrice."""
-        col_node.right.left = col_node.left
-        col_node.left.right = col_node.right
-        
-        i = col_node.down
-        while i != col_node:
-            j = i.right
+            left.append(node - 1 if k else first + len(cols) - 1)
+            right.append(node + 1 if k < len(cols) - 1 else first)
+
+            self.column.append(header)
+            self.row.append(row)
+            self.size[header] += 1
+
+        return first
+
+    def cover_column(self, c):
+        """Couvre une colonne (donnée par son nœud d'en-tête) en la retirant de la matrice."""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+
+        i = down[c]
+        while i != c:
+            j = right[i]
             while j != i:
-                j.down.up = j.up
-                j.up.down = j.down
-                j.column.size -= 1
-                j = j.right
-            i = i.down
-    
-    def uncover_column(self, col_node):
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover_column(self, c):
         """Découvre une colonne précédemment couverte."""
-        i = col_node.up
-        while i != col_node:
-            j = i.left
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+
+        i = up[c]
+        while i != c:
+            j = left[i]
             while j != i:
-                j.column.size += 1
-                j.down.up = j
-                j.up.down = j
-                j = j.left
-            i = i.up
-        
-        col_node.right.left = col_node
-        col_node.left.right = col_node
-    
-    def search(self, k):
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+
+        right[left[c]] = c
+        left[right[c]] = c
+
+    def search(self, limit=1):
         """
-        Recherche récursive de solutions (Algorithme X de Knuth).
-        k: profondeur de recherche actuelle
+        Recherche les solutions (Algorithme X de Knuth), en s'arrêtant dès que
+        limit solutions ont été trouvées.
+
+        La matrice est entièrement restaurée à la fin de la recherche, ce qui
+        permet de la réutiliser.
+
+        Args:
+            limit: Nombre maximal de solutions à compter.
+
+        Returns:
+            int: Le nombre de solutions trouvées (au plus limit).
         """
-        if self.found_solution:
-            return
-        
+        self.solution = []
+        self.final_solution = None
+        self.count = 0
+        self._search(limit)
+        return self.count
+
+    def _search(self, limit):
+        """Recherche récursive de solutions."""
+        right, down, size = self.right, self.down, self.size
+
         # Si l'en-tête est vide, une solution a été trouvée
-        if self.header.right == self.header:
-            self.final_solution = self.solution.copy()
-            self.found_solution = True
+        if right[0] == 0:
+            if self.final_solution is None:
+                self.final_solution = self.solution.copy()
+            self.count += 1
             return
-        
+
         # Choix de la colonne avec le moins de nœuds (heuristique de Knuth)
-        min_size = float('inf')
-        col_node = None
-        j = self.header.right
-        
-        while j != self.header:
-            if j.size < min_size:
-                min_size = j.size
-                col_node = j
-            j = j.right
-        
+        col = right[0]
+        min_size = size[col]
+        j = right[col]
+        while j != 0 and min_size > 1:
+            if size[j] < min_size:
+                min_size = size[j]
+                col = j
+            j = right[j]
+
+        if min_size == 0:
+            return  # Contrainte impossible à satisfaire
+
         # Couvre la colonne choisie
-        self.cover_column(col_node)
-        
+        self.cover_column(col)
+
         # Explore toutes les lignes de cette colonne
-        r = col_node.down
-        while r != col_node:
-            self.solution.append(r.row)
-            
+        r = down[col]
+        while r != col:
+            self.solution.append(self.row[r])
+
             # Couvre toutes les colonnes touchées par cette ligne
-            j = r.right
+            j = right[r]
             while j != r:
-                self.cover_column(j.column)
-                j = j.right
-            
+                self.cover_column(self.column[j])
+                j = right[j]
+
             # Appel récursif
-            self.search(k + 1)
-            
-            if self.found_solution:
-                return
-            
-            # Retour en arrière
-            self.solution.pop()
-            
-            # Découvre toutes les colonnes touchées par cette ligne
-            j = r.left
+            self._search(limit)
+
+            # Retour en arrière: découvre toutes les colonnes touchées par cette ligne
+            j = self.left[r]
             while j != r:
-                self.uncover_column(j.column)
-                j = j.left
-            
-            r = r.down
-        
+                self.uncover_column(self.column[j])
+                j = self.left[j]
+
+            self.solution.pop()
+
+            if self.count >= limit:
+                break
+
+            r = down[r]
+
         # Découvre la colonne choisie
-        self.uncover_column(col_node)
+        self.uncover_column(col)
+
+
+class SudokuDLX:
+    """
+    Matrice de couverture exacte du Sudoku (729 lignes x 324 colonnes),
+    construite une seule fois et réutilisée pour chaque grille.
+
+    Le problème du Sudoku a 4 contraintes:
+    1. Chaque case doit avoir un chiffre
+    2. Chaque ligne doit contenir les chiffres 1-9
+    3. Chaque colonne doit contenir les chiffres 1-9
+    4. Chaque bloc 3x3 doit contenir les chiffres 1-9
+
+    L'identifiant de ligne encode la case et la valeur: row_id = 9 * case + (val - 1).
+    Pour une grille donnée, les lignes des chiffres déjà placés sont
+    sélectionnées (leurs colonnes sont couvertes), puis découvertes après la
+    recherche pour remettre la matrice dans son état initial.
+    """
+    def __init__(self):
+        self.dlx = DancingLinks()
+
+        # Nombre total de contraintes: 9x9 + 9x9 + 9x9 + 9x9 = 324
+        self.dlx.create_header(4 * 9 * 9)
+
+        # Premier nœud de chaque ligne de la matrice
+        self.row_nodes = []
+        for i in range(81):
+            for val in range(1, 10):
+                constraints = [
+                    i,                                   # Case i a une valeur
+                    81 + ROW_OF[i] * 9 + (val - 1),      # Ligne a la valeur val
+                    162 + COL_OF[i] * 9 + (val - 1),     # Colonne a la valeur val
+                    243 + BOX_OF[i] * 9 + (val - 1)      # Bloc a la valeur val
+                ]
+                self.row_nodes.append(self.dlx.add_row(9 * i + (val - 1), constraints))
+
+    def solve(self, grid, limit=1):
+        """
+        Cherche les solutions d'une grille.
+
+        Args:
+            grid: Une grille de Sudoku 9x9 (les cases vides valant 0).
+            limit: Nombre maximal de solutions à compter.
+
+        Returns:
+            tuple: (nombre de solutions trouvées, au plus limit;
+                    première solution sous forme de 81 valeurs ou None)
+        """
+        dlx = self.dlx
+        cells = grid_to_cells(grid)
+        covered = []
+        count = 0
+
+        # Sélectionne les lignes des chiffres donnés
+        consistent = True
+        for i, val in enumerate(cells):
+            if val == 0:
+                continue
+            node = self.row_nodes[9 * i + (val - 1)]
+            for k in range(4):
+                c = dlx.column[node + k]
+                # Une colonne déjà couverte signifie deux chiffres donnés en conflit
+                if c in covered:
+                    consistent = False
+                    break
+                dlx.cover_column(c)
+                covered.append(c)
+            if not consistent:
+                break
+
+        if consistent:
+            count = dlx.search(limit)
+
+        # Remet la matrice dans son état initial
+        for c in reversed(covered):
+            dlx.uncover_column(c)
+
+        if count == 0:
+            return 0, None
+
+        # Convertit la solution de DLX en grille de Sudoku
+        for row_id in dlx.final_solution:
+            # Décode la ligne pour obtenir la case et la valeur
+            i, val = divmod(row_id, 9)
+            cells[i] = val + 1
+        return count, cells
+
+
+# Matrice partagée par tous les appels d'un même processus
+_sudoku_matrix = None
+
+
+def get_sudoku_matrix():
+    """Retourne la matrice de couverture du Sudoku, construite au premier appel."""
+    global _sudoku_matrix
+    if _sudoku_matrix is None:
+        _sudoku_matrix = SudokuDLX()
+    return _sudoku_matrix
 
 
 def solve_sudoku_dlx(grid):
     """
     Résout un Sudoku en utilisant l'algorithme Dancing Links (DLX).
-    
+
     Args:
         grid: Une grille de Sudoku 9x9 représentée comme une liste de listes.
               Les cases vides sont représentées par 0.
-    
+
     Returns:
         La grille résolue si une solution existe, None sinon.
     """
-    # Crée une instance de DancingLinks
-    dlx = DancingLinks()
-    
-    # Le problème du Sudoku a 4 contraintes:
-    # 1. Chaque case doit avoir un chiffre
-    # 2. Chaque ligne doit contenir les chiffres 1-9
-    # 3. Chaque colonne doit contenir les chiffres 1-9
-    # 4. Chaque bloc 3x3 doit contenir les chiffres 1-9
-    
-    # Nombre total de contraintes: 9x9 + 9x9 + 9x9 + 9x9 = 324
-    num_constraints = 4 * 9 * 9
-    
-    # Crée l'en-tête de la matrice
-    dlx.create_header(num_constraints)
-    
-    # Carte les indices de contraintes
-    def get_constraint_index(constraint_type, i, j, val):
-        if constraint_type == 0:  # Case (i,j) a une valeur
-            return i * 9 + j
-        elif constraint_type == 1:  # Ligne i a la valeur val
-            return 81 + i * 9 + (val - 1)
-        elif constraint_type == 2:  # Colonne j a la valeur val
-            return 162 + j * 9 + (val - 1)
-        else:  # Bloc (i//3, j//3) a la valeur val
-            block = (i // 3) * 3 + (j // 3)
-            return 243 + block * 9 + (val - 1)
-    
-    # Pour chaque case possible, ajoute une ligne à la matrice
-    row_id = 0
-    for i in range(9):
-        for j in range(9):
-            # Si la case a déjà une valeur, n'ajoute qu'une ligne pour cette valeur
-            if grid[i][j] != 0:
-                val = grid[i][j]
-                # Cette ligne satisfait les 4 contraintes pour la valeur donnée
-                constraints = [
-                    get_constraint_index(0, i, j, val),  # Case (i,j) a une valeur
-                    get_constraint_index(1, i, j, val),  # Ligne i a la valeur val
-                    get_constraint_index(2, i, j, val),  # Colonne j a la valeur val
-                    get_constraint_index(3, i, j, val)   # Bloc a la valeur val
-                ]
-                dlx.add_row(row_id, constraints)
-                row_id += 1
-            else:
-                # Pour les cases vides, considère toutes les valeurs possibles
-                for val in range(1, 10):
-                    # Chaque valeur possible satisfait les 4 contraintes
-                    constraints = [
-                        get_constraint_index(0, i, j, val),
-                        get_constraint_index(1, i, j, val),
-                        get_constraint_index(2, i, j, val),
-                        get_constraint_index(3, i, j, val)
-                    ]
-                    dlx.add_row(row_id, constraints)
-                    row_id += 1
-    
-    # Commence la recherche
-    dlx.search(0)
-    
-    if dlx.final_solution:
-        # Convertit la solution de DLX en grille de Sudoku
-        result = [row.copy() for row in grid]  # Copie la grille d'entrée
-        
-        # Pour chaque ligne de la solution
-        for row_index in dlx.final_solution:
-            # Décode la ligne pour obtenir la case et la valeur
-            # Pour les cases préremplies, row_index < 81
-            if row_index < 81:
-                continue  # Déjà dans la grille d'entrée
-            
-            # Pour les cases vides, row_index est entre 81 et 81 + 9*9*9 - 1
-            row_index -= 81  # Ajusté pour les cases préremplies
-            
-            # Calcule i, j, val à partir de row_index
-            i = row_index // (9 * 9)
-            remainder = row_index % (9 * 9)
-            j = remainder // 9
-            val = remainder % 9 + 1
-            
-            result[i][j] = val
-        
-        return result
-    else:
-        return None
+    count, cells = get_sudoku_matrix().solve(grid)
+    return cells_to_grid(cells) if count else None
+
+def count_solutions_dlx(grid, limit=2):
+    """
+    Compte les solutions d'un Sudoku, en s'arrêtant à limit.
+
+    Avec limit=2 (valeur par défaut), permet de vérifier qu'une grille a une
+    solution unique sans énumérer toutes ses solutions.
+
+    Args:
+        grid: Une grille de Sudoku 9x9 représentée comme une liste de listes.
+              Les cases vides sont représentées par 0.
+        limit: Nombre maximal de solutions à compter.
+
+    Returns:
+        int: Le nombre de solutions, borné par limit.
+    """
+    count, _ = get_sudoku_matrix().solve(grid, limit)
+    return count
 
 def solve_sudoku_dlx_simple(grid):
     """
     Version simplifiée utilisant Dancing Links pour résoudre un Sudoku.
     Cette version est une interface plus simple pour solve_sudoku_dlx.
-    
+
     Args:
         grid: Une grille de Sudoku 9x9 représentée comme une liste de listes.
               Les cases vides sont représentées par 0.
-    
+
     Returns:
         La grille résolue si une solution existe, None sinon.
     """
-    # Crée un tableau pour stocker les indices des cases préremplies
-    filled_cells = []
-    for i in range(9):
-        for j in range(9):
-            if grid[i][j] != 0:
-                filled_cells.append((i, j, grid[i][j]))
-    
-    # Crée une grille vide
-    empty_grid = [[0 for _ in range(9)] for _ in range(9)]
-    
-    # Essaie de résoudre le Sudoku vide
-    result = solve_sudoku_dlx(empty_grid)
-    
-    if result:
-        # Vérifie si la solution est compatible avec les cases préremplies
-        for i, j, val in filled_cells:
-            if result[i][j] != val:
-                return None  # Incompatible
-        return result
-    else:
-        return None
\ No newline at end of file
+    return solve_sudoku_dlx(grid)
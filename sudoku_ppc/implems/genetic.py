@@ -1,169 +1,213 @@
-import random
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import copy
 
-def solve_sudoku_genetic(grid, population_size=100, max_generations=1000, 
-                          mutation_rate=0.1, elite_size=10):
+from implems.board import UNITS
+
+
+# Indices (dans la grille aplatie) des 27 unités: lignes, colonnes, blocs
+UNIT_INDICES = np.array(UNITS, dtype=np.intp)
+
+
+def solve_sudoku_genetic(grid, population_size=100, max_generations=1000,
+                          mutation_rate=0.1, elite_size=10, islands=1,
+                          migration_interval=50, migration_size=5, seed=None):
     """
     Résout un Sudoku en utilisant un algorithme génétique.
-    
+
+    Toute la population est stockée dans un seul tableau (P, 9, 9): l'évaluation,
+    la sélection, le croisement et la mutation sont des opérations NumPy sur la
+    population entière.
+
     Args:
         grid: Une grille de Sudoku 9x9 représentée comme une liste de listes.
               Les cases vides sont représentées par 0.
-        population_size: Taille de la population.
+        population_size: Taille de la population (de chaque île).
         max_generations: Nombre maximum de générations.
-        mutation_rate: Taux de mutation.
+        mutation_rate: Taux de mutation (probabilité de muter chaque ligne).
         elite_size: Nombre d'individus élites à conserver.
-        
+        islands: Nombre de populations évoluant en parallèle, chacune dans son
+                 propre processus (1 pour une seule population, sans processus).
+        migration_interval: Nombre de générations entre deux migrations.
+        migration_size: Nombre de meilleurs individus migrant d'une île à la
+                        suivante (en anneau), en remplaçant les pires.
+        seed: Graine du générateur aléatoire.
+
     Returns:
         La grille résolue si une solution a été trouvée, None sinon.
     """
-    # Convertir la grille en numpy array pour faciliter les manipulations
-    grid = np.array(grid)
-    
-    # Positions fixes (les chiffres donnés dans la grille originale)
-    fixed_positions = np.zeros((9, 9), dtype=bool)
-    for i in range(9):
-        for j in range(9):
-            if grid[i, j] != 0:
-                fixed_positions[i, j] = True
-    
-    # Création de la population initiale
-    population = [create_individual(grid.copy(), fixed_positions) for _ in range(population_size)]
-    
-    # Début de l'évolution
-    best_fitness = 0
-    best_solution = None
-    
-    for generation in range(max_generations):
-        # Évaluation de la population
-        fitness_scores = [fitness(individual) for individual in population]
-        
-        # Vérifier si une solution parfaite a été trouvée
-        best_idx = np.argmax(fitness_scores)
-        if fitness_scores[best_idx] > best_fitness:
-            best_fitness = fitness_scores[best_idx]
-            best_solution = population[best_idx].copy()
-            
-            # Si une solution parfaite est trouvée, on s'arrête
-            if best_fitness == 162:  # 9 lignes + 9 colonnes + 9 blocs, tous parfaits
-                return best_solution.tolist()
-        
-        # Sélection des parents
-        parents = selection(population, fitness_scores, elite_size)
-        
-        # Création de la nouvelle population
-        next_generation = parents.copy()  # Élites conservés
-        
-        # Compléter la population avec des enfants
-        while len(next_generation) < population_size:
-            parent1, parent2 = random.sample(parents, 2)
-            child = crossover(parent1, parent2, fixed_positions)
-            child = mutation(child, fixed_positions, mutation_rate)
-            next_generation.append(child)
-        
-        population = next_generation
-    
-    # Retourner la meilleure solution trouvée
-    if best_solution is not None:
-        return best_solution.tolist()
+    grid = np.array(grid, dtype=np.int8)
+    free_pos, n_free = free_positions(grid)
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(islands)]
+    populations = [create_population(grid, free_pos, n_free, population_size, rng)
+                   for rng in rngs]
+    params = (free_pos, n_free, mutation_rate, elite_size)
+
+    if islands == 1:
+        population, _, solution = evolve(populations[0], max_generations, rngs[0], *params)
+        return solution
+
+    with ProcessPoolExecutor(max_workers=islands) as executor:
+        generations = 0
+        while generations < max_generations:
+            epoch = min(migration_interval, max_generations - generations)
+            results = list(executor.map(
+                _evolve_island,
+                [(populations[k], epoch, rngs[k]) + params for k in range(islands)]
+            ))
+            generations += epoch
+
+            for population, rng, solution in results:
+                if solution is not None:
+                    return solution
+            populations = [population for population, _, _ in results]
+            rngs = [rng for _, rng, _ in results]
+            migrate(populations, migration_size)
+
     return None
 
-def create_individual(grid, fixed_positions):
+def free_positions(grid):
     """
-    Crée un individu valide pour la population initiale.
-    Les chiffres fixes sont conservés, les autres sont remplis de manière aléatoire
-    tout en respectant les contraintes par ligne.
+    Calcule, pour chaque ligne, les colonnes des cases non fixes.
+
+    Returns:
+        tuple: (free_pos, n_free) où free_pos[i, :n_free[i]] sont les colonnes
+        libres de la ligne i (tableau complété par des zéros).
     """
-    # Pour chaque ligne, remplir les cases vides avec les chiffres manquants
-    for i in range(9):
-        # Trouver les chiffres déjà présents dans la ligne
-        present_digits = set(grid[i][grid[i] != 0])
-        
-        # Chiffres manquants à placer
-        missing_digits = list(set(range(1, 10)) - present_digits)
-        random.shuffle(missing_digits)
-        
-        # Remplir les cases vides avec les chiffres manquants
-        for j in range(9):
-            if grid[i, j] == 0:
-                grid[i, j] = missing_digits.pop()
-    
-    return grid
-
-def fitness(grid):
-    """
-    Évalue la qualité d'une solution.
-    Une solution parfaite a un score de 162 (9 lignes + 9 colonnes + 9 blocs, tous parfaits).
-    """
-    score = 0
-    
-    # Vérifier les lignes
-    for i in range(9):
-        score += len(set(grid[i])) - (9 - len(set(grid[i])))
-    
-    # Vérifier les colonnes
-    for j in range(9):
-        score += len(set(grid[:, j])) - (9 - len(set(grid[:, j])))
-    
-    # Vérifier les blocs 3x3
-    for block_i in range(3):
-        for block_j in range(3):
-            block = grid[block_i*3:(block_i+1)*3, block_j*3:(block_j+1)*3].flatten()
-            score += len(set(block)) - (9 - len(set(block)))
-    
-    return score
-
-def selection(population, fitness_scores, elite_size):
-    """
-    Sélectionne les meilleurs individus pour la reproduction.
-    """
-    # Trier la population par fitness
-    elite_indices = np.argsort(fitness_scores)[-elite_size:]
-    elites = [population[i] for i in elite_indices]
-    
-    return elites
-
-def crossover(parent1, parent2, fixed_positions):
-    """
-    Crée un nouvel individu en combinant deux parents.
-    Le croisement se fait par ligne: certaines lignes viennent du parent1, d'autres du parent2.
-    """
-    child = np.zeros((9, 9), dtype=int)
-    
-    # Sélectionner aléatoirement les lignes à hériter de chaque parent
+    free_pos = np.zeros((9, 9), dtype=np.intp)
+    n_free = np.zeros(9, dtype=np.intp)
     for i in range(9):
-        if random.random() < 0.5:
-            child[i] = parent1[i].copy()
-        else:
-            child[i] = parent2[i].copy()
-    
-    # S'assurer que les positions fixes sont respectées
+        cols = np.flatnonzero(grid[i] == 0)
+        free_pos[i, :len(cols)] = cols
+        n_free[i] = len(cols)
+    return free_pos, n_free
+
+def create_population(grid, free_pos, n_free, size, rng):
+    """
+    Crée la population initiale.
+    Les chiffres fixes sont conservés, les autres sont remplis de manière aléatoire
+    tout en respectant les contraintes par ligne: chaque ligne est une permutation
+    de 1..9.
+    """
+    population = np.repeat(grid[np.newaxis], size, axis=0)
     for i in range(9):
-        for j in range(9):
-            if fixed_positions[i, j]:
-                # Récupérer la valeur fixe du parent1 (les deux parents ont les mêmes valeurs fixes)
-                child[i, j] = parent1[i, j]
-    
-    return child
+        if n_free[i] == 0:
+            continue
+        # Chiffres manquants de la ligne, placés dans un ordre aléatoire par individu
+        missing = np.setdiff1d(np.arange(1, 10), grid[i]).astype(np.int8)
+        order = np.argsort(rng.random((size, n_free[i])), axis=1)
+        population[:, i, free_pos[i, :n_free[i]]] = missing[order]
+    return population
+
+def population_fitness(population):
+    """
+    Évalue la qualité de toute la population.
+    Le score est le nombre de doublons dans les lignes, colonnes et blocs 3x3:
+    une solution parfaite a un score de 0.
+    """
+    units = population.reshape(len(population), 81)[:, UNIT_INDICES]
+    units = np.sort(units, axis=2)
+    distinct = 1 + np.count_nonzero(np.diff(units, axis=2), axis=2)
+    return (9 - distinct).sum(axis=1)
 
-def mutation(individual, fixed_positions, mutation_rate):
+def tournament_selection(scores, n, rng, k=3):
     """
-    Applique une mutation à un individu.
+    Sélectionne n parents par tournoi: parmi k individus tirés au hasard,
+    celui ayant le moins de doublons gagne.
+    """
+    candidates = rng.integers(0, len(scores), size=(n, k))
+    winners = np.argmin(scores[candidates], axis=1)
+    return candidates[np.arange(n), winners]
+
+def crossover(parents1, parents2, rng):
+    """
+    Crée de nouveaux individus en combinant deux parents.
+    Le croisement se fait par ligne: certaines lignes viennent du parent1,
+    d'autres du parent2. Chaque ligne des parents respecte les positions fixes,
+    les enfants les respectent donc aussi.
+    """
+    from_first = rng.random(parents1.shape[:2]) < 0.5
+    return np.where(from_first[:, :, np.newaxis], parents1, parents2)
+
+def mutation(population, free_pos, n_free, mutation_rate, rng):
+    """
+    Applique une mutation à toute la population (en place).
     La mutation consiste à échanger deux chiffres non fixes dans une même ligne.
     """
-    mutated = individual.copy()
-    
-    for i in range(9):
-        if random.random() < mutation_rate:
-            # Trouver les positions non fixes dans cette ligne
-            non_fixed_positions = [j for j in range(9) if not fixed_positions[i, j]]
-            
-            if len(non_fixed_positions) >= 2:
-                # Choisir deux positions à échanger
-                j1, j2 = random.sample(non_fixed_positions, 2)
-                
-                # Échanger les valeurs
-                mutated[i, j1], mutated[i, j2] = mutated[i, j2], mutated[i, j1]
-    
-    return mutated
\ No newline at end of file
+    size = len(population)
+    mutate = (rng.random((size, 9)) < mutation_rate) & (n_free >= 2)
+    p, r = np.nonzero(mutate)
+    if len(p) == 0:
+        return population
+
+    # Tire deux positions libres distinctes dans chaque ligne mutée
+    n = n_free[r]
+    a = (rng.random(len(r)) * n).astype(np.intp)
+    b = (rng.random(len(r)) * (n - 1)).astype(np.intp)
+    b += b >= a
+    col_a = free_pos[r, a]
+    col_b = free_pos[r, b]
+
+    # Échanger les valeurs
+    values_a = population[p, r, col_a]
+    population[p, r, col_a] = population[p, r, col_b]
+    population[p, r, col_b] = values_a
+    return population
+
+def evolve(population, generations, rng, free_pos, n_free, mutation_rate, elite_size):
+    """
+    Fait évoluer une population pendant un nombre donné de générations.
+
+    Returns:
+        tuple: (population finale, générateur aléatoire, solution ou None)
+    """
+    size = len(population)
+    elite_size = min(elite_size, size)
+
+    for _ in range(generations):
+        # Évaluation de la population
+        scores = population_fitness(population)
+
+        # Vérifier si une solution parfaite a été trouvée
+        best = np.argmin(scores)
+        if scores[best] == 0:
+            return population, rng, population[best].tolist()
+
+        # Élites conservés
+        elites = population[np.argpartition(scores, elite_size - 1)[:elite_size]] \
+            if elite_size else population[:0]
+
+        # Compléter la population avec des enfants
+        n_children = size - elite_size
+        parents1 = population[tournament_selection(scores, n_children, rng)]
+        parents2 = population[tournament_selection(scores, n_children, rng)]
+        children = crossover(parents1, parents2, rng)
+        mutation(children, free_pos, n_free, mutation_rate, rng)
+
+        population = np.concatenate((elites, children))
+
+    scores = population_fitness(population)
+    best = np.argmin(scores)
+    if scores[best] == 0:
+        return population, rng, population[best].tolist()
+    return population, rng, None
+
+def _evolve_island(args):
+    """Fait évoluer une île dans un processus du pool."""
+    population, generations, rng, *params = args
+    return evolve(population, generations, rng, *params)
+
+def migrate(populations, migration_size):
+    """
+    Migration en anneau: les meilleurs individus de chaque île remplacent
+    les pires individus de l'île suivante (en place).
+    """
+    migration_size = min(migration_size, min(len(p) for p in populations))
+    if migration_size <= 0:
+        return
+    scores = [population_fitness(population) for population in populations]
+    migrants = [population[np.argsort(score)[:migration_size]].copy()
+                for population, score in zip(populations, scores)]
+    for k, population in enumerate(populations):
+        worst = np.argsort(scores[k])[-migration_size:]
+        population[worst] = migrants[k - 1]
@@ -1,3 +1,8 @@
+from implems.board import (ALL_DIGITS, ROW_OF, COL_OF, BOX_OF, DIGIT_BIT,
+                           POPCOUNT, MASK_DIGITS, grid_to_cells, cells_to_grid,
+                           unit_masks)
+
+
 def solve_sudoku_mrv(input_grid):
     """
     Résout un Sudoku en utilisant l'heuristique MRV (Minimum Remaining Values)
@@ -10,133 +15,82 @@ def solve_sudoku_mrv(input_grid):
     Returns:
         La grille résolue si une solution existe, None sinon.
     """
-    # Crée une copie profonde pour ne pas modifier l'original
-    grid = [row.copy() for row in input_grid]
-    
-    # Domaines pour chaque cellule (valeurs possibles)
-    domains = {}
+    # Copie la grille dans un tableau plat de 81 cases
+    cells = grid_to_cells(input_grid)
     
-    # Initialise les domaines
-    for row in range(9):
-        for col in range(9):
-            pos = (row, col)
-            if grid[row][col] == 0:
-                domains[pos] = set(range(1, 10))
-            else:
-                domains[pos] = {grid[row][col]}
+    # Masques des chiffres déjà utilisés par ligne, colonne et bloc
+    masks = unit_masks(cells)
+    if masks is None:
+        return None
+    rows, cols, boxes = masks
     
-    # Met à jour les domaines en fonction des contraintes initiales
-    for row in range(9):
-        for col in range(9):
-            if grid[row][col] != 0:
-                update_domains(domains, row, col, grid[row][col], grid)
+    # Cases restant à remplir
+    empties = [i for i in range(81) if cells[i] == 0]
     
     # Essaie de résoudre la grille
-    if backtrack_with_mrv(grid, domains):
-        return grid
+    if backtrack_with_mrv(cells, empties, rows, cols, boxes):
+        return cells_to_grid(cells)
     return None
 
-def update_domains(domains, row, col, value, grid):
-    """
-    Met à jour les domaines des cellules affectées par un placement.
-    """
-    # Enlève la valeur des domaines dans la même ligne
-    for c in range(9):
-        pos = (row, c)
-        if grid[row][c] == 0 and pos in domains and value in domains[pos]:
-            domains[pos].remove(value)
-    
-    # Enlève la valeur des domaines dans la même colonne
-    for r in range(9):
-        pos = (r, col)
-        if grid[r][col] == 0 and pos in domains and value in domains[pos]:
-            domains[pos].remove(value)
-    
-    # Enlève la valeur des domaines dans le même bloc 3x3
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-    for r in range(start_row, start_row + 3):
-        for c in range(start_col, start_col + 3):
-            pos = (r, c)
-            if grid[r][c] == 0 and pos in domains and value in domains[pos]:
-                domains[pos].remove(value)
-
-def backtrack_with_mrv(grid, domains):
+def backtrack_with_mrv(cells, empties, rows, cols, boxes):
     """
     Backtracking avec l'heuristique MRV (Minimum Remaining Values).
+    
+    Les domaines ne sont pas stockés : le masque des candidats d'une case est
+    recalculé en O(1) à partir des masques de sa ligne, colonne et bloc, ce qui
+    rend la restauration de l'état triviale lors du retour en arrière.
     """
-    # Vérifie si la grille est complète
-    if all(grid[row][col] != 0 for row in range(9) for col in range(9)):
+    # La grille est complète
+    if not empties:
         return True
     
-    # Trouve la variable avec le moins de valeurs restantes (MRV)
+    # Trouve la case avec le moins de valeurs restantes (MRV)
     min_remaining = 10  # Plus que le maximum possible (9)
-    mrv_pos = None
-    
-    for pos in domains:
-        row, col = pos
-        if grid[row][col] == 0 and len(domains[pos]) < min_remaining:
-            min_remaining = len(domains[pos])
-            mrv_pos = pos
+    mrv_index = -1
+    mrv_mask = 0
+    
+    for k, i in enumerate(empties):
+        mask = ALL_DIGITS & ~(rows[ROW_OF[i]] | cols[COL_OF[i]] | boxes[BOX_OF[i]])
+        remaining = POPCOUNT[mask]
+        if remaining < min_remaining:
+            min_remaining = remaining
+            mrv_index = k
+            mrv_mask = mask
             
-            # Optimisation: si une cellule n'a qu'une seule valeur possible,
-            # il n'est pas nécessaire de chercher plus loin
-            if min_remaining == 1:
+            # Une case sans valeur possible (échec) ou avec une seule valeur
+            # possible : inutile de chercher plus loin
+            if remaining <= 1:
                 break
     
-    # Si une variable n'a plus de valeurs possibles, échec
+    # Si une case n'a plus de valeurs possibles, échec
     if min_remaining == 0:
         return False
     
-    # Si aucune variable n'a été trouvée, la grille est complète
-    if mrv_pos is None:
-        return True
-    
-    row, col = mrv_pos
+    # Retire la case choisie de la liste des cases vides
+    last = len(empties) - 1
+    empties[mrv_index], empties[last] = empties[last], empties[mrv_index]
+    pos = empties.pop()
+    r, c, b = ROW_OF[pos], COL_OF[pos], BOX_OF[pos]
     
     # Essaie chaque valeur possible
-    for value in sorted(domains[mrv_pos]):
-        if is_valid(grid, row, col, value):
-            # Place la valeur
-            grid[row][col] = value
-            
-            # Sauvegarde les domaines pour pouvoir les restaurer
-            old_domains = {pos: set(domains[pos]) for pos in domains}
-            
-            # Met à jour les domaines
-            update_domains(domains, row, col, value, grid)
-            
-            # Vérifie s'il y a des domaines vides (échec précoce)
-            if not any(len(domains[pos]) == 0 for pos in domains if grid[pos[0]][pos[1]] == 0):
-                # Récursion
-                if backtrack_with_mrv(grid, domains):
-                    return True
-            
-            # Restaure l'état précédent
-            grid[row][col] = 0
-            for pos in old_domains:
-                domains[pos] = old_domains[pos]
-    
+    for value in MASK_DIGITS[mrv_mask]:
+        bit = DIGIT_BIT[value]
+        
+        # Place la valeur
+        cells[pos] = value
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        
+        if backtrack_with_mrv(cells, empties, rows, cols, boxes):
+            return True
+        
+        # Restaure l'état précédent
+        rows[r] &= ~bit
+        cols[c] &= ~bit
+        boxes[b] &= ~bit
+    
+    cells[pos] = 0
+    empties.append(pos)
+    empties[mrv_index], empties[last] = empties[last], empties[mrv_index]
     return False
-
-def is_valid(grid, row, col, value):
-    """
-    Vérifie si un placement est valide selon les règles du Sudoku.
-    """
-    # Vérifie la ligne
-    for c in range(9):
-        if grid[row][c] == value:
-            return False
-    
-    # Vérifie la colonne
-    for r in range(9):
-        if grid[r][col] == value:
-            return False
-    
-    # Vérifie le bloc 3x3
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-    for r in range(start_row, start_row + 3):
-        for c in range(start_col, start_col + 3):
-            if grid[r][c] == value:
-                return False
-    
-    return True
\ No newline at end of file
@@ -1,3 +1,23 @@
+from operator import itemgetter
+
+from implems.board import (ALL_DIGITS, DIGIT_BIT, UNITS, CELL_UNIT_INDICES,
+                           PEERS, POPCOUNT, MASK_DIGITS, MASK_TO_DIGIT,
+                           grid_to_cells, cells_to_grid)
+
+# Ensembles d'unités représentés par un masque de 27 bits (bit k = UNITS[k])
+ALL_UNITS = (1 << 27) - 1
+CELL_UNIT_BITS = tuple(
+    (1 << a) | (1 << b) | (1 << c) for a, b, c in CELL_UNIT_INDICES
+)
+
+# Masque lui-même s'il ne contient qu'un chiffre, 0 sinon
+SINGLE = tuple(m if POPCOUNT[m] == 1 else 0 for m in range(512))
+# Vrai si le masque contient plusieurs chiffres (case non résolue)
+UNSOLVED = tuple(POPCOUNT[m] > 1 for m in range(512))
+# Lecture des valeurs des 20 pairs d'une case en un seul appel
+PEER_GETTERS = tuple(itemgetter(*peers) for peers in PEERS)
+
+
 def solve_sudoku_norvig(grid):
     """
     Résout un Sudoku en utilisant la propagation de contraintes et la recherche
@@ -10,109 +30,126 @@ def solve_sudoku_norvig(grid):
     Returns:
         La grille résolue si une solution existe, None sinon.
     """
-    # Convertir la grille en un dictionnaire de positions et valeurs
-    values = {}
-    digits = '123456789'
-    rows = 'ABCDEFGHI'
-    cols = digits
+    # Initialisation: chaque case est un masque de ses valeurs possibles
+    cells = grid_to_cells(grid)
+    values = [DIGIT_BIT[val] if val else ALL_DIGITS for val in cells]
     
-    # Toutes les cases du Sudoku
-    squares = [r+c for r in rows for c in cols]
+    # Propagation initiale des contraintes à partir des cases données
+    if not propagate(values, [s for s in range(81) if cells[s]], ALL_UNITS):
+        return None  # Contradiction
     
-    # Les unités (lignes, colonnes, blocs)
-    unit_list = (
-        # All rows
-        [[r+c for c in cols] for r in rows] +
-        # All columns
-        [[r+c for r in rows] for c in cols] +
-        # All 3x3 boxes
-        [[r+c for r in rs for c in cs]
-         for rs in ('ABC', 'DEF', 'GHI') 
-         for cs in ('123', '456', '789')]
-    )
-    
-    # Dictionnaire associant chaque case à ses unités
-    units = {s: [u for u in unit_list if s in u] for s in squares}
+    # Recherche avec backtracking
+    values = search(values)
     
-    # Dictionnaire associant chaque case à ses peers (cases de la même unité)
-    peers = {s: set(sum(units[s], [])) - {s} for s in squares}
+    if values:
+        # Convertir le résultat en format de grille
+        return cells_to_grid([MASK_TO_DIGIT[m] for m in values])
+    else:
+        return None
+
+def assign(values, s, bit):
+    """Assigne le chiffre de masque bit à la case s et propage les contraintes."""
+    values[s] = bit
+    return propagate(values, [s], CELL_UNIT_BITS[s])
+
+def propagate(values, queue, dirty):
+    """
+    Propage les contraintes jusqu'à un point fixe.
     
-    # Initialisation: assigner les valeurs initiales et les possibilités restantes
-    for r, row in enumerate(grid):
-        for c, val in enumerate(row):
-            pos = rows[r] + cols[c]
-            values[pos] = digits if val == 0 else str(val)
+    Deux règles sont appliquées en alternance:
+    - une case n'ayant qu'une valeur possible l'élimine de ses pairs;
+    - si une unité n'a qu'une place possible pour un chiffre, il y est assigné.
     
-    def assign(values, s, d):
-        """Assigne une valeur d à la case s et propage les contraintes."""
-        other_values = values[s].replace(d, '')
-        if all(eliminate(values, s, d2) for d2 in other_values):
-            return values
-        return False
+    Args:
+        values: Les 81 masques de candidats, modifiés en place.
+        queue: Les cases fraîchement réduites à une seule valeur.
+        dirty: Masque des unités modifiées depuis leur dernier examen
+               (bit k pour UNITS[k]).
     
-    def eliminate(values, s, d):
-        """Élimine d des valeurs possibles à la case s."""
-        if d not in values[s]:
-            return values  # Déjà éliminé
-        values[s] = values[s].replace(d, '')
-        
-        # Si une case n'a plus de valeurs possibles, contradiction
-        if len(values[s]) == 0:
-            return False
+    Returns:
+        bool: False si une contradiction a été détectée, True sinon.
+    """
+    while True:
+        # Élimine la valeur des cases résolues chez leurs pairs
+        while queue:
+            s = queue.pop()
+            bit = values[s]
+            for s2 in PEERS[s]:
+                m = values[s2]
+                if m & bit:
+                    m ^= bit
+                    if m == 0:
+                        return False  # Contradiction: plus de valeur possible
+                    values[s2] = m
+                    dirty |= CELL_UNIT_BITS[s2]
+                    if POPCOUNT[m] == 1:
+                        queue.append(s2)
         
-        # Si une case n'a qu'une valeur possible d2, éliminer d2 des pairs
-        if len(values[s]) == 1:
-            d2 = values[s]
-            if not all(eliminate(values, s2, d2) for s2 in peers[s]):
-                return False
+        # Cherche les chiffres n'ayant qu'une seule place dans une unité,
+        # en ne réexaminant que les unités modifiées
+        units, dirty = dirty, 0
+        k = 0
+        while units:
+            if units & 1:
+                u = UNITS[k]
+                once = twice = solved = 0
+                for s in u:
+                    m = values[s]
+                    twice |= once & m
+                    once |= m
+                    solved |= SINGLE[m]
+                if once != ALL_DIGITS:
+                    return False  # Contradiction: aucune place pour un chiffre
+                # Les chiffres déjà placés apparaissent aussi une seule fois:
+                # ils sont exclus pour ne pas reparcourir l'unité pour rien
+                hidden = once & ~(twice | solved)
+                if hidden:
+                    for s in u:
+                        m = values[s] & hidden
+                        if m:
+                            if POPCOUNT[m] > 1:
+                                return False  # Deux chiffres pour une seule case
+                            values[s] = m
+                            dirty |= CELL_UNIT_BITS[s]
+                            queue.append(s)
+            units >>= 1
+            k += 1
         
-        # Si une unité n'a qu'une place possible pour d, l'assigner
-        for u in units[s]:
-            dplaces = [s for s in u if d in values[s]]
-            if len(dplaces) == 0:
-                return False  # Contradiction: aucune place pour cette valeur
-            elif len(dplaces) == 1:
-                # d ne peut être placé que dans un seul endroit de cette unité
-                if not assign(values, dplaces[0], d):
-                    return False
+        if not queue:
+            return True
+
+def search(values):
+    """Utilise la recherche avec backtracking pour résoudre le Sudoku."""
+    # Cases non résolues ayant le moins de possibilités
+    min_count = 10
+    cells = []
+    for i, m in enumerate(values):
+        n = POPCOUNT[m]
+        if 1 < n <= min_count:
+            if n < min_count:
+                min_count = n
+                cells = [i]
+            else:
+                cells.append(i)
+    
+    # Toutes les cases n'ont qu'une valeur possible: résolu!
+    if not cells:
         return values
     
-    def search(values):
-        """Utilise la recherche avec backtracking pour résoudre le Sudoku."""
-        if values is False:
-            return False  # Échec précédent
-        
-        # Vérifie si toutes les cases n'ont qu'une valeur possible
-        if all(len(values[s]) == 1 for s in squares):
-            return values  # Résolu!
-        
-        # Choisir la case non résolue avec le moins de possibilités
-        n, s = min((len(values[s]), s) for s in squares if len(values[s]) > 1)
-        
-        # Essayer chaque valeur possible
-        for d in values[s]:
-            result = search(assign(values.copy(), s, d))
+    # À égalité, choisir la case ayant le plus de pairs non résolus: ses
+    # hypothèses propagent plus loin (deux fois moins de nœuds sur les
+    # grilles difficiles)
+    s = cells[0]
+    if len(cells) > 1:
+        unsolved = list(map(UNSOLVED.__getitem__, values))
+        s = max(cells, key=lambda i: sum(PEER_GETTERS[i](unsolved)))
+    
+    # Essayer chaque valeur possible
+    for d in MASK_DIGITS[values[s]]:
+        attempt = values.copy()
+        if assign(attempt, s, DIGIT_BIT[d]):
+            result = search(attempt)
             if result:
                 return result
-                
-        return False
-    
-    # Propagation initiale des contraintes
-    for s in squares:
-        if len(values[s]) == 1:
-            d = values[s]
-            if not all(eliminate(values, s2, d) for s2 in peers[s]):
-                return None  # Contradiction
     
-    # Recherche avec backtracking
-    values = search(values)
-    
-    if values:
-        # Convertir le résultat en format de grille
-        result = [[0 for _ in range(9)] for _ in range(9)]
-        for r, row in enumerate(rows):
-            for c, col in enumerate(cols):
-                result[r][c] = int(values[row+col])
-        return result
-    else:
-        return None
\ No newline at end of file
+    return False
@@ -0,0 +1,45 @@
+import importlib
+
+
+# Solveurs disponibles dans implems/: nom -> (module, fonction)
+SOLVERS = {
+    'backtrack': ('implems.backtrack', 'solve_sudoku_backtracking'),
+    'constraint': ('implems.constraint', 'solve_sudoku_constraint'),
+    'dlx': ('implems.dlx', 'solve_sudoku_dlx'),
+    'genetic': ('implems.genetic', 'solve_sudoku_genetic'),
+    'mrv': ('implems.mrv', 'solve_sudoku_mrv'),
+    'norvig': ('implems.norvig', 'solve_sudoku_norvig'),
+}
+
+
+def get_solver(name):
+    """
+    Retourne la fonction de résolution associée à un nom de solveur.
+    
+    Le module n'est importé qu'à la demande, ce qui évite de charger les
+    dépendances optionnelles (python-constraint, numpy) des solveurs inutilisés.
+    
+    Args:
+        name (str): Nom du solveur (clé de SOLVERS)
+        
+    Returns:
+        callable: La fonction solve_sudoku_* correspondante
+    """
+    if name not in SOLVERS:
+        raise ValueError(f"Solveur inconnu: {name} (disponibles: {', '.join(SOLVERS)})")
+    module_name, function_name = SOLVERS[name]
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def solution_to_grid(solution):
+    """
+    Normalise le résultat d'un solveur en grille 9x9 (ou None).
+    
+    solve_sudoku_constraint retourne un dictionnaire {'cell_i_j': valeur}
+    alors que les autres solveurs retournent une liste de listes.
+    """
+    if not solution:
+        return None
+    if isinstance(solution, dict):
+        return [[solution[f'cell_{i}_{j}'] for j in range(9)] for i in range(9)]
+    return [list(row) for row in solution]
@@ -11,38 +11,56 @@ def print_sudoku(grid):
             print(grid[i][j] if grid[i][j] != 0 else ".", end=" ")
         print()
 
-def process_sudoku_file(file_path):
+def iter_sudoku_file(file_path):
     """
-    Lit un fichier contenant des grilles de Sudoku et retourne la liste des grilles
+    Lit un fichier de grilles de Sudoku au fil de l'eau et produit les grilles
+    une par une, sans charger tout le fichier en mémoire.
     
-    Format attendu du fichier:
-    - Les grilles sont séparées par une ligne vide ou un séparateur clair
-    - Chaque grille est représentée sur 9 lignes de 9 chiffres (0 pour les cases vides)
+    Deux formats sont reconnus (et peuvent être mélangés):
+    - 9 lignes de 9 chiffres (0 pour les cases vides), les grilles étant
+      séparées par une ligne vide (ex: hard_test.txt);
+    - une grille par ligne, sur 81 caractères ('.' ou 0 pour les cases vides),
+      éventuellement suivie d'autres champs (ex: HardestDatabase110626.txt).
+    Les autres lignes (en-têtes, commentaires) sont ignorées.
     
     Args:
         file_path (str): Chemin vers le fichier contenant les grilles
         
-    Returns:
-        list: Liste des grilles
+    Yields:
+        list: Une grille 9x9 (liste de listes d'entiers)
     """
-    grids = []
-    
-    with open(file_path, 'r') as file:
+    with open(file_path, 'r', encoding='utf-8') as file:
         current_grid = []
         for line in file:
             line = line.strip()
-            if line:
+            if len(line) >= 81 and all(c in '0123456789.' for c in line[:81]):
+                # Grille complète sur une seule ligne
+                cells = [0 if c == '.' else int(c) for c in line[:81]]
+                yield [cells[i * 9:(i + 1) * 9] for i in range(9)]
+            elif line:
                 # Si la ligne contient des chiffres, l'ajouter à la grille courante
                 if all(c in '0123456789' for c in line) and len(line) == 9:
                     current_grid.append([int(c) for c in line])
+                    if len(current_grid) == 9:
+                        yield current_grid
+                        current_grid = []
             else:
-                # Si ligne vide et grille courante non vide, ajouter la grille à la liste
-                if current_grid:
-                    grids.append(current_grid)
+                # Ligne vide: fin de la grille courante
                 current_grid = []
-        
-        # Traiter la dernière grille si le fichier ne se termine pas par une ligne vide
-        if current_grid and len(current_grid) == 9:
-            grids.append(current_grid)
+
+def process_sudoku_file(file_path):
+    """
+    Lit un fichier contenant des grilles de Sudoku et retourne la liste des grilles
+    
+    Format attendu du fichier:
+    - Les grilles sont séparées par une ligne vide ou un séparateur clair
+    - Chaque grille est représentée sur 9 lignes de 9 chiffres (0 pour les cases vides)
+    - Le format sur une ligne de 81 caractères est aussi accepté (voir iter_sudoku_file)
     
-    return grids
\ No newline at end of file
+    Args:
+        file_path (str): Chemin vers le fichier contenant les grilles
+        
+    Returns:
+        list: Liste des grilles
+    """
+    return list(iter_sudoku_file(file_path))